@@ -112,7 +112,7 @@ export function LevelResourcesPage(params = {}) {
             title: res.title,
             fileSize: "-", // unknown for now
             pageCount: "-", // unknown for now
-            previewImageUrl: res.previewUrl || "/logo.png", // fallback visual
+            previewImageUrl: res.thumbnailUrl || "/logo.png", // rendered first page, else fallback visual
             isFree: !!res.isFree,
             price: res.price || 0,
             onClickView: () => {
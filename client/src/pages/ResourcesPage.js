@@ -61,7 +61,7 @@ export async function ResourcesPage() {
           title: res.title,
           fileSize: res.file_size || "1.2 MB",
           pageCount: res.page_count || 12,
-          previewImageUrl: res.preview_url || "/images/logo.png",
+          previewImageUrl: res.thumbnail_url || "/images/logo.png",
           isFree: res.is_free,
           price: res.price,
           onClickView: () => {
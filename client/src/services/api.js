@@ -112,6 +112,8 @@ function normalizeResource(r) {
     isFree: r.is_free,
     price: r.price,
     createdAt: r.created_at,
+    expiresAt: r.expires_at || null, // signed links may be reused until then
+    thumbnailUrl: r.thumbnail_url || null, // small first-page image (null until rendered)
     previewUrl,
     downloadUrl,
     _raw: r,
@@ -139,25 +141,52 @@ export async function loginUser(email, password) {
 }
 
 // Resources
-export async function fetchResources() {
-  const url = joinUrl(API_BASE_URL, "resources");
-  logGroup("📥 fetchResources() → request", { url });
+function toQuery(params = {}) {
+  const qs = new URLSearchParams(
+    Object.entries(params).filter(([, v]) => v !== undefined && v !== null && v !== "")
+  ).toString();
+  return qs ? `?${qs}` : "";
+}
 
-  const raw = await fetchJSON(url);
+// Walks the cursor-paginated list and yields one normalized page at a time.
+export async function* streamResources(params = {}) {
+  let url = joinUrl(API_BASE_URL, "resources") + toQuery(params);
+
+  while (url) {
+    logGroup("📥 streamResources() → request", { url });
+    const raw = await fetchJSON(url);
+
+    // Accept [] | {results: [], next} | {data: []}
+    const list = Array.isArray(raw)
+      ? raw
+      : Array.isArray(raw?.results)
+      ? raw.results
+      : Array.isArray(raw?.data)
+      ? raw.data
+      : [];
+
+    logGroup("📦 streamResources() → page (raw)", list);
+    yield list.map(normalizeResource);
+    url = Array.isArray(raw) ? null : raw?.next || null;
+  }
+}
 
-  // Accept [] | {results: []} | {data: []}
-  const list = Array.isArray(raw)
-    ? raw
-    : Array.isArray(raw?.results)
-    ? raw.results
-    : Array.isArray(raw?.data)
-    ? raw.data
-    : [];
+// Collects every page; pass onPage(page, soFar) to render while the rest streams in.
+export async function fetchResources(params = {}, { onPage } = {}) {
+  const all = [];
+  for await (const page of streamResources(params)) {
+    all.push(...page);
+    if (onPage) onPage(page, all);
+  }
+  logGroup("✅ fetchResources() → normalized", all);
+  return all;
+}
 
-  logGroup("📦 fetchResources() → list (raw)", list);
-  const normalized = list.map(normalizeResource);
-  logGroup("✅ fetchResources() → normalized", normalized);
-  return normalized;
+// Counts per category / level / term / free, e.g. facets.level.FORM2
+export async function fetchFacets() {
+  const url = joinUrl(API_BASE_URL, "resources", "facets");
+  logGroup("📊 fetchFacets()", { url });
+  return fetchJSON(url);
 }
 
 // Files
@@ -195,6 +224,15 @@ export async function checkIfPaid(resourceId) {
   return !!r?.is_paid;
 }
 
+// Which of `resourceIds` the user owns, in one request: Set of ids
+export async function fetchEntitlements(resourceIds, headers = {}) {
+  const url = joinUrl(API_BASE_URL, "payment", "entitlements");
+  const payload = { resource_ids: resourceIds };
+  logGroup("🔐 fetchEntitlements()", { url, count: resourceIds.length });
+  const r = await fetchJSON(url, { method: "POST", headers, body: JSON.stringify(payload) });
+  return new Set(r?.owned || []);
+}
+
 export async function initiateMpesa(phone, amount) {
   const url = joinUrl(API_BASE_URL, "payment", "initiate");
   const payload = { phone, amount };
@@ -207,8 +245,11 @@ export default {
   registerUser,
   loginUser,
   fetchResources,
+  streamResources,
+  fetchFacets,
   getFileUrl,
   downloadFile,
   checkIfPaid,
+  fetchEntitlements,
   initiateMpesa,
 };
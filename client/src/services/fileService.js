@@ -100,3 +100,44 @@ export function downloadFile(signedUrl) {
   console.log("✅ Opening signed file URL:", signedUrl);
   window.open(signedUrl, "_blank");
 }
+
+/**
+ * ✅ Upload a new file straight to storage (Admin only)
+ * 1) ask the API for a signed PUT URL, 2) PUT the bytes there,
+ * 3) register the Resource with its metadata (title, category, level, term, is_free, price).
+ */
+export async function uploadFileDirect(file, fields, token) {
+  console.log("📤 Direct upload:", file.name);
+  const auth = { Authorization: `Bearer ${token}`, "Content-Type": "application/json" };
+  const contentType = file.type || "application/octet-stream";
+
+  const ticketRes = await fetch(`${API_BASE_URL}/resources/uploads/`, {
+    method: "POST",
+    headers: auth,
+    body: JSON.stringify({ filename: file.name, content_type: contentType, size: file.size }),
+  });
+  const ticket = await ticketRes.json();
+  if (!ticketRes.ok) {
+    console.error("❌ Upload refused:", ticket);
+    throw new Error(JSON.stringify(ticket));
+  }
+
+  const putRes = await fetch(ticket.url, { method: ticket.method, headers: ticket.headers, body: file });
+  if (!putRes.ok) {
+    console.error("❌ Storage PUT failed:", putRes.status);
+    throw new Error("Upload to storage failed");
+  }
+
+  const res = await fetch(`${API_BASE_URL}/resources/uploads/complete/`, {
+    method: "POST",
+    headers: auth,
+    body: JSON.stringify({ ...fields, upload_token: ticket.upload_token }),
+  });
+  const result = await res.json();
+  if (!res.ok) {
+    console.error("❌ Registration failed:", result);
+    throw new Error(JSON.stringify(result));
+  }
+  console.log("✅ Upload registered:", result);
+  return result;
+}
@@ -1,6 +1 @@
 # elimu_backend/__init__.py
-
-import logging
-
-logger = logging.getLogger(__name__)
-logger.debug("✅ elimu_backend package initialized.")
@@ -7,8 +7,8 @@ from pathlib import Path
 from datetime import timedelta
 
 from dotenv import load_dotenv
-from google.oauth2 import service_account
 from corsheaders.defaults import default_headers
+from django.utils.functional import SimpleLazyObject
 import dj_database_url
 
 # ===============================
@@ -27,17 +27,18 @@ LOGGING = {
         "console": {"class": "logging.StreamHandler"},
     },
     "root": {"handlers": ["console"], "level": "DEBUG"},
+    # httpcore traces ~10 DEBUG lines per request; async M-Pesa pushes run hundreds at once.
+    "loggers": {"httpcore": {"level": "INFO"}},
 }
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.info("✅ settings.py loaded")
+# One DEBUG line per URL route at boot (utils.routes); off by default to keep cold starts short.
+LOG_URL_ROUTES = os.getenv("LOG_URL_ROUTES", "False").strip().lower() == "true"
 
 # ===============================
 # Core Settings
 # ===============================
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
 DEBUG = os.getenv("DEBUG", "True").strip().lower() == "true"
-logger.debug("DEBUG=%s", DEBUG)
 
 PUBLIC_APP_DOMAIN = os.getenv("PUBLIC_APP_DOMAIN", "elimu-online.onrender.com")
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", f"https://{PUBLIC_APP_DOMAIN}")
@@ -52,7 +53,6 @@ ALLOWED_HOSTS = list(
         ]
     )
 )
-logger.debug("ALLOWED_HOSTS=%s", ALLOWED_HOSTS)
 
 # ===============================
 # Installed Apps / Auth
@@ -79,13 +79,13 @@ INSTALLED_APPS = [
 ]
 
 AUTH_USER_MODEL = "users.CustomUser"
-logger.debug("AUTH_USER_MODEL=%s", AUTH_USER_MODEL)
 
 # ===============================
 # Middleware (CorsMiddleware FIRST)
 # ===============================
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # must be first
+    "utils.query_budget.QueryBudgetMiddleware",  # per-request SQL count / N+1 guard
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,6 +94,10 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
 ]
 
+# Query budgets: log overruns in prod, raise when enforced (tests/CI).
+QUERY_BUDGET_ENFORCE = os.getenv("QUERY_BUDGET_ENFORCE", "False").strip().lower() == "true"
+QUERY_BUDGET_HEADERS = DEBUG
+
 ROOT_URLCONF = "elimu_backend.urls"
 WSGI_APPLICATION = "elimu_backend.wsgi.application"
 
@@ -127,7 +131,6 @@ db_url = os.getenv("DATABASE_URL", "").strip()
 db_engine = os.getenv("DB_ENGINE", "").strip().lower()
 
 if db_url:
-    logger.debug("DB: Using DATABASE_URL")
     DATABASES = {
         "default": dj_database_url.parse(
             db_url,
@@ -136,7 +139,6 @@ if db_url:
         )
     }
 elif db_engine == "postgres":
-    logger.debug("DB: Using Local Postgres via LOCAL_DB_* envs")
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -148,7 +150,6 @@ elif db_engine == "postgres":
         }
     }
 else:
-    logger.debug("DB: Using SQLite (local dev default)")
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
@@ -156,7 +157,18 @@ else:
         }
     }
 
-logger.debug("DATABASES['default']=%s", DATABASES["default"])
+
+# ===============================
+# Cache
+# Shared Redis when REDIS_URL is set (needs the `redis` package); otherwise per-process memory, where
+# invalidations only reach the worker that made them, so keep TTLs short.
+# ===============================
+REDIS_URL = (os.getenv("REDIS_URL") or "").strip()
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+ENTITLEMENTS_CACHE_SECONDS = 300 if REDIS_URL else 30
 
 # ===============================
 # i18n / tz
@@ -185,6 +197,8 @@ MEDIA_ROOT = BASE_DIR / "media"
 # - GOOGLE_APPLICATION_CREDENTIALS_JSON (inline JSON)
 # - fallback to BASE_DIR/gcs-credentials.json if present
 # Else: uses local FileSystemStorage.
+# The key JSON is checked here; the Credentials object (google.oauth2 + RSA, slow to
+# import) is built on first use so cold starts that never touch GCS skip it.
 # ===============================
 GS_BUCKET_NAME = (os.getenv("GS_BUCKET_NAME") or "").strip() or None
 GS_CREDENTIALS = None
@@ -196,17 +210,33 @@ if gcs_path and not os.path.isabs(gcs_path):
     # allow simple relative path like "gcs-credentials.json"
     gcs_path = str((BASE_DIR / gcs_path).resolve())
 
+
+def _service_account_info(text):
+    info = json.loads(text)
+    missing = {"client_email", "private_key", "token_uri"} - set(info)
+    if missing:
+        raise ValueError(f"service-account JSON lacks {sorted(missing)}")
+    return info
+
+
+def _lazy_service_account(info):
+    def load():
+        from google.oauth2 import service_account
+        return service_account.Credentials.from_service_account_info(info)
+    return SimpleLazyObject(load)
+
+
 try:
     if gcs_json:
-        GS_CREDENTIALS = service_account.Credentials.from_service_account_info(json.loads(gcs_json))
+        GS_CREDENTIALS = _lazy_service_account(_service_account_info(gcs_json))
         logger.debug("GCS creds loaded from GOOGLE_APPLICATION_CREDENTIALS_JSON (inline JSON)")
     elif gcs_path and os.path.exists(gcs_path):
-        GS_CREDENTIALS = service_account.Credentials.from_service_account_file(gcs_path)
+        GS_CREDENTIALS = _lazy_service_account(_service_account_info(Path(gcs_path).read_text()))
         logger.debug("GCS creds loaded from GOOGLE_APPLICATION_CREDENTIALS=%s", gcs_path)
     else:
         default_candidate = BASE_DIR / "gcs-credentials.json"
         if default_candidate.exists():
-            GS_CREDENTIALS = service_account.Credentials.from_service_account_file(default_candidate)
+            GS_CREDENTIALS = _lazy_service_account(_service_account_info(default_candidate.read_text()))
             logger.debug("GCS creds loaded from default path %s", default_candidate)
         else:
             logger.warning("GCS creds not found; will use local FileSystemStorage.")
@@ -214,12 +244,13 @@ except Exception as e:
     logger.exception("Failed to load GCS credentials: %s", e)
     GS_CREDENTIALS = None
 
-USE_GCS = bool(GS_BUCKET_NAME and GS_CREDENTIALS)
+USE_GCS = bool(GS_BUCKET_NAME and GS_CREDENTIALS is not None)  # `is not None`: truthiness would build the lazy credentials
 
+# Both backends mirror object metadata into resources.StoredObject (see resources.mirror).
 DEFAULT_FILE_STORAGE = (
-    "storages.backends.gcloud.GoogleCloudStorage"
+    "resources.mirror.MirroredGoogleCloudStorage"  # GoogleCloudStorage on the shared client
     if USE_GCS
-    else "django.core.files.storage.FileSystemStorage"
+    else "resources.mirror.MirroredFileSystemStorage"
 )
 if USE_GCS:
     logger.info("Using GCS storage (bucket=%s)", GS_BUCKET_NAME)
@@ -228,6 +259,12 @@ else:
 
 GCS_MEDIA_URL = f"https://storage.googleapis.com/{GS_BUCKET_NAME}/" if USE_GCS else None
 
+# Uploads are SHA-256 hashed while they stream in (content-hash dedup, see resources.blobs).
+FILE_UPLOAD_HANDLERS = [
+    "utils.hashing.HashingMemoryFileUploadHandler",
+    "utils.hashing.HashingTemporaryFileUploadHandler",
+]
+
 # ===============================
 # DRF / JWT
 # ===============================
@@ -242,7 +279,6 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
-logger.debug("REST_FRAMEWORK + SIMPLE_JWT configured")
 
 # ===============================
 # Proxy Awareness (Render/Nginx)
@@ -265,19 +301,13 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^https://.*\.onrender\.com$",
 ]
-CORS_ALLOW_HEADERS = list(default_headers) + ["Authorization", "Content-Type"]
-CORS_EXPOSE_HEADERS = ["Authorization", "Content-Type"]
+CORS_ALLOW_HEADERS = list(default_headers) + ["Authorization", "Content-Type", "If-None-Match"]
+CORS_EXPOSE_HEADERS = ["Authorization", "Content-Type", "ETag"]
 CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 
 CSRF_TRUSTED_ORIGINS = [
     f"https://{PUBLIC_APP_DOMAIN}",
 ]
-logger.debug(
-    "CORS configured | FRONTEND_ORIGIN=%s | CREDENTIALS=%s | CSRF_TRUSTED_ORIGINS=%s",
-    FRONTEND_ORIGIN,
-    CORS_ALLOW_CREDENTIALS,
-    CSRF_TRUSTED_ORIGINS,
-)
 
 # ===============================
 # Jazzmin (admin UI)
@@ -299,7 +329,6 @@ JAZZMIN_SETTINGS = {
     "default_icon_parents": "fas fa-chevron-circle-right",
     "default_icon_children": "fas fa-circle",
 }
-logger.debug("Jazzmin configured")
 
 # ===============================
 # M-Pesa (env-provided)
@@ -310,14 +339,15 @@ MPESA_CONSUMER_KEY = os.getenv("MPESA_CONSUMER_KEY")
 MPESA_CONSUMER_SECRET = os.getenv("MPESA_CONSUMER_SECRET")
 MPESA_PASSKEY = os.getenv("MPESA_PASSKEY")
 MPESA_CALLBACK_URL = os.getenv("MPESA_CALLBACK_URL")
-logger.debug(
-    "M-Pesa env loaded | ENV=%s | CALLBACK_URL=%s",
-    MPESA_ENV,
-    MPESA_CALLBACK_URL,
-)
+MPESA_BASE_URL = os.getenv("MPESA_BASE_URL")  # optional override, e.g. `manage.py mpesa_stub` for offline testing
+# Serve /api/payment/initiate/ from the async view; only worth it under an ASGI server, e.g.
+# gunicorn -k uvicorn.workers.UvicornWorker elimu_backend.asgi:application
+MPESA_ASYNC_INITIATE = os.getenv("MPESA_ASYNC_INITIATE", "False").strip().lower() == "true"
+# Apply stored callbacks in the web process right after they arrive; turn off when a
+# `manage.py drain_mpesa_callbacks --loop` worker does it instead.
+MPESA_INBOX_IN_PROCESS = os.getenv("MPESA_INBOX_IN_PROCESS", "True").strip().lower() == "true"
 
 # ===============================
 # Defaults
 # ===============================
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-logger.info("✅ settings.py configured successfully")
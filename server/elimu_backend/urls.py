@@ -5,15 +5,10 @@ from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 import logging
 
+from utils.routes import log_routes
+
 # ✅ Setup logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
-    logger.addHandler(handler)
-
-logger.info("✅ DEBUG: elimu_backend/urls.py loaded successfully")
 
 # ✅ Health & root endpoints
 def api_root(_request):
@@ -31,49 +26,42 @@ def api_root(_request):
         }
     })
 
-def health(_request):
+def health(request):
     # Keep it tiny & dependency‑free; ideal for Render health checks & CORS/origin tests
+    if request.GET.get("detail") == "1":
+        # Per-process GCS client counters (never creates a client)
+        from utils.gcs_client import gcs_clients
+        return JsonResponse({"ok": True, "gcs": gcs_clients.stats()})
     return JsonResponse({"ok": True})
 
-# ✅ Main URL patterns with debug logs
+# ✅ Main URL patterns (set LOG_URL_ROUTES = True to log each one)
 urlpatterns = []
 
 try:
-    # 🛠 Django Admin Panel
-    urlpatterns.append(path('admin/', admin.site.urls))
-    logger.debug("🔗 Registered route: /admin/")
-
-    # 🧑‍💼 Custom Admin Dashboard (Dashboard App)
-    urlpatterns.append(path('admin-panel/', include('dashboard.urls')))
-    logger.debug("🔗 Registered route: /admin-panel/")
-
-    # 📦 API Routes (ensure app-level routes use trailing slashes)
-    urlpatterns.append(path('api/resources/', include('resources.urls')))
-    logger.debug("🔗 Registered route: /api/resources/")
-
-    urlpatterns.append(path('api/users/', include('users.urls')))
-    logger.debug("🔗 Registered route: /api/users/")
+    urlpatterns += [
+        # 🛠 Django Admin Panel
+        path('admin/', admin.site.urls),
 
-    urlpatterns.append(path('api/payment/', include('payments.urls')))
-    logger.debug("🔗 Registered route: /api/payment/")
+        # 🧑‍💼 Custom Admin Dashboard (Dashboard App)
+        path('admin-panel/', include('dashboard.urls')),
 
-    # 🔐 JWT Authentication Routes (optional if you also expose /api/users/login/)
-    urlpatterns.append(path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'))
-    logger.debug("🔗 Registered route: /api/token/")
+        # 📦 API Routes (ensure app-level routes use trailing slashes)
+        path('api/resources/', include('resources.urls')),
+        path('api/users/', include('users.urls')),
+        path('api/payment/', include('payments.urls')),
 
-    urlpatterns.append(path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'))
-    logger.debug("🔗 Registered route: /api/token/refresh/")
+        # 🔐 JWT Authentication Routes (optional if you also expose /api/users/login/)
+        path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+        path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
-    # 🩺 Health
-    urlpatterns.append(path('api/health/', health))
-    logger.debug("🔗 Registered route: /api/health/")
+        # 🩺 Health
+        path('api/health/', health),
+    ]
 
     # 🎯 Root API Info Endpoint
     urlpatterns.insert(0, path('', api_root, name='api-root'))
-    logger.debug("🔗 Registered route: /")
 
 except Exception as e:
     logger.error("❌ Error loading urlpatterns: %s", str(e))
 
-# ✅ Final confirmation
-logger.info("✅ All urlpatterns loaded successfully for Elimu-Online backend.")
+log_routes(logger, urlpatterns)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class PaymentsConfig(AppConfig):
+    name = 'payments'
+
+    def ready(self):
+        # Connect entitlement cache invalidation receivers.
+        from . import signals  # noqa: F401
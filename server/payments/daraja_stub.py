@@ -0,0 +1,139 @@
+# server/payments/daraja_stub.py
+#
+# Local stand-in for Safaricom's Daraja API (OAuth + STK push) for benchmarks
+# and manual testing; point settings.MPESA_BASE_URL at `DarajaStub.url`.
+
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # load tests open hundreds of connections at once
+
+
+class DarajaStub:
+    """
+    Threaded HTTP/1.1 (keep-alive) server answering
+      GET  /oauth/v1/generate              → {"access_token", "expires_in"}
+      POST /mpesa/stkpush/v1/processrequest → Daraja's acceptance body (401 for unknown tokens)
+    `latency` is added to every response and `connect_latency` once per new
+    connection, standing in for the TLS handshake a keep-alive session saves.
+    counts["peak_inflight"] is the most STK pushes it was answering at once.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, connect_latency=0.0, token_ttl=3599):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.token_ttl = token_ttl
+        self.tokens = set()
+        self.counts = {"connections": 0, "token": 0, "stk": 0, "unauthorized": 0, "peak_inflight": 0}
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def enter_push(self):
+        with self._lock:
+            self._inflight += 1
+            self.counts["peak_inflight"] = max(self.counts["peak_inflight"], self._inflight)
+
+    def exit_push(self):
+        with self._lock:
+            self._inflight -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="daraja-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.counts, 0)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = 64 * 1024  # headers + body in one segment (avoids a delayed-ACK stall on keep-alive)
+
+            def setup(self):
+                super().setup()
+                stub.count("connections")
+                if stub.connect_latency:
+                    time.sleep(stub.connect_latency)
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                if stub.latency:
+                    time.sleep(stub.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if not self.path.startswith("/oauth/v1/generate"):
+                    return self._reply(404, {"errorMessage": "Not found"})
+                if not (self.headers.get("Authorization") or "").startswith("Basic "):
+                    return self._reply(400, {"errorMessage": "Invalid Authentication passed"})
+                stub.count("token")
+                token = base64.b64encode(uuid.uuid4().bytes).decode()
+                with stub._lock:
+                    stub.tokens.add(token)
+                self._reply(200, {"access_token": token, "expires_in": str(stub.token_ttl)})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path != "/mpesa/stkpush/v1/processrequest":
+                    return self._reply(404, {"errorMessage": "Not found"})
+                token = (self.headers.get("Authorization") or "").removeprefix("Bearer ")
+                if token not in stub.tokens:
+                    stub.count("unauthorized")
+                    return self._reply(401, {"errorCode": "404.001.03", "errorMessage": "Invalid Access Token"})
+                stub.count("stk")
+                json.loads(body or b"{}")
+                stub.enter_push()
+                try:
+                    self._accept_push()
+                finally:
+                    stub.exit_push()
+
+            def _accept_push(self):
+                self._reply(200, {
+                    "MerchantRequestID": f"{uuid.uuid4().int % 10**5}-{uuid.uuid4().int % 10**8}-1",
+                    "CheckoutRequestID": f"ws_CO_{time.strftime('%d%m%Y%H%M%S')}{uuid.uuid4().hex[:12]}",
+                    "ResponseCode": "0",
+                    "ResponseDescription": "Success. Request accepted for processing",
+                    "CustomerMessage": "Success. Request accepted for processing",
+                })
+
+        return Handler
@@ -0,0 +1,58 @@
+# server/payments/entitlements.py
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PaidResource
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+ENTITLEMENTS_CACHE_SECONDS = getattr(settings, "ENTITLEMENTS_CACHE_SECONDS", 300)
+ENTITLEMENTS_MAX_IDS = getattr(settings, "ENTITLEMENTS_MAX_IDS", 500)  # ids per bulk lookup
+# ------------------------------
+
+
+def _cache_key(user_id) -> str:
+    return f"payments:entitlements:{user_id}"
+
+
+def owned_resource_ids(user_id) -> frozenset:
+    """
+    Ids of every resource the user has paid for.
+    Cached per user; one index-only query on PaidResource(user, resource) on a miss.
+    """
+    key = _cache_key(user_id)
+    owned = cache.get(key)
+    if owned is None:
+        owned = frozenset(PaidResource.objects.filter(user_id=user_id).values_list("resource_id", flat=True))
+        cache.set(key, owned, ENTITLEMENTS_CACHE_SECONDS)
+        logger.debug("🔐 Entitlements loaded → user_id=%s | owned=%d", user_id, len(owned))
+    return owned
+
+
+def invalidate(user_id):
+    """Forget the cached set; call whenever PaidResource rows for the user change."""
+    cache.delete(_cache_key(user_id))
+
+
+def owns(user_id, resource_id) -> bool:
+    """
+    Access check for one resource. A hit in the cached set is trusted; anything else
+    is answered by the DB, because the cache may be per-process (locmem) and miss an
+    invalidate() that ran in another worker. A stale set is dropped when caught.
+    """
+    key = _cache_key(user_id)
+    owned = cache.get(key)
+    if owned is None:
+        return resource_id in owned_resource_ids(user_id)  # freshly loaded: authoritative
+    if resource_id in owned:
+        return True
+    if PaidResource.objects.filter(user_id=user_id, resource_id=resource_id).exists():
+        logger.debug("🔐 Stale entitlements dropped → user_id=%s | resource_id=%s", user_id, resource_id)
+        cache.delete(key)
+        return True
+    return False
@@ -0,0 +1,184 @@
+# server/payments/inbox.py
+
+import json
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from utils.background import DebouncedTask
+from .entitlements import invalidate
+from .models import MpesaCallback, PaidResource, PendingPayment, Transaction
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+MPESA_INBOX_BATCH_SIZE = getattr(settings, "MPESA_INBOX_BATCH_SIZE", 200)
+MPESA_INBOX_MAX_ATTEMPTS = getattr(settings, "MPESA_INBOX_MAX_ATTEMPTS", 6)              # then Dead
+MPESA_INBOX_RETRY_SECONDS = getattr(settings, "MPESA_INBOX_RETRY_SECONDS", 15)           # doubles per attempt
+MPESA_INBOX_RETRY_MAX_SECONDS = getattr(settings, "MPESA_INBOX_RETRY_MAX_SECONDS", 60 * 60)
+MPESA_INBOX_IN_PROCESS = getattr(settings, "MPESA_INBOX_IN_PROCESS", True)               # drain after each callback
+MPESA_INBOX_DRAIN_DELAY = getattr(settings, "MPESA_INBOX_DRAIN_DELAY", 0.25)             # seconds; folds bursts
+# ------------------------------
+
+
+class UnmatchedCallback(Exception):
+    """No PendingPayment for the CheckoutRequestID (yet): retried, then dead-lettered."""
+
+
+def receive(body: bytes) -> MpesaCallback:
+    """Store a callback body as received (one INSERT) and kick the in-process drainer."""
+    row = MpesaCallback.objects.create(payload=body.decode("utf-8", "replace"))
+    if MPESA_INBOX_IN_PROCESS:
+        transaction.on_commit(callback_drainer.schedule)
+    return row
+
+
+def parse(payload: str) -> dict:
+    """The stkCallback object of a callback body; ValueError when it has none."""
+    stk_callback = json.loads(payload).get("Body", {}).get("stkCallback")
+    if not isinstance(stk_callback, dict) or not stk_callback.get("CheckoutRequestID"):
+        raise ValueError("no Body.stkCallback.CheckoutRequestID")
+    return stk_callback
+
+
+def apply_callback(stk_callback, pending) -> bool:
+    """
+    Settle one callback inside the caller's transaction: claim the PendingPayment
+    with a conditional UPDATE (Pending → Success/Failed), then record the Transaction
+    and unlock. Returns False for a repeat delivery, which changes nothing.
+    """
+    result_code = stk_callback.get("ResultCode")
+    succeeded = result_code == 0
+    metadata = {
+        item.get("Name"): item.get("Value")
+        for item in stk_callback.get("CallbackMetadata", {}).get("Item", [])
+    }
+    amount = Decimal(str(metadata["Amount"])) if succeeded and metadata.get("Amount") is not None else pending.amount
+
+    claimed = PendingPayment.objects.filter(pk=pending.pk, status="Pending").update(
+        status="Success" if succeeded else "Failed",
+        result_code=result_code,
+        result_desc=str(stk_callback.get("ResultDesc") or "")[:255],
+        mpesa_receipt=str(metadata.get("MpesaReceiptNumber") or ""),
+        completed_at=timezone.now(),
+    )
+    if not claimed:
+        logger.info("🔁 Duplicate callback ignored → CheckoutRequestID=%s", pending.checkout_request_id)
+        return False
+
+    Transaction.objects.create(
+        user_id=pending.user_id,
+        amount=amount if succeeded else Decimal("0.00"),
+        method="M-Pesa",
+        status="Success" if succeeded else "Failed",
+    )
+
+    if succeeded:
+        # INSERT ... ON CONFLICT DO NOTHING: already owning the resource is not an error.
+        # bulk_create skips post_save, so drop the cached entitlements here.
+        PaidResource.objects.bulk_create(
+            [PaidResource(user_id=pending.user_id, resource_id=pending.resource_id)],
+            ignore_conflicts=True,
+        )
+        user_id = pending.user_id
+        transaction.on_commit(lambda: invalidate(user_id))
+        logger.info("✅ Payment Success → phone=%s | amount=%s | receipt=%s | user=%s | resource=%s",
+                    metadata.get("PhoneNumber"), amount, metadata.get("MpesaReceiptNumber"),
+                    pending.user_id, pending.resource_id)
+    else:
+        logger.warning("⚠️ Payment failed/cancelled → ResultCode=%s | msg=%s | CheckoutRequestID=%s",
+                       result_code, stk_callback.get("ResultDesc"), pending.checkout_request_id)
+    return True
+
+
+def _backoff(attempts) -> timedelta:
+    return timedelta(seconds=min(MPESA_INBOX_RETRY_SECONDS * 2 ** (attempts - 1), MPESA_INBOX_RETRY_MAX_SECONDS))
+
+
+def drain_callbacks(batch_size=MPESA_INBOX_BATCH_SIZE, max_attempts=MPESA_INBOX_MAX_ATTEMPTS):
+    """
+    Apply due inbox rows batch by batch; returns (processed, retried, dead).
+
+    One transaction per batch: the PendingPayments for the whole batch are loaded
+    with one query, and each row is applied in its own savepoint so a failure only
+    rolls back that row. Unmatched or failing rows back off exponentially and go
+    Dead after `max_attempts`; bodies that are not callbacks go Dead at once.
+    """
+    processed = retried = dead = 0
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            rows = list(
+                MpesaCallback.objects.select_for_update(skip_locked=True)
+                .filter(status="Pending", next_attempt_at__lte=now)
+                .order_by("id")[:batch_size]
+            )
+            if not rows:
+                break
+
+            parsed = {}
+            for row in rows:
+                try:
+                    parsed[row.pk] = parse(row.payload)
+                except (ValueError, AttributeError) as e:
+                    parsed[row.pk] = e
+            checkout_ids = {cb["CheckoutRequestID"] for cb in parsed.values() if isinstance(cb, dict)}
+            pending_by_id = {
+                p.checkout_request_id: p
+                for p in PendingPayment.objects.filter(checkout_request_id__in=checkout_ids)
+                .only("id", "checkout_request_id", "user_id", "resource_id", "amount")
+            }
+
+            done, failed = [], []
+            for row in rows:
+                stk_callback = parsed[row.pk]
+                try:
+                    if isinstance(stk_callback, Exception):
+                        raise stk_callback
+                    pending = pending_by_id.get(stk_callback["CheckoutRequestID"])
+                    if pending is None:
+                        raise UnmatchedCallback(f"unknown CheckoutRequestID {stk_callback['CheckoutRequestID']}")
+                    with transaction.atomic():
+                        apply_callback(stk_callback, pending)
+                    done.append(row.pk)
+                except Exception as e:
+                    row.attempts += 1
+                    row.last_error = f"{type(e).__name__}: {e}"[:2000]
+                    if e is stk_callback or row.attempts >= max_attempts:  # malformed: retrying cannot help
+                        row.status = "Dead"
+                        dead += 1
+                        logger.error("☠️ M-Pesa callback #%s dead-lettered after %d attempt(s): %s",
+                                     row.pk, row.attempts, row.last_error)
+                    else:
+                        row.next_attempt_at = now + _backoff(row.attempts)
+                        retried += 1
+                        logger.warning("⚠️ M-Pesa callback #%s failed (attempt %d): %s",
+                                       row.pk, row.attempts, row.last_error)
+                    failed.append(row)
+
+            MpesaCallback.objects.filter(pk__in=done).update(status="Processed", processed_at=now)
+            if failed:
+                MpesaCallback.objects.bulk_update(failed, ["status", "attempts", "last_error", "next_attempt_at"])
+            processed += len(done)
+        if len(rows) < batch_size:
+            break
+
+    if processed or retried or dead:
+        logger.info("📥 M-Pesa inbox drain: %d processed, %d retried, %d dead", processed, retried, dead)
+    return processed, retried, dead
+
+
+def requeue_dead():
+    """Put dead-lettered callbacks back in line (after fixing whatever killed them)."""
+    return MpesaCallback.objects.filter(status="Dead").update(
+        status="Pending", attempts=0, next_attempt_at=timezone.now()
+    )
+
+
+# Per-process drainer kicked after each stored callback.
+callback_drainer = DebouncedTask(drain_callbacks, delay=MPESA_INBOX_DRAIN_DELAY, name="drain_mpesa_callbacks")
@@ -0,0 +1,208 @@
+# server/payments/management/commands/bench_mpesa_callbacks.py
+
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.inbox import drain_callbacks
+from payments.models import MpesaCallback, PendingPayment, Transaction
+from resources.models import Resource
+
+CALLBACK_PATH = "/api/payment/confirmation/"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _callback_body(checkout_id, i):
+    return json.dumps({"Body": {"stkCallback": {
+        "MerchantRequestID": f"bench-{i}",
+        "CheckoutRequestID": checkout_id,
+        "ResultCode": 0,
+        "ResultDesc": "The service request is processed successfully.",
+        "CallbackMetadata": {"Item": [
+            {"Name": "Amount", "Value": 10},
+            {"Name": "MpesaReceiptNumber", "Value": f"BENCH{i:07d}"},
+            {"Name": "TransactionDate", "Value": 20240101120000},
+            {"Name": "PhoneNumber", "Value": 254700000000},
+        ]},
+    }}}).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Burst benchmark for the M-Pesa callback inbox: fire callbacks at a fixed rate at a local "
+        "gunicorn (or --url), report ack latency, then time drain_callbacks() over the backlog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=float, default=2000.0, help="Callbacks per second offered.")
+        parser.add_argument("--seconds", type=float, default=5.0, help="Length of the burst.")
+        parser.add_argument("--connections", type=int, default=64, help="Concurrent keep-alive client connections.")
+        parser.add_argument("--duplicates", type=float, default=0.1, help="Share of callbacks delivered twice.")
+        parser.add_argument("--workers", type=int, default=4, help="gunicorn workers for the local server.")
+        parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker.")
+        parser.add_argument("--url", help="Benchmark a running server instead (its in-process drainer may race).")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark rows.")
+
+    def handle(self, *args, **opts):
+        total = int(opts["rate"] * opts["seconds"])
+        unique = max(1, round(total / (1 + opts["duplicates"])))
+        run = uuid.uuid4().hex[:8]
+        user, resource, checkout_ids = self._seed(run, unique)
+        bodies = [_callback_body(checkout_ids[i % unique], i) for i in range(total)]
+        first_id = (MpesaCallback.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+
+        server = None
+        try:
+            if opts["url"]:
+                url = opts["url"]
+            else:
+                server, url = self._start_server(opts["workers"], opts["threads"])
+            acks = self._burst(url, bodies, opts["rate"], opts["connections"])
+            if server:
+                server.terminate()
+                server.wait(timeout=30)
+                server = None
+
+            received = MpesaCallback.objects.filter(id__gte=first_id).count()
+            start = time.perf_counter()
+            processed, retried, dead = drain_callbacks()
+            drain_seconds = time.perf_counter() - start
+            settled = PendingPayment.objects.filter(user=user, status="Success").count()
+            recorded = Transaction.objects.filter(user=user).count()
+        finally:
+            if server:
+                server.kill()
+            if not opts["keep"]:
+                MpesaCallback.objects.filter(id__gte=first_id).delete()
+                get_user_model().objects.filter(pk=user.pk).delete()
+                Resource.objects.filter(pk=resource.pk).delete()
+
+        self._report(opts, acks, received, processed, retried, dead, drain_seconds, unique, settled, recorded)
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _seed(run, unique):
+        user = get_user_model().objects.create(email=f"bench-callbacks-{run}@example.invalid")
+        resource = Resource.objects.create(
+            title=f"Callback bench {run}", file=f"resources/bench-{run}.pdf",
+            category=Resource._meta.get_field("category").choices[0][0], is_free=False, price=10,
+        )
+        checkout_ids = [f"ws_CO_bench_{run}_{i}" for i in range(unique)]
+        PendingPayment.objects.bulk_create(
+            [PendingPayment(checkout_request_id=cid, user=user, resource=resource, amount=10, phone="254700000000")
+             for cid in checkout_ids],
+            batch_size=1000,
+        )
+        return user, resource, checkout_ids
+
+    def _start_server(self, workers, threads):
+        port = _free_port()
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "elimu_backend.settings"),
+            "MPESA_INBOX_IN_PROCESS": "False",  # measure the ack alone; the drain is timed afterwards
+        }
+        cmd = [
+            sys.executable, "-m", "gunicorn", "elimu_backend.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--keep-alive", "30", "--log-level", "warning",
+        ]
+        server = subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup (is it installed?)")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                conn.request("GET", "/api/health/", headers={"Host": "localhost"})
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    self.stdout.write(f"🚀 gunicorn on {url} ({workers} worker(s) × {threads} thread(s))")
+                    return server, url
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError("gunicorn did not answer /api/health/ within 60 s")
+
+    @staticmethod
+    def _burst(url, bodies, rate, connections):
+        """Open-loop: callback i is due at start + i/rate; latency counts from when it was due."""
+        parts = urlsplit(url)
+        results = [None] * len(bodies)
+        start = time.perf_counter() + 0.2
+
+        def client(k):
+            conn = None
+            for i in range(k, len(bodies), connections):
+                due = start + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    if conn is None:
+                        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                    conn.request("POST", CALLBACK_PATH, body=bodies[i], headers={
+                        "Host": "localhost", "Content-Type": "application/json",
+                    })
+                    response = conn.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    conn = None
+                    status = 0
+                results[i] = (status, (time.perf_counter() - due) * 1000)
+
+        workers = [threading.Thread(target=client, args=(k,), daemon=True) for k in range(connections)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        wall = time.perf_counter() - start
+        return {"results": results, "wall": wall}
+
+    def _report(self, opts, acks, received, processed, retried, dead, drain_seconds, unique, settled, recorded):
+        results = acks["results"]
+        ok = sorted(ms for status, ms in results if status == 200)
+        errors = len(results) - len(ok)
+
+        def pct(p):
+            return ok[min(len(ok) - 1, int(len(ok) * p))] if ok else float("nan")
+
+        self.stdout.write(
+            f"📨 {len(results)} callbacks offered at {opts['rate']:.0f}/s ({unique} unique, "
+            f"{len(results) - unique} redeliveries) → {len(results) / acks['wall']:.0f}/s achieved"
+        )
+        self.stdout.write(
+            f"   ack latency p50 {statistics.median(ok) if ok else float('nan'):.1f} ms  p95 {pct(0.95):.1f} ms  "
+            f"p99 {pct(0.99):.1f} ms  max {ok[-1] if ok else float('nan'):.1f} ms | {errors} non-200"
+        )
+        self.stdout.write(f"   inbox rows stored: {received}")
+        self.stdout.write(
+            f"📥 drain: {processed} processed, {retried} retried, {dead} dead in {drain_seconds:.2f} s "
+            f"→ {processed / drain_seconds if drain_seconds else 0:.0f} callbacks/s"
+        )
+        self.stdout.write(f"   payments settled: {settled}/{unique}, transactions recorded: {recorded}")
+        if settled != unique or recorded != unique or errors:
+            self.stdout.write(self.style.WARNING("⚠️ Some callbacks were not acked or settled exactly once"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Every payment settled exactly once"))
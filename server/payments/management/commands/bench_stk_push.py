@@ -0,0 +1,115 @@
+# server/payments/management/commands/bench_stk_push.py
+
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments import mpesa
+from payments.daraja_stub import DarajaStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark STK-push latency against a local Daraja stub: one-shot token + push per call "
+        "(the old initiate_payment path) vs. the cached token and keep-alive session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pushes", type=int, default=50)
+        parser.add_argument("--latency-ms", type=float, default=40.0, help="Stub response time per request.")
+        parser.add_argument("--connect-latency-ms", type=float, default=60.0, help="Stub cost per new connection (TLS).")
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent cold-cache token requests.")
+
+    def handle(self, *args, **opts):
+        stub = DarajaStub(latency=opts["latency_ms"] / 1000, connect_latency=opts["connect_latency_ms"] / 1000).start()
+        self._point_at(stub)
+        try:
+            before = self._run(stub, opts["pushes"], self._legacy_push)
+            mpesa.mpesa_tokens.invalidate()
+            after = self._run(stub, opts["pushes"], self._push)
+            self._report("one-shot token + push (before)", before)
+            self._report("cached token + session (after)", after)
+            self.stdout.write(self.style.SUCCESS(
+                f"p50 speedup: {statistics.median(before['ms']) / statistics.median(after['ms']):.1f}x"
+            ))
+            self._single_flight(stub, opts["threads"])
+        finally:
+            stub.stop()
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _point_at(stub):
+        settings.MPESA_BASE_URL = stub.url
+        settings.MPESA_ENV = "sandbox"
+        for name, value in (
+            ("MPESA_CONSUMER_KEY", "bench-key"), ("MPESA_CONSUMER_SECRET", "bench-secret"),
+            ("MPESA_SHORTCODE", "174379"), ("MPESA_PASSKEY", "bench-passkey"),
+            ("MPESA_CALLBACK_URL", "http://127.0.0.1/api/payment/confirmation/"),
+        ):
+            if not getattr(settings, name, None):
+                setattr(settings, name, value)
+
+    @staticmethod
+    def _legacy_push():
+        # Mirrors the old flow: a fresh OAuth request and a one-shot POST per push.
+        import requests
+
+        base = mpesa._base_url()
+        token = requests.get(
+            f"{base}/oauth/v1/generate?grant_type=client_credentials",
+            auth=(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET), timeout=10,
+        ).json()["access_token"]
+        requests.post(
+            f"{base}/mpesa/stkpush/v1/processrequest",
+            json=mpesa.stk_payload("254700000000", "10", "Bench", "1:1"),
+            headers={"Authorization": f"Bearer {token}"}, timeout=15,
+        ).raise_for_status()
+
+    @staticmethod
+    def _push():
+        result = mpesa.lipa_na_mpesa("0700000000", "10", token=mpesa.generate_token(), title="Bench", account_reference="1:1")
+        if "error" in result:
+            raise RuntimeError(result)
+
+    @staticmethod
+    def _run(stub, pushes, fn):
+        stub.reset_counts()
+        timings = []
+        for _ in range(pushes):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return {"ms": timings, "counts": dict(stub.counts)}
+
+    def _report(self, label, run):
+        ms = sorted(run["ms"])
+        p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        counts = run["counts"]
+        self.stdout.write(
+            f"{label:32} p50 {statistics.median(ms):7.1f} ms  p95 {p95:7.1f} ms | "
+            f"{counts['token']} token request(s), {counts['connections']} connection(s) for {counts['stk']} push(es)"
+        )
+
+    def _single_flight(self, stub, threads):
+        mpesa.mpesa_tokens.invalidate()
+        stub.reset_counts()
+        barrier = threading.Barrier(threads)
+        tokens = []
+
+        def worker():
+            barrier.wait()
+            tokens.append(mpesa.generate_token())
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        self.stdout.write(
+            f"🔐 {threads} concurrent cold-cache token requests → {stub.counts['token']} OAuth call(s), "
+            f"{len(set(tokens))} distinct token(s)"
+        )
@@ -0,0 +1,30 @@
+# server/payments/management/commands/drain_mpesa_callbacks.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.inbox import MPESA_INBOX_BATCH_SIZE, drain_callbacks, requeue_dead
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply M-Pesa callbacks waiting in the MpesaCallback inbox. Run from cron, or with "
+        "--loop as a worker; in-process draining after each callback covers the common case."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=MPESA_INBOX_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep draining every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=2.0)
+        parser.add_argument("--requeue-dead", action="store_true", help="Retry dead-lettered callbacks first.")
+
+    def handle(self, *args, **opts):
+        if opts["requeue_dead"]:
+            self.stdout.write(f"♻️ {requeue_dead()} dead callback(s) requeued")
+        while True:
+            processed, retried, dead = drain_callbacks(batch_size=opts["batch_size"])
+            self.stdout.write(f"📥 {processed} processed, {retried} retried, {dead} dead")
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
@@ -0,0 +1,162 @@
+# server/payments/management/commands/loadtest_stk_push.py
+
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from payments import mpesa
+from payments.daraja_stub import DarajaStub
+from payments.models import PendingPayment
+from resources.models import Resource
+from .bench_stk_push import Command as BenchCommand
+
+SYNC_PATH = "/api/payment/initiate/"
+ASYNC_PATH = "/api/payment/initiate/async/"
+
+
+def _app_threads() -> int:
+    """Live threads, leaving out the in-process stub's server and per-connection threads."""
+    return sum(
+        1 for t in threading.enumerate()
+        if t.name != "daraja-stub" and "process_request_thread" not in t.name
+    )
+
+
+class _ThreadSampler:
+    """Most app threads seen while running: what the burst costs in threads."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = _app_threads()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="thread-sampler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _app_threads())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test STK pushes against a slow local Daraja stub: a burst of authenticated requests "
+        "to initiate_payment (sync DRF view) and initiate_payment_async, both through "
+        "elimu_backend.asgi.application on one event loop (one ASGI worker), reporting how many "
+        "pushes each keeps in flight and how many threads that takes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pushes", type=int, default=256, help="Requests offered at once.")
+        parser.add_argument("--latency-ms", type=float, default=1000.0, help="Stub STK response time (slow Safaricom).")
+        parser.add_argument("--connect-latency-ms", type=float, default=60.0, help="Stub cost per new connection.")
+        parser.add_argument("--keep", action="store_true", help="Keep the load-test rows.")
+
+    def handle(self, *args, **opts):
+        if settings.MPESA_ASYNC_INITIATE:
+            raise CommandError(f"{SYNC_PATH} serves the async view; run with MPESA_ASYNC_INITIATE=False")
+        stub = DarajaStub(latency=opts["latency_ms"] / 1000, connect_latency=opts["connect_latency_ms"] / 1000).start()
+        BenchCommand._point_at(stub)
+        user, resource = self._seed()
+        try:
+            mpesa.mpesa_tokens.invalidate()
+            mpesa.generate_token()  # both paths share the warm token; this measures the pushes
+
+            runs = {}
+            for label, path in (("sync view", SYNC_PATH), ("async view", ASYNC_PATH)):
+                stub.reset_counts()
+                runs[label] = asyncio.run(self._burst(path, opts["pushes"], user, resource))
+                runs[label]["counts"] = dict(stub.counts)
+        finally:
+            stub.stop()
+            if not opts["keep"]:
+                PendingPayment.objects.filter(user=user).delete()
+                Resource.objects.filter(pk=resource.pk).delete()
+                get_user_model().objects.filter(pk=user.pk).delete()
+
+        self.stdout.write(
+            f"⚙️ {opts['pushes']} requests offered at once through the ASGI app | "
+            f"Safaricom answers in {opts['latency_ms']:.0f} ms"
+        )
+        for label, run in runs.items():
+            self._report(label, run)
+        sync, async_ = runs["sync view"], runs["async view"]
+        self.stdout.write(self.style.SUCCESS(
+            f"In flight: {async_['counts']['peak_inflight']} (async) vs {sync['counts']['peak_inflight']} (sync); "
+            f"threads: {async_['threads']} vs {sync['threads']}; "
+            f"burst drained {sync['wall'] / async_['wall']:.1f}x faster"
+        ))
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _seed():
+        run = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(email=f"loadtest-stk-{run}@example.invalid")
+        resource = Resource.objects.create(
+            title=f"STK load test {run}", file=f"resources/loadtest-{run}.pdf",
+            category=Resource._meta.get_field("category").choices[0][0], is_free=False, price=10,
+        )
+        return user, resource
+
+    @staticmethod
+    async def _burst(path, pushes, user, resource):
+        import httpx
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from elimu_backend.asgi import application
+
+        access = await sync_to_async(lambda: str(RefreshToken.for_user(user).access_token))()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=application),
+            base_url="http://localhost",
+            headers={"Authorization": f"Bearer {access}"},
+            timeout=None,
+        )
+        body = {"resource_id": resource.pk, "phone": "0700000000"}
+        submitted = time.perf_counter()
+
+        async def timed(_):
+            response = await client.post(path, json=body)
+            return (time.perf_counter() - submitted) * 1000, response.status_code, response.text[:200]
+
+        try:
+            with _ThreadSampler() as threads:
+                done = await asyncio.gather(*(timed(i) for i in range(pushes)))
+        finally:
+            await client.aclose()
+            await mpesa.async_http_client().aclose()
+
+        ms = sorted(elapsed for elapsed, _, _ in done)
+        errors = [(status, text) for _, status, text in done if status != 200]
+        return {
+            "ms": ms,
+            "wall": time.perf_counter() - submitted,
+            "threads": threads.peak,
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+        }
+
+    def _report(self, label, run):
+        ms = run["ms"]
+        p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        counts = run["counts"]
+        self.stdout.write(
+            f"{label:12} peak in flight {counts['peak_inflight']:4} | threads {run['threads']:4} | "
+            f"p50 {statistics.median(ms):8.0f} ms  p95 {p95:8.0f} ms | "
+            f"{len(ms) / run['wall']:6.1f} pushes/s | {counts['connections']} connection(s)"
+            + (f" | ❌ {run['errors']} failed, e.g. {run['first_error']}" if run["errors"] else "")
+        )
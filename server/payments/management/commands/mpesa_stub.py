@@ -0,0 +1,35 @@
+# server/payments/management/commands/mpesa_stub.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.daraja_stub import DarajaStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local Daraja stand-in (OAuth + STK push). Point MPESA_BASE_URL at it, e.g. "
+        "MPESA_BASE_URL=http://127.0.0.1:8765 in settings/.env, to exercise payments offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every response.")
+        parser.add_argument("--connect-latency-ms", type=float, default=0.0, help="Added once per new connection.")
+        parser.add_argument("--token-ttl", type=int, default=3599, help="expires_in of issued tokens (seconds).")
+
+    def handle(self, *args, **opts):
+        stub = DarajaStub(
+            port=opts["port"],
+            latency=opts["latency_ms"] / 1000,
+            connect_latency=opts["connect_latency_ms"] / 1000,
+            token_ttl=opts["token_ttl"],
+        ).start()
+        self.stdout.write(self.style.SUCCESS(f"📡 Daraja stub listening on {stub.url} (Ctrl+C to stop)"))
+        try:
+            while True:
+                time.sleep(5)
+                self.stdout.write(f"   {stub.counts}")
+        except KeyboardInterrupt:
+            stub.stop()
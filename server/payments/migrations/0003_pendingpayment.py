@@ -0,0 +1,37 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:49
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0010_storagelisting_storedobject'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkout_request_id', models.CharField(max_length=64, unique=True)),
+                ('merchant_request_id', models.CharField(blank=True, max_length=64)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('phone', models.CharField(max_length=15)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Success', 'Success'), ('Failed', 'Failed')], default='Pending', max_length=20)),
+                ('result_code', models.IntegerField(blank=True, null=True)),
+                ('result_desc', models.CharField(blank=True, max_length=255)),
+                ('mpesa_receipt', models.CharField(blank=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_payments', to='resources.resource')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_payments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
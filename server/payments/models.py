@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from resources.models import Resource
 import logging
 from decimal import Decimal
@@ -25,8 +26,8 @@ class Wallet(models.Model):
         return f"{getattr(self.user, 'full_name', self.user)}'s Wallet: Ksh {self.balance}"
 
     def save(self, *args, **kwargs):
-        logger.debug("💼 Saving Wallet → user: %s | balance: Ksh %.2f",
-                     getattr(self.user, 'full_name', self.user), self.balance)
+        # Log ids only: touching self.user here would lazy-load the user row.
+        logger.debug("💼 Saving Wallet → user_id: %s | balance: Ksh %.2f", self.user_id, self.balance)
         super().save(*args, **kwargs)
 
 
@@ -65,8 +66,8 @@ class Transaction(models.Model):
         return f"{getattr(self.user, 'full_name', self.user)} - {self.method} - Ksh {self.amount} [{self.status}]"
 
     def save(self, *args, **kwargs):
-        logger.debug("💳 Transaction → user: %s | method: %s | amount: Ksh %.2f | status: %s",
-                     getattr(self.user, 'full_name', self.user), self.method, self.amount, self.status)
+        logger.debug("💳 Transaction → user_id: %s | method: %s | amount: Ksh %.2f | status: %s",
+                     self.user_id, self.method, self.amount, self.status)
         super().save(*args, **kwargs)
 
 
@@ -91,6 +92,73 @@ class PaidResource(models.Model):
         return f"{getattr(self.user, 'full_name', self.user)} paid for '{self.resource.title}'"
 
     def save(self, *args, **kwargs):
-        logger.debug("🔓 PaidResource → user: %s | resource: %s",
-                     getattr(self.user, 'full_name', self.user), self.resource.title)
+        logger.debug("🔓 PaidResource → user_id: %s | resource_id: %s", self.user_id, self.resource_id)
         super().save(*args, **kwargs)
+
+
+class PendingPayment(models.Model):
+    """
+    An STK push waiting for Safaricom's callback, keyed by the CheckoutRequestID
+    Daraja returns (the one id its callback always carries; AccountReference is
+    not echoed back). The callback moves it out of Pending exactly once.
+    """
+    STATUS_CHOICES = (
+        ("Pending", "Pending"),
+        ("Success", "Success"),
+        ("Failed", "Failed"),
+    )
+
+    checkout_request_id = models.CharField(max_length=64, unique=True)
+    merchant_request_id = models.CharField(max_length=64, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pending_payments"
+    )
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        related_name="pending_payments"
+    )
+    amount = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal("0.00"))],
+    )
+    phone = models.CharField(max_length=15)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
+    result_code = models.IntegerField(null=True, blank=True)
+    result_desc = models.CharField(max_length=255, blank=True)
+    mpesa_receipt = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.checkout_request_id} → user {self.user_id} / resource {self.resource_id} [{self.status}]"
+
+
+class MpesaCallback(models.Model):
+    """
+    Inbox of raw M-Pesa callbacks. The webhook stores the body with one INSERT and
+    acks; payments.inbox applies rows in batches, retrying with backoff. Rows are
+    kept as the delivery log: Processed, or Dead once retries run out.
+    """
+    STATUS_CHOICES = (
+        ("Pending", "Pending"),
+        ("Processed", "Processed"),
+        ("Dead", "Dead"),
+    )
+
+    payload = models.TextField()  # request body as received
+    received_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"Callback #{self.pk} [{self.status}] (attempts={self.attempts})"
@@ -1,19 +1,88 @@
 import base64
 import logging
+import os
+import threading
+import time
+import weakref
 from datetime import datetime
-import requests
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
-# ✅ Load M-Pesa credentials
-BASE_URL = "https://sandbox.safaricom.co.ke" if settings.MPESA_ENV == "sandbox" else "https://api.safaricom.co.ke"
+# `requests` (~40 ms) and `httpx` are imported inside the calls, and M-Pesa settings
+# are read when used rather than bound at import, so boots that never pay skip them.
 
-CONSUMER_KEY = settings.MPESA_CONSUMER_KEY
-CONSUMER_SECRET = settings.MPESA_CONSUMER_SECRET
-SHORTCODE = settings.MPESA_SHORTCODE
-PASSKEY = settings.MPESA_PASSKEY
-CALLBACK_URL = settings.MPESA_CALLBACK_URL
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+MPESA_TOKEN_REFRESH_MARGIN = getattr(settings, "MPESA_TOKEN_REFRESH_MARGIN", 60)  # seconds before expires_in
+MPESA_TOKEN_LOCK_SECONDS = getattr(settings, "MPESA_TOKEN_LOCK_SECONDS", 15)      # shared refresh lock TTL
+MPESA_HTTP_POOL_MAXSIZE = getattr(settings, "MPESA_HTTP_POOL_MAXSIZE", 16)        # keep-alive sockets to Daraja
+MPESA_CONNECT_TIMEOUT = getattr(settings, "MPESA_CONNECT_TIMEOUT", 5)
+MPESA_TOKEN_TIMEOUT = getattr(settings, "MPESA_TOKEN_TIMEOUT", 10)
+MPESA_STK_TIMEOUT = getattr(settings, "MPESA_STK_TIMEOUT", 15)
+MPESA_ASYNC_MAX_CONNECTIONS = getattr(settings, "MPESA_ASYNC_MAX_CONNECTIONS", 256)  # pushes in flight per event loop
+MPESA_ASYNC_KEEPALIVE = getattr(settings, "MPESA_ASYNC_KEEPALIVE", 32)                # idle sockets kept open
+# ------------------------------
+
+
+def _base_url() -> str:
+    override = getattr(settings, "MPESA_BASE_URL", None)  # e.g. the local Daraja stub (payments.daraja_stub)
+    if override:
+        return override.rstrip("/")
+    return "https://sandbox.safaricom.co.ke" if settings.MPESA_ENV == "sandbox" else "https://api.safaricom.co.ke"
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """
+    Process-wide keep-alive session for every Daraja call, so pushes reuse one
+    TLS connection instead of a handshake each. Re-created in a forked worker.
+    """
+    global _session, _session_pid
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MPESA_HTTP_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session, _session_pid = session, os.getpid()
+    return _session
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop → httpx.AsyncClient
+
+
+def async_http_client():
+    """
+    Keep-alive httpx.AsyncClient for the running event loop (an AsyncClient is
+    bound to the loop it was first used on). Under an ASGI worker that is one
+    client per process, capped at MPESA_ASYNC_MAX_CONNECTIONS sockets.
+    """
+    import asyncio
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MPESA_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=MPESA_ASYNC_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(MPESA_STK_TIMEOUT, connect=MPESA_CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+    return client
 
 
 def sanitize_phone(phone: str) -> str:
@@ -27,69 +96,278 @@ def sanitize_phone(phone: str) -> str:
     return phone
 
 
-def generate_token():
-    """🔐 Request OAuth access token from Safaricom"""
-    token_url = f"{BASE_URL}/oauth/v1/generate?grant_type=client_credentials"
-    logger.debug("🔐 Generating M-Pesa token from %s", token_url)
-
+def token_lifetime(payload) -> float:
+    """Seconds to keep a token from its OAuth response (Daraja sends expires_in as a string)."""
     try:
-        response = requests.get(token_url, auth=(CONSUMER_KEY, CONSUMER_SECRET), timeout=10)
-        response.raise_for_status()
-        token = response.json().get("access_token")
+        expires_in = float(payload.get("expires_in") or 3599)
+    except (TypeError, ValueError):
+        expires_in = 3599
+    return max(expires_in - MPESA_TOKEN_REFRESH_MARGIN, 0)
+
+
+class DarajaTokenCache:
+    """
+    🔐 OAuth access token shared by every Daraja call, refreshed shortly before `expires_in`.
+
+    Refreshes are single-flight: threads wait on a lock for the one in flight, and
+    workers publish the token in the Django cache behind a cache.add() lock, so a
+    cold fleet asks Safaricom once. Across processes this needs a shared cache
+    (REDIS_URL); with locmem each process refreshes on its own. aget() is the
+    same for async callers, waiting on a per-loop asyncio.Lock instead.
+    """
+
+    CACHE_KEY = "payments:mpesa:token"
+    LOCK_KEY = "payments:mpesa:token:lock"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._async_locks = weakref.WeakKeyDictionary()  # event loop → asyncio.Lock
+        self.fetches = 0  # OAuth requests made by this process
+
+    def get(self):
+        """A valid token, or None when Safaricom cannot be reached."""
+        token = self._valid()
         if token:
-            logger.info("✅ M-Pesa token generated successfully")
-        else:
-            logger.warning("⚠️ Token missing in response JSON: %s", response.json())
-        return token
-    except requests.Timeout:
-        logger.error("⏳ Timeout while requesting M-Pesa token")
+            return token
+        with self._lock:
+            token = self._valid()
+            if token:
+                return token
+            token, expires_at = self._shared_or_fetch()
+            if token:
+                self._token, self._expires_at = token, expires_at
+            return token
+
+    async def aget(self):
+        """Async get(): a refresh is awaited, so the event loop keeps serving meanwhile."""
+        token = self._valid()
+        if token:
+            return token
+        async with self._loop_lock():
+            token = self._valid()
+            if token:
+                return token
+            token, expires_at = await self._ashared_or_fetch()
+            if token:
+                self._token, self._expires_at = token, expires_at
+            return token
+
+    def invalidate(self, token=None):
+        """Drop `token` (or whatever is cached) after Daraja rejected it."""
+        self._drop(token)
+        shared = cache.get(self.CACHE_KEY)
+        if shared and (token is None or shared["token"] == token):
+            cache.delete(self.CACHE_KEY)
+
+    async def ainvalidate(self, token=None):
+        self._drop(token)
+        shared = await cache.aget(self.CACHE_KEY)
+        if shared and (token is None or shared["token"] == token):
+            await cache.adelete(self.CACHE_KEY)
+
+    def _drop(self, token):
+        with self._lock:
+            if token is None or token == self._token:
+                self._token, self._expires_at = None, 0.0
+
+    def _loop_lock(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        lock = self._async_locks.get(loop)
+        if lock is None:
+            lock = self._async_locks[loop] = asyncio.Lock()
+        return lock
+
+    def _valid(self):
+        return self._token if self._token and time.time() < self._expires_at else None
+
+    def _shared(self):
+        shared = cache.get(self.CACHE_KEY)
+        if shared and time.time() < shared["expires_at"]:
+            return shared["token"], shared["expires_at"]
         return None
-    except requests.RequestException as e:
-        logger.error("❌ Failed to get M-Pesa token: %s", e)
+
+    def _shared_or_fetch(self):
+        shared = self._shared()
+        if shared:
+            return shared
+        deadline = time.monotonic() + MPESA_TOKEN_LOCK_SECONDS
+        while True:
+            if cache.add(self.LOCK_KEY, os.getpid(), MPESA_TOKEN_LOCK_SECONDS):
+                try:
+                    return self._shared() or self._fetch()  # another worker may have just finished
+                finally:
+                    cache.delete(self.LOCK_KEY)
+            time.sleep(0.05)
+            shared = self._shared()
+            if shared:
+                return shared
+            if time.monotonic() >= deadline:
+                logger.warning("⚠️ M-Pesa token refresh lock held too long; fetching directly")
+                return self._fetch()
+
+    def _fetch(self):
+        import requests
+
+        token_url = f"{_base_url()}/oauth/v1/generate?grant_type=client_credentials"
+        logger.debug("🔐 Generating M-Pesa token from %s", token_url)
+        self.fetches += 1
+        try:
+            response = http_session().get(
+                token_url,
+                auth=(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
+                timeout=(MPESA_CONNECT_TIMEOUT, MPESA_TOKEN_TIMEOUT),
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except requests.Timeout:
+            logger.error("⏳ Timeout while requesting M-Pesa token")
+            return None, 0.0
+        except (requests.RequestException, ValueError) as e:
+            logger.error("❌ Failed to get M-Pesa token: %s", e)
+            return None, 0.0
+
+        token, expires_at, lifetime = self._accept(payload)
+        if lifetime >= 1:
+            cache.set(self.CACHE_KEY, {"token": token, "expires_at": expires_at}, int(lifetime))
+        return token, expires_at
+
+    async def _ashared(self):
+        shared = await cache.aget(self.CACHE_KEY)
+        if shared and time.time() < shared["expires_at"]:
+            return shared["token"], shared["expires_at"]
         return None
 
+    async def _ashared_or_fetch(self):
+        import asyncio
 
-def lipa_na_mpesa(phone, amount, token=None, title="Elimu Resource", account_reference="ElimuOnline"):
-    """
-    📲 Initiate M-Pesa STK Push
+        shared = await self._ashared()
+        if shared:
+            return shared
+        deadline = time.monotonic() + MPESA_TOKEN_LOCK_SECONDS
+        while True:
+            if await cache.aadd(self.LOCK_KEY, os.getpid(), MPESA_TOKEN_LOCK_SECONDS):
+                try:
+                    return await self._ashared() or await self._afetch()
+                finally:
+                    await cache.adelete(self.LOCK_KEY)
+            await asyncio.sleep(0.05)
+            shared = await self._ashared()
+            if shared:
+                return shared
+            if time.monotonic() >= deadline:
+                logger.warning("⚠️ M-Pesa token refresh lock held too long; fetching directly")
+                return await self._afetch()
 
-    account_reference: put a stable identifier here (e.g., "userId:resourceId")
-    so your webhook can unlock the correct resource for the correct user.
-    """
-    phone = sanitize_phone(phone)
-    logger.info("📲 STK Push: Phone=%s | Amount=Ksh %s | AccountRef=%s", phone, amount, account_reference)
+    async def _afetch(self):
+        import httpx
 
-    token = token or generate_token()
-    if not token:
-        return {"error": "TokenError", "details": "Failed to generate M-Pesa token"}
+        token_url = f"{_base_url()}/oauth/v1/generate?grant_type=client_credentials"
+        logger.debug("🔐 Generating M-Pesa token from %s (async)", token_url)
+        self.fetches += 1
+        try:
+            response = await async_http_client().get(
+                token_url,
+                auth=(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
+                timeout=httpx.Timeout(MPESA_TOKEN_TIMEOUT, connect=MPESA_CONNECT_TIMEOUT),
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except httpx.TimeoutException:
+            logger.error("⏳ Timeout while requesting M-Pesa token")
+            return None, 0.0
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("❌ Failed to get M-Pesa token: %s", e)
+            return None, 0.0
 
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    password = base64.b64encode(f"{SHORTCODE}{PASSKEY}{timestamp}".encode()).decode()
+        token, expires_at, lifetime = self._accept(payload)
+        if lifetime >= 1:
+            await cache.aset(self.CACHE_KEY, {"token": token, "expires_at": expires_at}, int(lifetime))
+        return token, expires_at
+
+    @staticmethod
+    def _accept(payload):
+        """(token, expires_at, lifetime) from an OAuth response; lifetime 0 when unusable."""
+        token = payload.get("access_token")
+        if not token:
+            logger.warning("⚠️ Token missing in response JSON: %s", payload)
+            return None, 0.0, 0
+        lifetime = token_lifetime(payload)
+        logger.info("✅ M-Pesa token generated successfully (reused for %.0fs)", lifetime)
+        return token, time.time() + lifetime, lifetime
 
-    payload = {
-        "BusinessShortCode": SHORTCODE,
+
+mpesa_tokens = DarajaTokenCache()
+
+
+def generate_token():
+    """🔐 OAuth access token for Safaricom, from the shared cache (one request per ~hour)."""
+    return mpesa_tokens.get()
+
+
+async def agenerate_token():
+    """🔐 generate_token() for async views."""
+    return await mpesa_tokens.aget()
+
+
+def stk_payload(phone, amount, title="Elimu Resource", account_reference="ElimuOnline") -> dict:
+    """The processrequest body; `phone` must already be sanitized."""
+    shortcode = settings.MPESA_SHORTCODE
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    password = base64.b64encode(f"{shortcode}{settings.MPESA_PASSKEY}{timestamp}".encode()).decode()
+    return {
+        "BusinessShortCode": shortcode,
         "Password": password,
         "Timestamp": timestamp,
         "TransactionType": "CustomerPayBillOnline",
         "Amount": amount,              # str or number is fine; Safaricom parses JSON
         "PartyA": phone,
-        "PartyB": SHORTCODE,
+        "PartyB": shortcode,
         "PhoneNumber": phone,
-        "CallBackURL": CALLBACK_URL,
+        "CallBackURL": settings.MPESA_CALLBACK_URL,
         "AccountReference": account_reference,   # 🔑 now dynamic
         "TransactionDesc": f"Unlock {title}",
     }
 
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+def lipa_na_mpesa(phone, amount, token=None, title="Elimu Resource", account_reference="ElimuOnline"):
+    """
+    📲 Initiate M-Pesa STK Push
+
+    account_reference: put a stable identifier here (e.g., "userId:resourceId")
+    so your webhook can unlock the correct resource for the correct user.
+    A token Daraja rejects (401) is dropped from the cache and the push retried once.
+    """
+    import requests
+
+    phone = sanitize_phone(phone)
+    logger.info("📲 STK Push: Phone=%s | Amount=Ksh %s | AccountRef=%s", phone, amount, account_reference)
+
+    token = token or generate_token()
+    if not token:
+        return {"error": "TokenError", "details": "Failed to generate M-Pesa token"}
+
+    payload = stk_payload(phone, amount, title, account_reference)
     logger.debug("📦 M-Pesa STK Payload prepared (Phone=%s, Amount=%s, Ref=%s)", phone, amount, account_reference)
 
     try:
-        response = requests.post(
-            f"{BASE_URL}/mpesa/stkpush/v1/processrequest",
-            json=payload,
-            headers=headers,
-            timeout=15,
-        )
+        for attempt in (1, 2):
+            response = http_session().post(
+                f"{_base_url()}/mpesa/stkpush/v1/processrequest",
+                json=payload,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                timeout=(MPESA_CONNECT_TIMEOUT, MPESA_STK_TIMEOUT),
+            )
+            if response.status_code != 401 or attempt == 2:
+                break
+            logger.warning("🔁 M-Pesa token rejected; refreshing and retrying once")
+            mpesa_tokens.invalidate(token)
+            token = generate_token()
+            if not token:
+                return {"error": "TokenError", "details": "Failed to generate M-Pesa token"}
         response.raise_for_status()
         result = response.json()
         logger.info("✅ STK Push request accepted: %s", result)
@@ -110,3 +388,57 @@ def lipa_na_mpesa(phone, amount, token=None, title="Elimu Resource", account_ref
     except Exception as e:
         logger.exception("❌ Unexpected error during STK push")
         return {"error": "UnexpectedError", "details": str(e)}
+
+
+async def alipa_na_mpesa(phone, amount, token=None, title="Elimu Resource", account_reference="ElimuOnline"):
+    """
+    📲 lipa_na_mpesa() for async views: same payload, retry and error dicts, but the
+    request is awaited on the loop's httpx client, so a slow Safaricom ties up a
+    coroutine instead of a worker thread.
+    """
+    import httpx
+
+    phone = sanitize_phone(phone)
+    logger.info("📲 STK Push (async): Phone=%s | Amount=Ksh %s | AccountRef=%s", phone, amount, account_reference)
+
+    token = token or await agenerate_token()
+    if not token:
+        return {"error": "TokenError", "details": "Failed to generate M-Pesa token"}
+
+    payload = stk_payload(phone, amount, title, account_reference)
+    response = None
+
+    try:
+        for attempt in (1, 2):
+            response = await async_http_client().post(
+                f"{_base_url()}/mpesa/stkpush/v1/processrequest",
+                json=payload,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if response.status_code != 401 or attempt == 2:
+                break
+            logger.warning("🔁 M-Pesa token rejected; refreshing and retrying once")
+            await mpesa_tokens.ainvalidate(token)
+            token = await agenerate_token()
+            if not token:
+                return {"error": "TokenError", "details": "Failed to generate M-Pesa token"}
+        response.raise_for_status()
+        result = response.json()
+        logger.info("✅ STK Push request accepted: %s", result)
+        return result
+
+    except httpx.TimeoutException:
+        logger.error("⏳ Timeout during STK push request")
+        return {"error": "Timeout", "details": "Request to Safaricom timed out"}
+
+    except httpx.HTTPStatusError as http_err:
+        logger.error("❌ HTTPError: %s | Response: %s", http_err, response.text)
+        return {"error": "HTTPError", "details": str(http_err), "response": response.text}
+
+    except httpx.HTTPError as req_err:
+        logger.error("❌ RequestException: %s", req_err)
+        return {"error": "RequestError", "details": str(req_err)}
+
+    except Exception as e:
+        logger.exception("❌ Unexpected error during STK push")
+        return {"error": "UnexpectedError", "details": str(e)}
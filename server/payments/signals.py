@@ -0,0 +1,19 @@
+import logging
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .entitlements import invalidate
+from .models import PaidResource
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=PaidResource)
+@receiver(post_delete, sender=PaidResource)
+def invalidate_entitlements(sender, instance, **kwargs):
+    """
+    🔓 A new (or revoked) purchase drops the user's cached owned-resource set.
+    Runs after commit so a concurrent lookup cannot re-cache the old set.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate(user_id))
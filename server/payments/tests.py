@@ -0,0 +1,282 @@
+# server/payments/tests.py
+
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from resources.downloads import can_download
+from resources.models import Category, Resource
+from . import inbox, mpesa
+from .daraja_stub import DarajaStub
+from .entitlements import _cache_key, owned_resource_ids, owns
+from .models import MpesaCallback, PaidResource, PendingPayment, Transaction
+
+
+def _callback(checkout_id, result_code=0, receipt="TEST0000001"):
+    """An stkCallback body as Safaricom posts it."""
+    return json.dumps({"Body": {"stkCallback": {
+        "MerchantRequestID": "test-merchant",
+        "CheckoutRequestID": checkout_id,
+        "ResultCode": result_code,
+        "ResultDesc": "The service request is processed successfully.",
+        "CallbackMetadata": {"Item": [
+            {"Name": "Amount", "Value": 10},
+            {"Name": "MpesaReceiptNumber", "Value": receipt},
+            {"Name": "PhoneNumber", "Value": 254700000000},
+        ]},
+    }}})
+
+
+class EntitlementsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(email="buyer@example.invalid")
+        self.resource = Resource.objects.create(
+            title="Paid notes", file="resources/paid.pdf", category=Category.NOTES, is_free=False, price=10,
+        )
+
+    def _pay_elsewhere(self):
+        """A purchase settled by another worker: its invalidate() never reached this cache."""
+        PaidResource.objects.bulk_create([PaidResource(user=self.user, resource=self.resource)])
+
+    def test_stale_cached_set_does_not_deny_download(self):
+        self.assertFalse(can_download(self.user, self.resource))
+        self.assertEqual(cache.get(_cache_key(self.user.pk)), frozenset())
+
+        self._pay_elsewhere()
+        self.assertTrue(can_download(self.user, self.resource))
+        self.assertIsNone(cache.get(_cache_key(self.user.pk)))  # stale set dropped
+        self.assertEqual(owned_resource_ids(self.user.pk), {self.resource.pk})
+
+    def test_cache_hit_needs_no_query(self):
+        self._pay_elsewhere()
+        owned_resource_ids(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(owns(self.user.pk, self.resource.pk))
+
+    def test_negative_answer_is_checked_once(self):
+        owned_resource_ids(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertFalse(owns(self.user.pk, self.resource.pk))
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "testserver"])
+class PaymentCallbackTests(TestCase):
+    """payment_confirmation through the inbox: each purchase settles once, however often Safaricom delivers."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(email="buyer@example.invalid")
+        self.resource = Resource.objects.create(
+            title="Paid notes", file="resources/paid.pdf", category=Category.NOTES, is_free=False, price=10,
+        )
+        self.pending = PendingPayment.objects.create(
+            checkout_request_id="ws_CO_test", user=self.user, resource=self.resource, amount=10, phone="254700000000",
+        )
+        # The in-process drainer, run on commit instead of after its debounce delay.
+        drain = mock.patch.object(inbox.callback_drainer, "schedule", side_effect=lambda: inbox.drain_callbacks())
+        drain.start()
+        self.addCleanup(drain.stop)
+
+    def _deliver(self, *bodies):
+        with self.captureOnCommitCallbacks(execute=True):
+            for body in bodies:
+                response = self.client.post("/api/payment/confirmation/", body, content_type="application/json")
+                self.assertEqual(response.status_code, 200)
+
+    def test_redelivered_callback_settles_once(self):
+        self._deliver(_callback("ws_CO_test"))
+        self._deliver(_callback("ws_CO_test"))
+
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(PaidResource.objects.filter(user=self.user, resource=self.resource).count(), 1)
+        self.assertEqual(MpesaCallback.objects.filter(status="Processed").count(), 2)
+        self.pending.refresh_from_db()
+        self.assertEqual((self.pending.status, self.pending.mpesa_receipt), ("Success", "TEST0000001"))
+        self.assertTrue(owns(self.user.pk, self.resource.pk))
+
+    def test_duplicates_in_one_batch_settle_once(self):
+        self._deliver(_callback("ws_CO_test"), _callback("ws_CO_test"))
+
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(PaidResource.objects.filter(user=self.user, resource=self.resource).count(), 1)
+        self.assertEqual(MpesaCallback.objects.filter(status="Processed").count(), 2)
+
+    def test_unknown_checkout_request_id_is_acked_and_kept(self):
+        self._deliver(_callback("ws_CO_unknown"))
+
+        row = MpesaCallback.objects.get()
+        self.assertEqual((row.status, row.attempts), ("Pending", 1))
+        self.assertIn("UnmatchedCallback", row.last_error)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(PaidResource.objects.exists())
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, "Pending")
+
+
+class CallbackInboxRetryTests(TestCase):
+    """Unmatched callbacks back off, dead-letter after max_attempts, and apply once requeued."""
+
+    max_attempts = 3
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(email="buyer@example.invalid")
+        self.resource = Resource.objects.create(
+            title="Paid notes", file="resources/paid.pdf", category=Category.NOTES, is_free=False, price=10,
+        )
+        self.now = timezone.now()
+        patches = [
+            mock.patch("payments.inbox.MPESA_INBOX_IN_PROCESS", False),
+            mock.patch("django.utils.timezone.now", lambda: self.now),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _receive(self, body):
+        row = inbox.receive(body)
+        self.now = row.next_attempt_at  # the clock starts when Safaricom delivers
+        return row
+
+    def _drain(self):
+        return inbox.drain_callbacks(max_attempts=self.max_attempts)
+
+    def _pending(self, checkout_id="ws_CO_late"):
+        return PendingPayment.objects.create(
+            checkout_request_id=checkout_id, user=self.user, resource=self.resource, amount=10, phone="254700000000",
+        )
+
+    def test_unmatched_callback_retried_then_dead_then_requeued(self):
+        row = self._receive(_callback("ws_CO_late").encode())
+
+        for attempt in range(1, self.max_attempts):
+            self.assertEqual(self._drain(), (0, 1, 0))
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), ("Pending", attempt))
+            self.assertEqual(row.next_attempt_at - self.now, inbox._backoff(attempt))
+            self.assertEqual(self._drain(), (0, 0, 0))  # not due yet
+            self.now = row.next_attempt_at
+
+        self.assertEqual(self._drain(), (0, 0, 1))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("Dead", self.max_attempts))
+        self.assertIn("ws_CO_late", row.last_error)
+
+        self._pending()
+        self.assertEqual(self._drain(), (0, 0, 0))  # dead rows stay put
+        self.assertEqual(inbox.requeue_dead(), 1)
+        self.assertEqual(self._drain(), (1, 0, 0))
+
+        row.refresh_from_db()
+        self.assertEqual(row.status, "Processed")
+        self.assertEqual(Transaction.objects.filter(user=self.user, status="Success").count(), 1)
+        self.assertTrue(PaidResource.objects.filter(user=self.user, resource=self.resource).exists())
+        self.assertEqual(inbox.requeue_dead(), 0)
+
+    def test_callback_ahead_of_its_pending_payment_applies_on_retry(self):
+        row = self._receive(_callback("ws_CO_late").encode())
+        self.assertEqual(self._drain(), (0, 1, 0))
+
+        self._pending()
+        self.now += inbox._backoff(1)
+        self.assertEqual(self._drain(), (1, 0, 0))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("Processed", 1))
+        self.assertEqual(PaidResource.objects.filter(user=self.user).count(), 1)
+
+    def test_malformed_body_is_dead_at_once(self):
+        row = self._receive(b'{"Body": {}}')
+        self.assertEqual(self._drain(), (0, 0, 1))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("Dead", 1))
+
+
+class DarajaTokenCacheTests(SimpleTestCase):
+    """Token refresh against the local Daraja stub: one OAuth request per expiry, however many callers."""
+
+    def setUp(self):
+        cache.clear()
+        self.stub = DarajaStub(latency=0.1).start()  # slow enough for callers to overlap
+        self.addCleanup(self.stub.stop)
+        settings = override_settings(
+            MPESA_BASE_URL=self.stub.url, MPESA_ENV="sandbox",
+            MPESA_CONSUMER_KEY="test-key", MPESA_CONSUMER_SECRET="test-secret",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.tokens = mpesa.DarajaTokenCache()
+        self.addCleanup(cache.clear)
+
+    def _concurrently(self, *caches, callers=16):
+        barrier = threading.Barrier(callers)
+        results = []
+
+        def caller(tokens):
+            barrier.wait()
+            results.append(tokens.get())
+
+        threads = [threading.Thread(target=caller, args=(caches[i % len(caches)],)) for i in range(callers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        return results
+
+    def test_concurrent_refresh_is_single_flight(self):
+        results = self._concurrently(self.tokens)
+        self.assertEqual(len(results), 16)
+        self.assertEqual(len(set(results)), 1)
+        self.assertIn(results[0], self.stub.tokens)
+        self.assertEqual(self.stub.counts["token"], 1)
+        self.assertEqual(self.tokens.fetches, 1)
+
+    def test_workers_share_one_refresh(self):
+        # Two processes' caches meeting in the shared Django cache.
+        results = self._concurrently(self.tokens, mpesa.DarajaTokenCache())
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.stub.counts["token"], 1)
+
+    def test_async_refresh_is_single_flight(self):
+        async def burst():
+            try:
+                return await asyncio.gather(*(self.tokens.aget() for _ in range(16)))
+            finally:
+                await mpesa.async_http_client().aclose()
+
+        results = asyncio.run(burst())
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.stub.counts["token"], 1)
+
+    def test_token_reused_until_expiry_then_refreshed(self):
+        self.stub.latency = 0
+        self.stub.token_ttl = mpesa.MPESA_TOKEN_REFRESH_MARGIN + 100  # kept for 100 s
+        real_time = time.time
+        offset = [0.0]
+
+        with mock.patch("time.time", lambda: real_time() + offset[0]):
+            first = self.tokens.get()
+            offset[0] = 99
+            for _ in range(5):
+                self.assertEqual(self.tokens.get(), first)
+            self.assertEqual(self.stub.counts["token"], 1)
+
+            offset[0] = 101
+            second = self.tokens.get()
+            self.assertNotEqual(second, first)
+            self.assertEqual(self.stub.counts["token"], 2)
+            self.assertEqual(self.tokens.get(), second)
+            self.assertEqual(self.stub.counts["token"], 2)
+
+    def test_invalidated_token_is_refetched(self):
+        self.stub.latency = 0
+        first = self.tokens.get()
+        self.tokens.invalidate(first)
+        self.assertNotEqual(self.tokens.get(), first)
+        self.assertEqual(self.stub.counts["token"], 2)
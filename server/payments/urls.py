@@ -1,15 +1,19 @@
 import logging
+from django.conf import settings
 from django.urls import path
+
+from utils.routes import log_routes
 from .views import (
     get_wallet,
     top_up_wallet,
     initiate_payment,
+    initiate_payment_async,
     payment_confirmation,
     is_resource_paid,
+    entitlements,
 )
 
 logger = logging.getLogger(__name__)
-logger.debug("✅ payments/urls.py loaded")
 
 app_name = "payments"  # ✅ Namespace for reverse() lookups
 
@@ -19,13 +23,18 @@ urlpatterns = [
     path("wallet/top-up/", top_up_wallet, name="top_up_wallet"),
 
     # 📲 M-Pesa STK Push + Webhook
-    path("initiate/", initiate_payment, name="initiate_payment"),  # 🔁 STK push trigger
+    path(
+        "initiate/",
+        initiate_payment_async if settings.MPESA_ASYNC_INITIATE else initiate_payment,
+        name="initiate_payment",
+    ),  # 🔁 STK push trigger
+    path("initiate/async/", initiate_payment_async, name="initiate_payment_async"),  # ⚡ awaits Safaricom (ASGI)
     path("confirmation/", payment_confirmation, name="payment_confirmation"),  # 📥 Webhook callback
 
     # ✅ Resource unlock verification
     path("<int:resource_id>/is-paid-for/", is_resource_paid, name="is_resource_paid"),
+    path("entitlements/", entitlements, name="entitlements"),  # bulk: which of these ids are owned
 ]
 
-# 🔍 Debug log registered routes
-for route in urlpatterns:
-    logger.debug("🔗 Registered Route → %s: %s", route.name, route.pattern)
+# 🔍 Debug log registered routes (when LOG_URL_ROUTES is on)
+log_routes(logger, urlpatterns, "api/payment/")
@@ -1,21 +1,31 @@
+import json
 import logging
 from decimal import Decimal, InvalidOperation
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.utils.timezone import now
 from django.views.decorators.csrf import csrf_exempt
 
+from rest_framework import exceptions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 
-from .models import PaidResource, Transaction, Wallet
+from .entitlements import ENTITLEMENTS_MAX_IDS, owned_resource_ids
+from .inbox import receive
+from .models import PaidResource, PendingPayment, Transaction, Wallet
 from resources.models import Resource
-from .mpesa import generate_token, lipa_na_mpesa
+from .mpesa import agenerate_token, alipa_na_mpesa, generate_token, lipa_na_mpesa, sanitize_phone
+from utils.query_budget import query_budget
 
 logger = logging.getLogger(__name__)
 
 
 # ✅ Get Wallet Balance
+@query_budget(6)  # user + get_or_create (select, savepoint, insert, release)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_wallet(request):
@@ -50,6 +60,23 @@ def top_up_wallet(request):
         return Response({"error": "Wallet top-up failed", "details": str(e)}, status=500)
 
 
+def _pending_payment(user, resource, phone, result):
+    """Unsaved PendingPayment for an accepted push; the callback finds it by CheckoutRequestID."""
+    checkout_id = result.get("CheckoutRequestID")
+    if not checkout_id:
+        logger.warning("⚠️ STK push accepted without a CheckoutRequestID; callback can't be matched: %s", result)
+        return None
+    logger.info("🧾 Pending payment %s → user=%s | resource=%s", checkout_id, user.id, resource.id)
+    return PendingPayment(
+        checkout_request_id=checkout_id,
+        merchant_request_id=result.get("MerchantRequestID") or "",
+        user=user,
+        resource=resource,
+        amount=resource.price,
+        phone=sanitize_phone(phone),
+    )
+
+
 # ✅ Initiate M-Pesa Payment
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -78,7 +105,7 @@ def initiate_payment(request):
             logger.error("❌ Failed to generate M-Pesa token")
             return Response({"error": "Failed to generate M-Pesa token"}, status=500)
 
-        # 🔗 Put user+resource into AccountReference for callback linkage
+        # 🔗 Shown on the customer statement; the callback is matched by CheckoutRequestID (PendingPayment)
         account_ref = f"{request.user.id}:{resource.id}"
 
         result = lipa_na_mpesa(
@@ -86,13 +113,17 @@ def initiate_payment(request):
             amount=str(resource.price),          # Safest to pass str for JSON → API
             token=token,
             title=resource.title,
-            account_reference=account_ref,       # <-- needs helper minor patch below
+            account_reference=account_ref,
         )
 
         logger.debug("📤 STK Push Result: %s", result)
         if isinstance(result, dict) and result.get("error"):
             return Response({"error": "STK push failed", "details": result}, status=502)
 
+        pending = _pending_payment(request.user, resource, phone, result)
+        if pending:
+            pending.save()
+
         return Response({"message": "STK Push initiated", "result": result})
 
     except Resource.DoesNotExist:
@@ -103,96 +134,114 @@ def initiate_payment(request):
         return Response({"error": "Payment initiation failed", "details": str(e)}, status=500)
 
 
+def _api_user(request):
+    """The user DRF's authenticators (JWT) resolve for a plain Django request, or None."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except exceptions.APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+# ✅ Initiate M-Pesa Payment (async, for ASGI workers)
+async def initiate_payment_async(request):
+    """
+    initiate_payment as a native async view (DRF views are sync-only): the token
+    and STK push calls are awaited, so under an ASGI server one worker keeps
+    hundreds of pushes in flight instead of one per thread. Same body and responses.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    user = await sync_to_async(_api_user)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    try:
+        if request.content_type == "application/json":
+            data = json.loads(request.body or b"{}")
+        else:
+            data = request.POST
+        resource_id = data.get("resource_id")
+        phone = data.get("phone")
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    if not resource_id or not phone:
+        return JsonResponse({"error": "resource_id and phone are required"}, status=400)
+
+    try:
+        resource = await Resource.objects.aget(pk=resource_id)
+
+        logger.info("📲 STK Push start (async) → user=%s | resource='%s' | price=%s",
+                    user, resource.title, resource.price)
+
+        if resource.is_free:
+            return JsonResponse({"error": "This resource is free and does not require payment."}, status=400)
+
+        if await PaidResource.objects.filter(user=user, resource=resource).aexists():
+            logger.info("✅ Already paid → user=%s | resource=%s", user, resource_id)
+            return JsonResponse({"message": "Resource already unlocked"})
+
+        token = await agenerate_token()
+        if not token:
+            logger.error("❌ Failed to generate M-Pesa token")
+            return JsonResponse({"error": "Failed to generate M-Pesa token"}, status=500)
+
+        result = await alipa_na_mpesa(
+            phone=phone,
+            amount=str(resource.price),
+            token=token,
+            title=resource.title,
+            account_reference=f"{user.id}:{resource.id}",
+        )
+
+        logger.debug("📤 STK Push Result: %s", result)
+        if isinstance(result, dict) and result.get("error"):
+            return JsonResponse({"error": "STK push failed", "details": result}, status=502)
+
+        pending = _pending_payment(user, resource, phone, result)
+        if pending:
+            await pending.asave()
+
+        return JsonResponse({"message": "STK Push initiated", "result": result})
+
+    except Resource.DoesNotExist:
+        logger.error("❌ Resource not found (ID: %s)", resource_id)
+        return JsonResponse({"error": "Resource not found"}, status=404)
+    except Exception as e:
+        logger.exception("❌ Exception during initiate_payment_async")
+        return JsonResponse({"error": "Payment initiation failed", "details": str(e)}, status=500)
+
+
+initiate_payment_async.csrf_exempt = True  # token auth, like the DRF views; Django 4.2's @csrf_exempt is sync-only
+
+
 # ✅ M-Pesa Callback Handler
+@query_budget(1)  # the inbox INSERT
 @csrf_exempt
 @api_view(["POST"])
 @permission_classes([AllowAny])  # Webhook is called by Safaricom; no auth
 def payment_confirmation(request):
-    logger.info("📥 PAYMENT CALLBACK RECEIVED")
-    data = request.data
-
+    """
+    Safaricom's STK result. The raw body goes into the MpesaCallback inbox with one
+    INSERT and is acked straight away; payments.inbox matches it to its PendingPayment
+    and unlocks, so a slow database never turns into callback timeouts and redeliveries.
+    """
     try:
-        logger.debug("📦 Callback Raw Data: %s", data)
-
-        body = data.get("Body", {})
-        stk_callback = body.get("stkCallback", {})
-        result_code = stk_callback.get("ResultCode")
-        merchant_id = stk_callback.get("MerchantRequestID")
-        checkout_id = stk_callback.get("CheckoutRequestID")
-
-        if result_code == 0:
-            # Pull key metadata
-            metadata = stk_callback.get("CallbackMetadata", {}).get("Item", [])
-            phone = None
-            amount = Decimal("0")
-            for item in metadata:
-                if item.get("Name") == "PhoneNumber":
-                    phone = str(item.get("Value"))
-                elif item.get("Name") == "Amount":
-                    amount = Decimal(str(item.get("Value")))
-
-            # 🔗 Recover user & resource via AccountReference
-            # Safaricom will echo AccountReference we sent in the initiating payload.
-            account_ref = None
-            for item in metadata:
-                if item.get("Name") == "AccountReference":
-                    account_ref = str(item.get("Value"))
-                    break
-
-            user = None
-            resource = None
-            if account_ref and ":" in account_ref:
-                try:
-                    user_id_str, res_id_str = account_ref.split(":", 1)
-                    from django.contrib.auth import get_user_model
-                    User = get_user_model()
-                    user = User.objects.filter(id=int(user_id_str)).first()
-                    resource = Resource.objects.filter(id=int(res_id_str)).first()
-                except Exception as e:
-                    logger.warning("⚠️ Failed to parse AccountReference '%s': %s", account_ref, e)
-
-            logger.info("✅ Payment Success → phone=%s | amount=%s | user=%s | resource=%s",
-                        phone, amount, user, resource)
-
-            # Record transaction
-            try:
-                Transaction.objects.create(
-                    user=user if user else None,
-                    amount=amount,
-                    method="M-Pesa",
-                    status="Success",
-                )
-            except Exception as e:
-                logger.warning("⚠️ Could not create Transaction row: %s", e)
-
-            # Unlock resource
-            if user and resource:
-                PaidResource.objects.get_or_create(user=user, resource=resource)
-                logger.info("🔓 Resource unlocked → user=%s | resource=%s", user.id, resource.id)
-            else:
-                logger.warning("⚠️ Missing user/resource, cannot unlock automatically.")
-
-        else:
-            logger.warning("⚠️ Payment failed/cancelled → ResultCode=%s | msg=%s",
-                           result_code, stk_callback.get("ResultDesc"))
-            try:
-                Transaction.objects.create(
-                    user=None,
-                    amount=Decimal("0.00"),
-                    method="M-Pesa",
-                    status="Failed",
-                )
-            except Exception:
-                pass
-
-        return Response({"message": "Callback received"}, status=200)
-
+        row = receive(request.body)
     except Exception as e:
+        # Not stored: a non-2xx makes Safaricom deliver it again.
         logger.exception("❌ Error in payment_confirmation")
         return Response({"error": "Callback error", "details": str(e)}, status=500)
 
+    logger.info("📥 PAYMENT CALLBACK RECEIVED → inbox #%s", row.pk)
+    return Response({"message": "Callback received"}, status=200)
+
 
 # ✅ Check If Resource is Paid
+@query_budget(3)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def is_resource_paid(request, resource_id):
@@ -205,3 +254,28 @@ def is_resource_paid(request, resource_id):
     except Resource.DoesNotExist:
         logger.error("❌ Resource not found during payment check → ID=%s", resource_id)
         return Response({"error": "Resource not found"}, status=404)
+
+
+# ✅ Bulk Ownership Check (catalog screens)
+@query_budget(2)  # user + owned-set load on a cache miss
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def entitlements(request):
+    """
+    Body: {"resource_ids": [1, 2, 3]}
+    Returns {"owned": [1, 3]}: the requested ids the user has paid for.
+    """
+    raw_ids = request.data.get("resource_ids")
+    if not isinstance(raw_ids, list):
+        return Response({"error": "resource_ids must be a list"}, status=400)
+    if len(raw_ids) > ENTITLEMENTS_MAX_IDS:
+        return Response({"error": f"At most {ENTITLEMENTS_MAX_IDS} resource_ids per request"}, status=400)
+    try:
+        requested = list(dict.fromkeys(int(rid) for rid in raw_ids))
+    except (TypeError, ValueError):
+        return Response({"error": "resource_ids must be integers"}, status=400)
+
+    owned = owned_resource_ids(request.user.id)
+    result = [rid for rid in requested if rid in owned]
+    logger.info("🔍 Entitlements → user=%s | asked=%d | owned=%d", request.user, len(requested), len(result))
+    return Response({"owned": result})
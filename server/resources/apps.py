@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class ResourcesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'resources'
+
+    def ready(self):
+        # Connect storage cleanup + index maintenance receivers.
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(signals.ensure_search_index, sender=self)
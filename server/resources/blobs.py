@@ -0,0 +1,120 @@
+# server/resources/blobs.py
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from utils.background import KeyedJobQueue
+from utils.hashing import content_hash
+from .models import DocumentDerivative, DocumentText, Resource, StoredBlob
+from .outbox import enqueue_deletions
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+CONTENT_HASH_WORKERS = getattr(settings, "CONTENT_HASH_WORKERS", 1)  # stored files hashed at once per process
+# ------------------------------
+
+
+def stored_name(sha256) -> str | None:
+    """Name of the object already holding these bytes, if any."""
+    return StoredBlob.objects.filter(sha256=sha256).values_list("name", flat=True).first()
+
+
+def acquire(sha256, name, size=0) -> str:
+    """
+    Add one reference to the blob with this hash and return its stored name.
+    The first reference registers `name` as the blob. If another upload registered
+    the same bytes first, its name is returned and the caller's copy is redundant.
+    """
+    if StoredBlob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1):
+        return StoredBlob.objects.filter(sha256=sha256).values_list("name", flat=True).get()
+    with transaction.atomic():
+        blob, created = StoredBlob.objects.get_or_create(
+            sha256=sha256, defaults={"name": name, "size": size, "ref_count": 1}
+        )
+    if not created:
+        StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+    return blob.name
+
+
+def _discard_derivatives(sha256):
+    """Drop the rendered previews of bytes no resource uses any more; returns their stored names."""
+    row = DocumentDerivative.objects.filter(sha256=sha256).first()
+    if row is None:
+        return []
+    row.delete()
+    return [name for name in [row.thumbnail, *row.preview_pages] if name]
+
+
+def release(sha256, count=1):
+    """
+    Drop `count` references. The last one removes the blob row and its extracted text,
+    and queues the object and its previews for deletion.
+    """
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            return
+        if blob.ref_count > count:
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - count)
+            return
+        blob.delete()
+        DocumentText.objects.filter(sha256=sha256).delete()
+        enqueue_deletions([blob.name, *_discard_derivatives(sha256)])
+    logger.debug("🗑️ Last reference to blob %s gone; queued %s", sha256[:12], blob.name)
+
+
+def adopt(instance):
+    """
+    Count a saved Resource's reference to its content hash. When a concurrent upload of
+    the same bytes won the race, repoint the row at the winner and drop this copy.
+    """
+    canonical = acquire(instance.content_hash, instance.file.name, getattr(instance.file, "size", 0) or 0)
+    if canonical != instance.file.name:
+        logger.info("♻️ Resource id=%s repointed to existing object %s", instance.pk, canonical)
+        Resource.objects.filter(pk=instance.pk).update(file=canonical)
+        enqueue_deletions([instance.file.name])
+        instance.file.name = canonical
+
+
+def hash_stored_file(resource_id) -> str | None:
+    """
+    🔑 Hash a resource's stored object off the request path (registered direct uploads,
+    FieldFile.save()) and save the digest; the post_save signals then deduplicate it,
+    count the blob reference and queue previews and text extraction. Returns the digest,
+    or None when the object cannot be read or the file changed meanwhile.
+    """
+    resource = Resource.objects.filter(pk=resource_id, content_hash__isnull=True).only("id", "file").first()
+    if resource is None or not resource.file:
+        return None
+    name = resource.file.name
+    try:
+        with resource.file.storage.open(name, "rb") as fh:
+            digest = content_hash(fh)
+    except Exception as e:  # missing object, storage error
+        logger.warning("⚠️ Cannot hash stored file %s: %s", name, e)
+        return None
+    with transaction.atomic():
+        resource = Resource.objects.select_for_update().filter(
+            pk=resource_id, content_hash__isnull=True, file=name
+        ).first()
+        if resource is None:
+            return None  # replaced or hashed while we read it
+        resource.content_hash = digest
+        resource.save(update_fields=["content_hash"])
+    logger.debug("🔑 Resource id=%s hashed in the background (sha256=%s)", resource_id, digest[:12])
+    return digest
+
+
+# Per-process hashing jobs, keyed by resource id; backfill_content_hashes catches up on lost ones.
+content_hash_queue = KeyedJobQueue(hash_stored_file, workers=CONTENT_HASH_WORKERS, name="content_hash")
+
+
+def rename(old_name, new_name):
+    """After moving a shared object: point the blob and every Resource using it at the new name."""
+    StoredBlob.objects.filter(name=old_name).update(name=new_name)
+    return Resource.objects.filter(file=old_name).update(file=new_name)
@@ -0,0 +1,122 @@
+# server/resources/derivatives.py
+
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from utils.background import KeyedJobQueue
+from utils.process_pool import get_process_pool
+from utils.signed_url_cache import signed_url_cache
+from utils.storage_ops import local_copy, move_object
+from . import mirror
+from .blobs import stored_name
+from .models import CatalogVersion, DocumentDerivative, _sign_blobs
+from .rendering import RenderUnavailable, render_pdf
+from .snapshot import CATALOG_SNAPSHOT_ENABLED, catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+DERIVATIVES_ENABLED = getattr(settings, "DERIVATIVES_ENABLED", True)
+DERIVATIVE_WORKERS = getattr(settings, "DERIVATIVE_WORKERS", 2)  # jobs in flight; rendering itself is in the process pool
+DERIVATIVE_PREFIX = getattr(settings, "DERIVATIVE_PREFIX", "derivatives/")
+DERIVATIVE_PREVIEW_PAGES = getattr(settings, "DERIVATIVE_PREVIEW_PAGES", 3)
+DERIVATIVE_PREVIEW_WIDTH = getattr(settings, "DERIVATIVE_PREVIEW_WIDTH", 900)      # px
+DERIVATIVE_THUMBNAIL_WIDTH = getattr(settings, "DERIVATIVE_THUMBNAIL_WIDTH", 320)  # px
+DERIVATIVE_RENDER_TIMEOUT = getattr(settings, "DERIVATIVE_RENDER_TIMEOUT", 180)    # seconds
+# ------------------------------
+
+RENDERABLE_EXTS = {".pdf"}
+
+
+def derivative_dir(sha256) -> str:
+    """Derivatives live beside the originals in the same storage, keyed by content hash."""
+    return f"{DERIVATIVE_PREFIX}{sha256[:2]}/{sha256}/"
+
+
+def _store(storage, name, data) -> str:
+    """
+    Write under the deterministic `name`, replacing an earlier rendering: saved under
+    a unique temporary name, then moved over the target (os.replace / GCS rewrite),
+    so the name never goes missing and concurrent rebuilds cannot collide.
+    """
+    tmp = storage.save(f"{name}.{uuid.uuid4().hex[:8]}.tmp", ContentFile(data))
+    final = move_object(storage, tmp, name)
+    mirror.forget([final])
+    mirror.moved(tmp, final)
+    return final
+
+
+def build_derivatives(sha256, storage=None, force=False) -> DocumentDerivative:
+    """
+    🖼️ Render the thumbnail and preview pages for one content hash, once.
+    READY/UNSUPPORTED rows are returned as they are unless `force`; FAILED ones are retried.
+    """
+    storage = storage or default_storage
+    row, _ = DocumentDerivative.objects.get_or_create(sha256=sha256)
+    if row.status in (DocumentDerivative.Status.READY, DocumentDerivative.Status.UNSUPPORTED) and not force:
+        return row
+
+    source = stored_name(sha256)
+    if not source:
+        row.delete()  # every resource with these bytes is gone
+        return row
+    if os.path.splitext(source)[1].lower() not in RENDERABLE_EXTS:
+        row.status, row.error = DocumentDerivative.Status.UNSUPPORTED, ""
+        row.save(update_fields=["status", "error", "updated_at"])
+        return row
+
+    try:
+        with local_copy(storage, source) as path:
+            thumbnail, pages = get_process_pool().submit(
+                render_pdf, path, DERIVATIVE_PREVIEW_PAGES, DERIVATIVE_PREVIEW_WIDTH, DERIVATIVE_THUMBNAIL_WIDTH,
+            ).result(timeout=DERIVATIVE_RENDER_TIMEOUT)
+        if not thumbnail:
+            raise ValueError("document has no pages")
+        base = derivative_dir(sha256)
+        row.thumbnail = _store(storage, f"{base}thumb.jpg", thumbnail)
+        row.preview_pages = [_store(storage, f"{base}page-{i}.jpg", page) for i, page in enumerate(pages, 1)]
+        row.status, row.error = DocumentDerivative.Status.READY, ""
+    except RenderUnavailable as e:
+        logger.warning("⚠️ Previews disabled: %s", e)
+        row.status, row.error = DocumentDerivative.Status.FAILED, str(e)
+    except Exception as e:
+        logger.exception("❌ Rendering derivatives failed for %s (%s)", source, sha256[:12])
+        row.status, row.error = DocumentDerivative.Status.FAILED, str(e)[:2000]
+    row.save()
+
+    if row.status == DocumentDerivative.Status.READY:
+        logger.info("🖼️ Derivatives ready for %s: thumbnail + %d page(s)", source, len(row.preview_pages))
+        CatalogVersion.bump()  # thumbnail_url appears in the resource list
+        if CATALOG_SNAPSHOT_ENABLED:
+            catalog_snapshot.schedule_rebuild()
+    return row
+
+
+# Fed after upload commits (resources.signals); `manage.py build_derivatives` covers anything a restart dropped.
+derivative_queue = KeyedJobQueue(build_derivatives, workers=DERIVATIVE_WORKERS, name="derivatives")
+
+
+def thumbnail_urls(resources) -> dict:
+    """{content_hash: thumbnail URL} for the ready derivatives of a page, in one query (+ one signing batch)."""
+    hashes = {r.content_hash for r in resources if getattr(r, "content_hash", None)}
+    if not hashes:
+        return {}
+    names = dict(
+        DocumentDerivative.objects.filter(sha256__in=hashes, status=DocumentDerivative.Status.READY)
+        .values_list("sha256", "thumbnail")
+    )
+    if not names:
+        return {}
+    if getattr(settings, "GS_BUCKET_NAME", None):
+        try:
+            signed = signed_url_cache.get_or_sign_many(list(names.values()), _sign_blobs)
+            return {sha: signed[name][0] for sha, name in names.items()}
+        except Exception as e:
+            logger.debug("Thumbnail signing unavailable: %s", e)
+    return {sha: default_storage.url(name) for sha, name in names.items()}
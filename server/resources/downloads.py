@@ -0,0 +1,187 @@
+# server/resources/downloads.py
+
+import logging
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+# "" streams through Django (zero-copy via wsgi.file_wrapper/sendfile on gunicorn),
+# "x-accel-redirect" hands the file to nginx, "x-sendfile" to Apache/lighttpd.
+RESOURCE_DOWNLOAD_OFFLOAD = getattr(settings, "RESOURCE_DOWNLOAD_OFFLOAD", "").lower()
+RESOURCE_DOWNLOAD_ACCEL_PREFIX = getattr(settings, "RESOURCE_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+RESOURCE_DOWNLOAD_BLOCK_BYTES = getattr(settings, "RESOURCE_DOWNLOAD_BLOCK_BYTES", 256 * 1024)
+RESOURCE_DOWNLOAD_SIGNED_MINUTES = getattr(settings, "RESOURCE_DOWNLOAD_SIGNED_MINUTES", 60)
+# ------------------------------
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def can_download(user, resource) -> bool:
+    """Free resources are open to everyone; paid ones need a PaidResource row (or staff)."""
+    if resource.is_free:
+        return True
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    from payments.entitlements import owns
+    return owns(user.pk, resource.pk)
+
+
+def download_filename(resource) -> str:
+    """Name from the title: content-deduplicated objects may be stored under another upload's name."""
+    ext = os.path.splitext(resource.file.name)[1].lower()
+    return f"{slugify(resource.title) or f'resource-{resource.pk}'}{ext}"
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, or None to send the whole file
+    (no/invalid header, or several ranges, which we are allowed to ignore).
+    Raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":  # suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of an open file starting at `start`.
+    The OS file offset is positioned at `start` and fileno() is exposed, so a WSGI
+    server's file_wrapper can sendfile() exactly Content-Length bytes; without one,
+    reads are bounded by the range.
+    """
+
+    def __init__(self, fh, start, length):
+        self._fh = fh
+        self._fh.seek(start)
+        self._remaining = length
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._fh.close()
+
+
+def _validators(resource, stat):
+    # content_hash is a strong validator; size+mtime works for files uploaded before hashing.
+    etag = f'"{resource.content_hash}"' if resource.content_hash else f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    return etag, int(stat.st_mtime)
+
+
+def _if_range_matches(request, etag, mtime) -> bool:
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag  # strong comparison only
+    since = parse_http_date_safe(if_range)
+    return since is not None and since >= mtime
+
+
+def _common_headers(response, resource, etag, mtime, as_attachment):
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(mtime)
+    response["Content-Disposition"] = content_disposition_header(as_attachment, download_filename(resource))
+    patch_cache_control(response, private=True, max_age=0)
+    return response
+
+
+def serve_local(request, resource, storage, as_attachment=True):
+    """
+    📥 Serve a FileSystemStorage file with conditional GET and single-range support.
+    Memory stays at one block whatever the file size; with RESOURCE_DOWNLOAD_OFFLOAD
+    the web server sends the bytes (and handles Range itself).
+    """
+    path = storage.path(resource.file.name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        logger.warning("⚠️ Download: stored file missing for resource id=%s (%s)", resource.pk, resource.file.name)
+        return HttpResponse(status=404)
+    size = stat.st_size
+    etag, mtime = _validators(resource, stat)
+    content_type = mimetypes.guess_type(resource.file.name)[0] or "application/octet-stream"
+
+    if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        return _common_headers(HttpResponseNotModified(), resource, etag, mtime, as_attachment)
+
+    if RESOURCE_DOWNLOAD_OFFLOAD in ("x-accel-redirect", "x-sendfile"):
+        response = HttpResponse(content_type=content_type)
+        if RESOURCE_DOWNLOAD_OFFLOAD == "x-accel-redirect":
+            response["X-Accel-Redirect"] = RESOURCE_DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(resource.file.name)
+        else:
+            response["X-Sendfile"] = path
+        logger.debug("📥 Download offloaded (%s) for resource id=%s", RESOURCE_DOWNLOAD_OFFLOAD, resource.pk)
+        return _common_headers(response, resource, etag, mtime, as_attachment)
+
+    byte_range = None
+    if "HTTP_RANGE" in request.META and _if_range_matches(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.META["HTTP_RANGE"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return _common_headers(response, resource, etag, mtime, as_attachment)
+
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    response = FileResponse(RangeFile(open(path, "rb"), start, length), content_type=content_type)
+    response.block_size = RESOURCE_DOWNLOAD_BLOCK_BYTES
+    response["Content-Length"] = str(length)
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    logger.debug("📥 Download resource id=%s bytes %s-%s/%s", resource.pk, start, end, size)
+    return _common_headers(response, resource, etag, mtime, as_attachment)
+
+
+def redirect_signed(resource):
+    """
+    🔐 Redirect to a signed GCS URL from the process-wide cache; the bucket serves
+    Range requests itself. Falls back to the storage URL when signing is unavailable.
+    """
+    url, _ = resource.get_signed_url_with_expiry(RESOURCE_DOWNLOAD_SIGNED_MINUTES)
+    if not url:
+        url = resource.file.url
+    response = HttpResponseRedirect(url)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
@@ -0,0 +1,110 @@
+# server/resources/extraction.py
+#
+# Runs inside the document process pool: no Django imports here.
+
+import re
+import shutil
+import subprocess
+import zipfile
+from xml.etree import ElementTree
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_SLIDE_RE = re.compile(r"^ppt/slides/slide(\d+)\.xml$")
+_SPACES_RE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+class ExtractUnavailable(Exception):
+    """No PDF text extractor installed (pypdfium2 or poppler's pdftotext)."""
+
+
+class _Collector:
+    """Accumulates paragraphs until `max_chars` is reached."""
+
+    def __init__(self, max_chars):
+        self.parts, self.size, self.max_chars = [], 0, max_chars
+
+    def add(self, text) -> bool:
+        """False once full, so callers can stop reading."""
+        if text:
+            self.parts.append(text)
+            self.size += len(text) + 1
+        return self.size < self.max_chars
+
+    def text(self) -> str:
+        return "\n".join(self.parts)
+
+
+def _ooxml_paragraphs(stream, paragraph_tag, text_tag):
+    """Stream text runs of an Office XML part, one string per paragraph."""
+    runs = []
+    for event, element in ElementTree.iterparse(stream, events=("end",)):
+        if element.tag == text_tag:
+            runs.append(element.text or "")
+        elif element.tag == paragraph_tag:
+            yield "".join(runs)
+            runs = []
+            element.clear()
+
+
+def _docx(path, out):
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as part:
+        for paragraph in _ooxml_paragraphs(part, f"{_W}p", f"{_W}t"):
+            if not out.add(paragraph):
+                return
+
+
+def _pptx(path, out):
+    with zipfile.ZipFile(path) as archive:
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in archive.namelist()
+            if (match := _SLIDE_RE.match(name))
+        )
+        for _, name in slides:
+            with archive.open(name) as part:
+                for paragraph in _ooxml_paragraphs(part, f"{_A}p", f"{_A}t"):
+                    if not out.add(paragraph):
+                        return
+
+
+def _pdf(path, out):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        pdfium = None
+
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(path)
+        try:
+            for index in range(len(doc)):
+                page = doc[index]
+                textpage = page.get_textpage()
+                try:
+                    if not out.add(textpage.get_text_range()):
+                        return
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            doc.close()
+        return
+    if not shutil.which("pdftotext"):
+        raise ExtractUnavailable("install pypdfium2 or poppler-utils (pdftotext) to extract PDF text")
+    result = subprocess.run(["pdftotext", "-enc", "UTF-8", path, "-"], check=True, capture_output=True, timeout=120)
+    out.add(result.stdout.decode("utf-8", "replace"))
+
+
+EXTRACTORS = {".pdf": _pdf, ".docx": _docx, ".pptx": _pptx}
+
+
+def extract_text(path, ext, max_chars=100_000) -> str:
+    """
+    Plain text of a PDF/DOCX/PPTX file, whitespace-normalized and cut at `max_chars`.
+    Reading stops early once enough text is collected.
+    """
+    out = _Collector(max_chars)
+    EXTRACTORS[ext](path, out)
+    text = _SPACES_RE.sub(" ", out.text())
+    return _BLANK_LINES_RE.sub("\n", text).strip()[:max_chars]
@@ -0,0 +1,94 @@
+# server/resources/facets.py
+
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+logger = logging.getLogger(__name__)
+
+# facet name → Resource field; "free" is the is_free flag rendered as "true"/"false".
+FACET_FIELDS = {
+    "category": "category",
+    "level": "level",
+    "term": "term",
+    "free": "is_free",
+}
+NONE_VALUE = ""  # level/term may be NULL
+
+
+def _facet_value(value) -> str:
+    if value is None:
+        return NONE_VALUE
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def facet_values(source) -> dict:
+    """{facet: value} for a Resource instance or a .values() row."""
+    get = source.get if isinstance(source, dict) else lambda f: getattr(source, f)
+    return {facet: _facet_value(get(field)) for facet, field in FACET_FIELDS.items()}
+
+
+def facet_delta(old: dict | None, new: dict | None) -> Counter:
+    """{(facet, value): change} for moving one resource from `old` to `new` facet values."""
+    delta = Counter()
+    for facet, value in (old or {}).items():
+        delta[(facet, value)] -= 1
+    for facet, value in (new or {}).items():
+        delta[(facet, value)] += 1
+    return delta
+
+
+def apply_change(old: dict | None, new: dict | None):
+    """
+    Move one resource's contribution from `old` facet values to `new`.
+    Pass old=None for a create and new=None for a delete.
+    """
+    apply_delta(facet_delta(old, new))
+
+
+def apply_delta(delta: Counter):
+    """
+    Apply summed count changes (several resources at once is fine). Counts change
+    via F() so concurrent writers never lose increments.
+    """
+    from .models import ResourceFacetCount
+
+    for (facet, value), change in delta.items():
+        if not change:
+            continue
+        updated = ResourceFacetCount.objects.filter(facet=facet, value=value).update(count=F("count") + change)
+        if not updated and change > 0:
+            _, created = ResourceFacetCount.objects.get_or_create(facet=facet, value=value, defaults={"count": change})
+            if not created:
+                ResourceFacetCount.objects.filter(facet=facet, value=value).update(count=F("count") + change)
+
+
+def read_facets() -> dict:
+    """{facet: {value: count}} straight from the aggregate table (size ≈ number of facet values)."""
+    from .models import ResourceFacetCount
+
+    result = {facet: {} for facet in FACET_FIELDS}
+    for facet, value, count in ResourceFacetCount.objects.filter(count__gt=0).values_list("facet", "value", "count"):
+        result.setdefault(facet, {})[value] = count
+    result["total"] = sum(result["free"].values())
+    return result
+
+
+def rebuild_facets() -> int:
+    """Recompute every facet count from the Resource table; returns the number of rows written."""
+    from .models import Resource, ResourceFacetCount
+
+    rows = []
+    for facet, field in FACET_FIELDS.items():
+        for row in Resource.objects.order_by().values(field).annotate(n=Count("id")):
+            rows.append(ResourceFacetCount(facet=facet, value=_facet_value(row[field]), count=row["n"]))
+
+    with transaction.atomic():
+        ResourceFacetCount.objects.all().delete()
+        ResourceFacetCount.objects.bulk_create(rows)
+    logger.info("📊 Facet counts rebuilt: %d rows", len(rows))
+    return len(rows)
@@ -0,0 +1,266 @@
+# server/resources/ingest.py
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .facets import apply_delta, facet_delta, facet_values
+from .forms import ALLOWED_EXTS
+from .models import CatalogVersion, Category, Level, Resource, Term
+from .search import get_search_backend
+from .uploads import object_name_for
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+INGEST_WORKERS = getattr(settings, "INGEST_WORKERS", 8)         # concurrent uploads
+INGEST_BATCH_SIZE = getattr(settings, "INGEST_BATCH_SIZE", 200)  # rows per bulk_create
+# ------------------------------
+
+
+def _norm(text) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(text).upper())
+
+
+def _lookup(choices) -> dict:
+    """Normalized value and label → choice value, e.g. "FORM3"/"Form 3" → "FORM3"."""
+    table = {}
+    for value, label in choices.choices:
+        table[_norm(value)] = value
+        table[_norm(label)] = value
+    return table
+
+
+_CATEGORIES, _LEVELS, _TERMS = _lookup(Category), _lookup(Level), _lookup(Term)
+
+
+def classify(rel_path: str) -> dict | None:
+    """
+    category/level/term from the folders of a path such as FORM3/EXAMS/T1/bio.pdf
+    (values or labels, any order, any case). None if no category folder is found.
+    """
+    found = {}
+    for part in PurePosixPath(rel_path).parts[:-1]:
+        key = _norm(part)
+        for field, table in (("category", _CATEGORIES), ("level", _LEVELS), ("term", _TERMS)):
+            if field not in found and key in table:
+                found[field] = table[key]
+    if "category" not in found:
+        return None
+    return {"category": found["category"], "level": found.get("level"), "term": found.get("term")}
+
+
+def title_for(rel_path: str) -> str:
+    stem = PurePosixPath(rel_path).stem
+    return re.sub(r"\s+", " ", re.sub(r"[_\-]+", " ", stem)).strip()[:255] or stem
+
+
+@dataclass
+class IngestItem:
+    path: str   # relative, "/"-separated
+    size: int
+    title: str
+    category: str
+    level: str | None
+    term: str | None
+    object_name: str | None = None
+
+
+# ---------- Sources ----------
+
+class DirectorySource:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def files(self):
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file():
+                yield path.relative_to(self.root).as_posix(), path.stat().st_size
+
+    def open(self, rel_path):
+        return open(self.root / rel_path, "rb")
+
+
+class ZipSource:
+    """Members are streamed out of the archive; each upload thread keeps its own handle."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _zip(self):
+        if getattr(self._local, "zip", None) is None:
+            self._local.zip = zipfile.ZipFile(self.path)
+        return self._local.zip
+
+    def files(self):
+        for info in sorted(self._zip().infolist(), key=lambda i: i.filename):
+            if not info.is_dir():
+                yield info.filename, info.file_size
+
+    def open(self, rel_path):
+        return self._zip().open(rel_path)
+
+
+def open_source(path):
+    return ZipSource(path) if zipfile.is_zipfile(path) else DirectorySource(path)
+
+
+# ---------- Manifest ----------
+
+class Manifest:
+    """
+    Append-only JSON lines: {"path", "size", "object", "status": "uploaded"|"done", "id"?}.
+    A rerun skips "done" paths and registers "uploaded" ones without uploading again.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["path"]] = entry
+
+    def record(self, **entry):
+        with self._lock:
+            self.entries[entry["path"]] = entry
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+
+
+# ---------- Ingestion ----------
+
+@dataclass
+class IngestStats:
+    created: int = 0
+    uploaded: int = 0
+    uploaded_bytes: int = 0
+    skipped: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.uploaded / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.uploaded_bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def plan(source, manifest):
+    """(items to upload, items uploaded earlier but not registered, skipped paths)."""
+    to_upload, to_register, skipped = [], [], []
+    for rel_path, size in source.files():
+        if os.path.splitext(rel_path)[1].lower() not in ALLOWED_EXTS:
+            skipped.append((rel_path, "extension"))
+            continue
+        facets = classify(rel_path)
+        if facets is None:
+            skipped.append((rel_path, "no category folder"))
+            continue
+        seen = manifest.entries.get(rel_path)
+        if seen and seen.get("size") == size and seen["status"] == "done":
+            continue
+        item = IngestItem(path=rel_path, size=size, title=title_for(rel_path), **facets)
+        if seen and seen.get("size") == size and seen["status"] == "uploaded":
+            item.object_name = seen["object"]
+            to_register.append(item)
+        else:
+            to_upload.append(item)
+    return to_upload, to_register, skipped
+
+
+def _upload(source, storage, item):
+    with source.open(item.path) as fh:
+        return storage.save(object_name_for(item.path), File(fh, name=os.path.basename(item.path)))
+
+
+def _register(items, manifest, price):
+    """bulk_create one batch and apply what the per-row signals would have done."""
+    is_free = price <= 0
+    with transaction.atomic():
+        rows = Resource.objects.bulk_create([
+            Resource(
+                title=item.title, file=item.object_name, category=item.category, level=item.level,
+                term=item.term, is_free=is_free, price=Decimal("0.00") if is_free else price,
+            )
+            for item in items
+        ])
+        # bulk_create skips signals: index, facet counts and the catalog version by hand.
+        if all(row.pk for row in rows):
+            get_search_backend().index(rows)
+        else:
+            logger.warning("⚠️ Database did not return ids; run rebuild_search_index after ingesting")
+        delta = Counter()
+        for row in rows:
+            delta.update(facet_delta(None, facet_values(row)))
+        apply_delta(delta)
+        CatalogVersion.bump()
+    for item, row in zip(items, rows):
+        manifest.record(path=item.path, size=item.size, object=item.object_name, status="done", id=row.pk)
+    return len(rows)
+
+
+def ingest(source, manifest, storage=None, workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE,
+           price=Decimal("0.00"), on_progress=None) -> IngestStats:
+    """
+    Upload every classifiable file of `source` through a pool of `workers` threads and
+    register them in batches of `batch_size`. Uploads stream from the source; each
+    finished upload is written to the manifest before its row exists, so an
+    interrupted run resumes without uploading twice.
+    """
+    storage = storage or default_storage
+    stats = IngestStats()
+    to_upload, pending, skipped = plan(source, manifest)
+    stats.skipped = len(skipped)
+    for rel_path, reason in skipped:
+        logger.debug("⏭️ Skipping %s (%s)", rel_path, reason)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(_upload, source, storage, item): item for item in to_upload}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                item.object_name = future.result()
+            except Exception as e:
+                stats.failed += 1
+                logger.error("❌ Upload failed for %s: %s", item.path, e)
+                continue
+            manifest.record(path=item.path, size=item.size, object=item.object_name, status="uploaded")
+            stats.uploaded += 1
+            stats.uploaded_bytes += item.size
+            pending.append(item)
+            if len(pending) >= batch_size:
+                stats.created += _register(pending, manifest, price)
+                pending = []
+                if on_progress:
+                    on_progress(stats)
+    if pending:
+        stats.created += _register(pending, manifest, price)
+    stats.seconds = time.perf_counter() - start
+    logger.info(
+        "📚 Ingest finished: %d created, %d uploaded (%.1f files/s, %.1f MB/s), %d skipped, %d failed",
+        stats.created, stats.uploaded, stats.files_per_second, stats.mb_per_second, stats.skipped, stats.failed,
+    )
+    return stats
@@ -0,0 +1,43 @@
+# server/resources/management/commands/backfill_content_hashes.py
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resources import blobs
+from resources.models import Resource
+from utils.hashing import content_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Hash stored files of resources uploaded before content-hash dedup and register them "
+        "as blobs. Rows whose bytes are already stored are repointed; their copy is queued for deletion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many resources.")
+
+    def handle(self, *args, **opts):
+        pending = Resource.objects.filter(content_hash__isnull=True).exclude(file="").exclude(file__isnull=True)
+        if opts["limit"]:
+            pending = pending[: opts["limit"]]
+        hashed = shared = missing = 0
+        for resource in pending.only("id", "file").iterator(chunk_size=200):
+            name = resource.file.name
+            try:
+                with default_storage.open(name, "rb") as fh:
+                    digest = content_hash(fh)
+            except FileNotFoundError:
+                missing += 1
+                self.stdout.write(self.style.WARNING(f"⚠️ id={resource.pk}: {name} is missing from storage"))
+                continue
+            with transaction.atomic():
+                Resource.objects.filter(pk=resource.pk).update(content_hash=digest)
+                resource.content_hash = digest
+                blobs.adopt(resource)
+            hashed += 1
+            shared += resource.file.name != name
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {hashed} resource(s) hashed, {shared} now share an existing object, {missing} missing"
+        ))
@@ -0,0 +1,66 @@
+# server/resources/management/commands/bench_ingest.py
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resources.ingest import Manifest, ingest, open_source
+
+
+class LatencyStorage(FileSystemStorage):
+    """Local storage stand-in that waits `latency` seconds per upload, like a bucket round trip."""
+
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def _save(self, name, content):
+        time.sleep(self.latency)
+        return super()._save(name, content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ingest_resources throughput (files/s, MB/s) for several worker counts against a "
+        "local storage stand-in with injected per-upload latency. Rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=200)
+        parser.add_argument("--size-kb", type=int, default=512)
+        parser.add_argument("--latency-ms", type=float, default=80.0)
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+
+    def handle(self, *args, **opts):
+        self.stdout.write(
+            f"{opts['files']} files x {opts['size_kb']} KB, {opts['latency_ms']:.0f} ms latency per upload"
+        )
+        self.stdout.write(f"{'workers':>8} {'files/s':>10} {'MB/s':>8} {'seconds':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+            source = self._make_tree(Path(tmp) / "pack", opts["files"], opts["size_kb"])
+            for workers in opts["workers"]:
+                storage = LatencyStorage(opts["latency_ms"] / 1000, location=Path(tmp) / f"bucket-{workers}")
+                with transaction.atomic():
+                    stats = ingest(
+                        open_source(source), Manifest(Path(tmp) / f"manifest-{workers}.jsonl"),
+                        storage=storage, workers=workers,
+                    )
+                    transaction.set_rollback(True)
+                self.stdout.write(
+                    f"{workers:>8} {stats.files_per_second:>10.1f} {stats.mb_per_second:>8.1f} {stats.seconds:>8.2f}"
+                )
+
+    @staticmethod
+    def _make_tree(root, count, size_kb):
+        layout = ["FORM2/NOTES", "FORM3/EXAMS/T1", "FORM4/EXAMS/T2", "Grade 9/Schemes of Work/Term 3"]
+        payload = os.urandom(size_kb * 1024)
+        for i in range(count):
+            folder = root / layout[i % len(layout)]
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f"Paper_{i:04d}.pdf").write_bytes(payload)
+        return root
@@ -0,0 +1,80 @@
+# server/resources/management/commands/bench_resource_list.py
+
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from resources.models import Category, Level, Resource, Term
+from resources.serializers import COLUMN_FIELDS, ResourceSerializer, values_representation
+
+GRID_FIELDS = ["id", "title", "category", "level", "term", "is_free", "price"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark resource list rendering in rows/second: full ResourceSerializer vs. a sparse "
+        "fieldset (?fields=) vs. the .values() fast path. Rows are inserted inside a transaction "
+        "that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path (median reported).")
+        parser.add_argument(
+            "--fields", default=",".join(GRID_FIELDS),
+            help=f"Sparse fieldset to compare (plain columns: {','.join(COLUMN_FIELDS)}).",
+        )
+
+    def handle(self, *args, **opts):
+        fields = [f.strip() for f in opts["fields"].split(",") if f.strip()]
+        request = RequestFactory().get("/api/resources/", HTTP_HOST="localhost")
+        context = {"request": request}
+        signing = "GCS signing" if getattr(settings, "GS_BUCKET_NAME", None) else "local storage, no signing"
+        self.stdout.write(f"{opts['rows']} rows | {signing} | sparse fields: {','.join(fields)}")
+
+        paths = {
+            "full serializer": lambda: ResourceSerializer(
+                list(Resource.objects.all()), many=True, context=context).data,
+            "sparse serializer": lambda: ResourceSerializer(
+                list(Resource.objects.all()), many=True, context=context, fields=fields).data,
+        }
+        if set(fields) <= set(COLUMN_FIELDS):
+            render = values_representation(fields)
+            paths["values() path"] = lambda: [render(row) for row in Resource.objects.values(*fields)]
+
+        with transaction.atomic():
+            self._populate(opts["rows"])
+            baseline = None
+            for label, run in paths.items():
+                rate = self._rows_per_second(run, opts["repeat"])
+                baseline = baseline or rate
+                self.stdout.write(f"{label:<18} {rate:>12,.0f} rows/s  ({rate / baseline:.1f}x)")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _populate(count):
+        levels, terms, categories = list(Level.values), list(Term.values), list(Category.values)
+        Resource.objects.bulk_create(
+            (
+                Resource(
+                    title=f"Bench resource {i}", file=f"resources/bench-{i}.pdf",
+                    category=categories[i % len(categories)], level=levels[i % len(levels)],
+                    term=terms[i % len(terms)], is_free=bool(i % 3), price=i % 200,
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+
+    @staticmethod
+    def _rows_per_second(run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(run())
+            timings.append(time.perf_counter() - start)
+        return rows / statistics.median(timings)
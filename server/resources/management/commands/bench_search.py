@@ -0,0 +1,83 @@
+# server/resources/management/commands/bench_search.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resources.models import Category, Level, Resource, Term
+from resources.search import get_search_backend
+
+SUBJECTS = [
+    "Biology", "Chemistry", "Physics", "Mathematics", "English", "Kiswahili", "History",
+    "Geography", "CRE", "Agriculture", "Business Studies", "Computer Studies", "Home Science",
+]
+KINDS = ["Notes", "Revision", "Exam", "Marking Scheme", "Scheme of Work", "Lesson Plan", "Topical Questions"]
+TOPICS = [
+    "Photosynthesis", "Cell Division", "Organic Chemistry", "Electromagnetism", "Quadratic Equations",
+    "Poetry", "Fasihi", "Colonial Kenya", "Weathering", "Soil Fertility", "Accounting", "Networks",
+]
+QUERIES = ["biology", "photo", "form 3 exam", "chem org", "marking scheme", "zzznotfound"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ?q= search latency: full-text backend vs. title__icontains. "
+        "Rows are inserted inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (median reported).")
+        parser.add_argument("--page-size", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        backend = get_search_backend()
+        backend.ensure_schema()
+        self.stdout.write(f"Backend: {backend.name} | page size {opts['page_size']}")
+        self.stdout.write(f"{'rows':>10} {'query':<16} {'icontains ms':>13} {'full-text ms':>13} {'hits':>8}")
+
+        rng = random.Random(42)
+        with transaction.atomic():
+            existing = 0
+            for size in sorted(opts["sizes"]):
+                self._grow(existing, size, rng)
+                existing = size
+                backend.rebuild()
+                for q in QUERIES:
+                    legacy = self._time(opts, lambda: Resource.objects.filter(title__icontains=q).order_by("-created_at"))
+                    ranked = self._time(opts, lambda: backend.search(Resource.objects.all(), q).order_by("-search_rank", "id"))
+                    hits = backend.search(Resource.objects.all(), q).count()
+                    self.stdout.write(f"{size:>10} {q:<16} {legacy:>13.2f} {ranked:>13.2f} {hits:>8}")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _grow(start, stop, rng):
+        levels, terms, categories = list(Level.values), list(Term.values), list(Category.values)
+        batch = []
+        for i in range(start, stop):
+            level = rng.choice(levels)
+            title = (
+                f"{rng.choice(SUBJECTS)} {Level(level).label} {rng.choice(KINDS)} "
+                f"{rng.choice(TOPICS)} {i}"
+            )
+            batch.append(Resource(
+                title=title, file=f"resources/bench-{i}.pdf", category=rng.choice(categories),
+                level=level, term=rng.choice(terms),
+            ))
+            if len(batch) >= 5000:
+                Resource.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Resource.objects.bulk_create(batch)
+
+    @staticmethod
+    def _time(opts, make_qs):
+        timings = []
+        for _ in range(opts["repeat"]):
+            start = time.perf_counter()
+            list(make_qs()[: opts["page_size"]])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,100 @@
+# server/resources/management/commands/bench_signing.py
+
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.gcs_signer import V4URLSigner
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark: local batch V4 signer vs. the per-call storage-client signing path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="URLs signed per run (one catalog page).")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best run is reported.")
+        parser.add_argument("--key-bits", type=int, default=2048, help="Size of the throwaway RSA key.")
+        parser.add_argument(
+            "--use-settings", action="store_true",
+            help="Sign with settings.GS_CREDENTIALS instead of a generated key (still offline).",
+        )
+
+    def handle(self, *args, **opts):
+        credentials, bucket_name = self._credentials(opts)
+        signer = V4URLSigner(credentials, bucket_name)
+        names = [f"resources/bench-{i:05d} notes.pdf" for i in range(opts["count"])]
+
+        self._verify(signer, credentials, bucket_name)
+
+        per_call = self._best(opts["repeat"], lambda: self._per_call(credentials, bucket_name, names))
+        batch = self._best(opts["repeat"], lambda: signer.sign_many(names))
+
+        self.stdout.write(f"URLs per run:        {len(names)}")
+        self.stdout.write(f"storage client path: {per_call * 1000:9.1f} ms  ({len(names) / per_call:8.0f} URLs/s)")
+        self.stdout.write(f"local batch signer:  {batch * 1000:9.1f} ms  ({len(names) / batch:8.0f} URLs/s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {per_call / batch:.1f}x"))
+
+    # ---------- helpers ----------
+
+    def _credentials(self, opts):
+        if opts["use_settings"]:
+            credentials = getattr(settings, "GS_CREDENTIALS", None)
+            bucket_name = getattr(settings, "GS_BUCKET_NAME", None)
+            if not (credentials and bucket_name):
+                raise CommandError("GS_CREDENTIALS / GS_BUCKET_NAME are not configured.")
+            return credentials, bucket_name
+
+        import rsa
+        from google.oauth2 import service_account
+
+        self.stdout.write(f"Generating a throwaway {opts['key_bits']}-bit RSA key…")
+        _, private_key = rsa.newkeys(opts["key_bits"])
+        credentials = service_account.Credentials.from_service_account_info({
+            "type": "service_account",
+            "project_id": "elimu-bench",
+            "private_key_id": "bench",
+            "private_key": private_key.save_pkcs1().decode(),
+            "client_email": "bench@elimu-bench.iam.gserviceaccount.com",
+            "client_id": "0",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        })
+        return credentials, "elimu-bench-bucket"
+
+    def _verify(self, signer, credentials, bucket_name):
+        """Local URLs must be byte-identical to the library's for the same timestamp."""
+        from google.cloud.storage._signing import generate_signed_url_v4
+
+        now = datetime(2025, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        name = "resources/Form 3 Biology T1 (ü).pdf"
+        expected = generate_signed_url_v4(
+            credentials,
+            resource=f"/{bucket_name}/{quote(name.encode('utf-8'), safe=b'/~')}",
+            expiration=3600,
+            _request_timestamp=now.strftime("%Y%m%dT%H%M%SZ"),
+        )
+        if signer.sign(name, expiration=timedelta(hours=1), now=now) != expected:
+            raise CommandError("Local signer output differs from google-cloud-storage.")
+        self.stdout.write("✅ Local signer matches google-cloud-storage output.")
+
+    @staticmethod
+    def _per_call(credentials, bucket_name, names):
+        # Mirrors the old Resource.get_signed_url(): a new client per URL.
+        from google.cloud import storage
+
+        for name in names:
+            client = storage.Client(credentials=credentials)
+            client.bucket(bucket_name).blob(name).generate_signed_url(
+                version="v4", expiration=timedelta(hours=1), method="GET"
+            )
+
+    @staticmethod
+    def _best(repeat, fn):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
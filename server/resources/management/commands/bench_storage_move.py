@@ -0,0 +1,82 @@
+# server/resources/management/commands/bench_storage_move.py
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.core.management.base import BaseCommand
+
+from utils.storage_ops import move_object
+
+
+class StreamOnlyStorage(Storage):
+    """FileSystemStorage seen through the generic Storage API, to exercise the streaming fallback."""
+
+    def __init__(self, location):
+        self._inner = FileSystemStorage(location=location)
+
+    def _open(self, name, mode="rb"):
+        return self._inner._open(name, mode)
+
+    def _save(self, name, content):
+        return self._inner._save(name, content)
+
+    def delete(self, name):
+        self._inner.delete(name)
+
+    def exists(self, name):
+        return self._inner.exists(name)
+
+    def size(self, name):
+        return self._inner.size(name)
+
+
+def _legacy_move(storage, old_name, new_name):
+    """What ResourceAdmin._rename_storage_object used to do: read everything, save, delete."""
+    with storage.open(old_name, "rb") as fh:
+        data = fh.read()
+    saved = storage.save(new_name, ContentFile(data))
+    storage.delete(old_name)
+    return saved
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure peak Python memory (tracemalloc) of renaming a stored file as it grows: "
+        "os.replace, chunked streaming fallback, and the old read-everything copy. "
+        "Peaks for the first two should stay flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 16, 64])
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"{'size':>8} {'path':<14} {'peak KiB':>10} {'ms':>8}")
+        with tempfile.TemporaryDirectory() as root:
+            paths = {
+                "os.replace": lambda: (FileSystemStorage(location=root), move_object),
+                "stream": lambda: (StreamOnlyStorage(root), move_object),
+                "read-all (old)": lambda: (FileSystemStorage(location=root), _legacy_move),
+            }
+            for size_mb in opts["sizes_mb"]:
+                for label, make in paths.items():
+                    storage, move = make()
+                    self._write(os.path.join(root, "src.bin"), size_mb)
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    final = move(storage, "src.bin", "moved/dst.bin")
+                    elapsed = (time.perf_counter() - start) * 1000
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    os.remove(os.path.join(root, final))
+                    self.stdout.write(f"{size_mb:>6}MB {label:<14} {peak / 1024:>10.0f} {elapsed:>8.1f}")
+
+    @staticmethod
+    def _write(path, size_mb):
+        block = os.urandom(1024 * 1024)
+        with open(path, "wb") as fh:
+            for _ in range(size_mb):
+                fh.write(block)
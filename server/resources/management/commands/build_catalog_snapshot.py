@@ -0,0 +1,32 @@
+# server/resources/management/commands/build_catalog_snapshot.py
+
+from django.core.management.base import BaseCommand
+
+from resources.snapshot import CATALOG_SNAPSHOT_PATH, catalog_snapshot, build_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the prebuilt catalog snapshot served for unfiltered /api/resources/ requests. "
+        "Running workers pick up the new file without a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Public list URL the snapshot is served at, e.g. https://api.example.com/api/resources/ "
+                 "(defaults to the URL recorded in the current snapshot).",
+        )
+
+    def handle(self, *args, **opts):
+        url = opts["url"]
+        if not url:
+            current = catalog_snapshot.get()
+            url = current[0]["url"] if current else None
+        if not url:
+            self.stderr.write("❌ No snapshot yet; pass --url.")
+            return
+        meta = build_snapshot(url)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Snapshot v{meta['version']} ({meta['rows']} rows) written to {CATALOG_SNAPSHOT_PATH}"
+        ))
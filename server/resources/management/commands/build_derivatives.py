@@ -0,0 +1,41 @@
+# server/resources/management/commands/build_derivatives.py
+
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from resources.derivatives import build_derivatives
+from resources.models import DocumentDerivative, StoredBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Render thumbnails/preview pages for stored files that have none yet (or failed). "
+        "Uploads queue this automatically; use it after a restart, a backfill, or with --force "
+        "after changing the preview settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-render hashes that are already done.")
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        hashes = StoredBlob.objects.order_by("id").values_list("sha256", flat=True)
+        if not opts["force"]:
+            done = DocumentDerivative.objects.filter(
+                status__in=[DocumentDerivative.Status.READY, DocumentDerivative.Status.UNSUPPORTED]
+            ).values("sha256")
+            hashes = hashes.exclude(sha256__in=done)
+        if opts["limit"]:
+            hashes = hashes[: opts["limit"]]
+
+        statuses = Counter()
+        start = time.perf_counter()
+        for sha256 in list(hashes):
+            row = build_derivatives(sha256, force=opts["force"])
+            statuses[row.status] += 1
+            if row.status == DocumentDerivative.Status.FAILED:
+                self.stdout.write(self.style.WARNING(f"⚠️ {sha256[:12]}: {row.error}"))
+        summary = ", ".join(f"{count} {status.lower()}" for status, count in sorted(statuses.items())) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(f"🖼️ Derivatives: {summary} ({time.perf_counter() - start:.1f}s)"))
@@ -0,0 +1,27 @@
+# server/resources/management/commands/drain_storage_deletions.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from resources.outbox import STORAGE_DELETE_BATCH_SIZE, drain_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored objects queued in the StorageDeletion outbox. Run from cron, "
+        "or with --loop as a worker; in-process draining after commits covers the common case."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=STORAGE_DELETE_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep draining every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=30.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            deleted, failed = drain_deletions(batch_size=opts["batch_size"])
+            self.stdout.write(f"🗑️ {deleted} deleted, {failed} failed")
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
@@ -0,0 +1,44 @@
+# server/resources/management/commands/extract_texts.py
+
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from resources.models import DocumentText, StoredBlob
+from resources.texts import extract_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract searchable text from stored PDF/DOCX/PPTX files that have none yet (or failed). "
+        "Uploads queue this automatically; files whose content hash was already extracted are skipped "
+        "unless --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-extract hashes that are already done.")
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        hashes = StoredBlob.objects.order_by("id").values_list("sha256", flat=True)
+        if not opts["force"]:
+            done = DocumentText.objects.filter(
+                status__in=[DocumentText.Status.READY, DocumentText.Status.UNSUPPORTED]
+            ).values("sha256")
+            hashes = hashes.exclude(sha256__in=done)
+        if opts["limit"]:
+            hashes = hashes[: opts["limit"]]
+
+        statuses, chars = Counter(), 0
+        start = time.perf_counter()
+        for sha256 in list(hashes):
+            row = extract_document(sha256, force=opts["force"])
+            statuses[row.status] += 1
+            chars += row.chars
+            if row.status == DocumentText.Status.FAILED:
+                self.stdout.write(self.style.WARNING(f"⚠️ {sha256[:12]}: {row.error}"))
+        summary = ", ".join(f"{count} {status.lower()}" for status, count in sorted(statuses.items())) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(
+            f"📝 Texts: {summary}; {chars} chars ({time.perf_counter() - start:.1f}s)"
+        ))
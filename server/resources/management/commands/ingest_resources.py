@@ -0,0 +1,44 @@
+# server/resources/management/commands/ingest_resources.py
+
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resources.ingest import INGEST_BATCH_SIZE, INGEST_WORKERS, Manifest, ingest, open_source
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import a term pack: a folder tree or .zip laid out like FORM3/EXAMS/T1/*.pdf. "
+        "Category, level and term come from the folder names; the title from the file name. "
+        "Rerunning with the same manifest resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip file.")
+        parser.add_argument("--manifest", help="Resume manifest (default: <source>.ingest.jsonl).")
+        parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Concurrent uploads.")
+        parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Rows per bulk_create.")
+        parser.add_argument("--price", type=Decimal, default=Decimal("0.00"), help="Ksh; 0 makes the resources free.")
+
+    def handle(self, *args, **opts):
+        source_path = Path(opts["source"])
+        if not source_path.exists():
+            raise CommandError(f"{source_path} does not exist")
+        manifest = Manifest(opts["manifest"] or f"{source_path.as_posix().rstrip('/')}.ingest.jsonl")
+
+        self.stdout.write(f"📚 Ingesting {source_path} with {opts['workers']} upload workers (manifest {manifest.path})")
+        stats = ingest(
+            open_source(source_path), manifest,
+            workers=opts["workers"], batch_size=opts["batch_size"], price=opts["price"],
+            on_progress=lambda s: self.stdout.write(f"  … {s.created} registered, {s.uploaded} uploaded"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats.created} resources created | {stats.uploaded} files, "
+            f"{stats.uploaded_bytes / 1024 / 1024:.1f} MB in {stats.seconds:.1f}s "
+            f"({stats.files_per_second:.1f} files/s, {stats.mb_per_second:.1f} MB/s) | "
+            f"{stats.skipped} skipped, {stats.failed} failed"
+        ))
+        if stats.failed:
+            self.stdout.write(self.style.WARNING("⚠️ Some uploads failed; rerun the same command to retry them."))
@@ -0,0 +1,13 @@
+# server/resources/management/commands/rebuild_facets.py
+
+from django.core.management.base import BaseCommand
+
+from resources.facets import read_facets, rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized facet counts (ResourceFacetCount) from the Resource table."
+
+    def handle(self, *args, **opts):
+        rows = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {rows} facet rows ({read_facets()['total']} resources)."))
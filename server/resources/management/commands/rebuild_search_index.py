@@ -0,0 +1,20 @@
+# server/resources/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resources.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the resource full-text search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Resources indexed per batch.")
+
+    def handle(self, *args, **opts):
+        backend = get_search_backend()
+        self.stdout.write(f"Rebuilding search index with the '{backend.name}' backend…")
+        with transaction.atomic():
+            total = backend.rebuild(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {total} resources."))
@@ -0,0 +1,129 @@
+# server/resources/management/commands/reconcile_storage.py
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import models, transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from resources import mirror
+from resources.models import DocumentDerivative, StorageDeletion, StoredBlob, StoredObject
+from resources.outbox import enqueue_deletions
+
+
+def _file_fields():
+    """(model, field name) for every FileField/ImageField in the project."""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def _derivative_names():
+    for thumbnail, pages in DocumentDerivative.objects.values_list("thumbnail", "preview_pages").iterator():
+        if thumbnail:
+            yield thumbnail
+        yield from pages or ()
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the StoredObject mirror with a full parallel listing of the storage, then report "
+        "orphans (stored objects nothing references) and dangling rows (references to missing objects). "
+        "--fix queues orphans for deletion, clears dangling file fields and drops derivatives to rebuild. "
+        "Use -v 2 to list them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-sync", action="store_true", help="Use the mirror as it is, without listing.")
+        parser.add_argument("--sync-only", action="store_true", help="Refresh the mirror and stop.")
+        parser.add_argument("--fix", action="store_true")
+        parser.add_argument(
+            "--min-age-hours", type=float, default=24.0,
+            help="Ignore objects newer than this (direct uploads not registered yet).",
+        )
+        parser.add_argument("--workers", type=int, default=mirror.STORAGE_MIRROR_LIST_WORKERS)
+        parser.add_argument("--page-size", type=int, default=mirror.STORAGE_MIRROR_PAGE_SIZE)
+
+    def handle(self, *args, **opts):
+        if not opts["no_sync"]:
+            stats = mirror.sync(workers=opts["workers"], page_size=opts["page_size"])
+            self.stdout.write(
+                f"📋 Listed {stats.listed} object(s) in {stats.pages} page(s), {stats.seconds:.1f}s "
+                f"({stats.objects_per_second:.0f} objects/s); {stats.removed} stale row(s) removed"
+            )
+            if opts["sync_only"]:
+                return
+        elif not mirror.is_complete():
+            self.stderr.write(self.style.ERROR("❌ The mirror was never filled; run without --no-sync first."))
+            return
+
+        orphans = self._orphans(timezone.now() - timedelta(hours=opts["min_age_hours"]))
+        dangling = self._dangling()
+        missing_derivatives = self._missing_derivatives()
+
+        if opts["verbosity"] >= 2:
+            for name in orphans:
+                self.stdout.write(f"  orphan: {name}")
+            for model, field, pk, name in dangling:
+                self.stdout.write(f"  dangling: {model._meta.label} id={pk} {field}={name}")
+            for sha256 in missing_derivatives:
+                self.stdout.write(f"  dangling: DocumentDerivative {sha256[:12]}")
+        missing_blobs = StoredBlob.objects.exclude(name__in=StoredObject.objects.values("name")).count()
+        self.stdout.write(
+            f"🧮 {len(orphans)} orphan(s), {len(dangling)} dangling file field(s), "
+            f"{len(missing_derivatives)} dangling derivative(s), {missing_blobs} blob(s) without an object"
+        )
+
+        if opts["fix"]:
+            self._fix(orphans, dangling, missing_derivatives)
+
+    def _orphans(self, cutoff):
+        referenced = set(StorageDeletion.objects.values_list("name", flat=True))  # already on their way out
+        referenced.update(StoredBlob.objects.values_list("name", flat=True))
+        referenced.update(_derivative_names())
+        for model, field in _file_fields():
+            referenced.update(model._default_manager.exclude(**{field: ""}).values_list(field, flat=True).iterator())
+        return [
+            name
+            for name in StoredObject.objects.filter(updated__lt=cutoff).order_by("name").values_list("name", flat=True).iterator()
+            if name not in referenced
+        ]
+
+    def _dangling(self):
+        present = StoredObject.objects.values("name")
+        rows = []
+        for model, field in _file_fields():
+            qs = model._default_manager.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            for pk, name in qs.exclude(**{f"{field}__in": present}).values_list("pk", field):
+                rows.append((model, field, pk, name))
+        return rows
+
+    def _missing_derivatives(self):
+        present = set()
+        ready = list(
+            DocumentDerivative.objects.filter(status=DocumentDerivative.Status.READY)
+            .values_list("sha256", "thumbnail", "preview_pages")
+        )
+        names = sorted({n for _, thumbnail, pages in ready for n in [thumbnail, *(pages or ())] if n})
+        for i in range(0, len(names), 500):
+            present.update(StoredObject.objects.filter(name__in=names[i:i + 500]).values_list("name", flat=True))
+        return [sha for sha, thumbnail, pages in ready if any(n not in present for n in [thumbnail, *(pages or ())] if n)]
+
+    def _fix(self, orphans, dangling, missing_derivatives):
+        with transaction.atomic():
+            enqueue_deletions(orphans)  # the drainer skips anything referenced again meanwhile
+        cleared = 0
+        for model, field, pk, _ in dangling:
+            obj = model._default_manager.filter(pk=pk).first()
+            if obj is None:
+                continue
+            setattr(obj, field, None)
+            obj.save(update_fields=[field])  # signals release shared blobs and reindex
+            cleared += 1
+        dropped, _ = DocumentDerivative.objects.filter(sha256__in=missing_derivatives).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 Queued {len(orphans)} orphan(s) for deletion, cleared {cleared} file field(s), "
+            f"dropped {dropped} derivative row(s) (rebuild with `manage.py build_derivatives`)"
+        ))
@@ -0,0 +1,161 @@
+# server/resources/management/commands/startup_profile.py
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+STARTUP_BUDGET_MS = getattr(settings, "STARTUP_BUDGET_MS", None)  # fail when the first request takes longer
+# Dependencies that must stay lazy: importing them before the first request is a regression.
+# (`requests` is not listed: rest_framework.compat imports it whenever it is installed.)
+STARTUP_FORBIDDEN_IMPORTS = getattr(
+    settings, "STARTUP_FORBIDDEN_IMPORTS",
+    ["google.auth", "google.cloud", "google.oauth2", "storages.backends.gcloud", "pypdfium2", "httpx"],
+)
+# ------------------------------
+
+# Runs in a fresh interpreter the way gunicorn boots a worker: import the WSGI
+# module, then serve one request through it. The timings go back as JSON in the
+# file at RESULT_PATH, so nothing the app writes to stdout can be mistaken for them.
+_CHILD = r"""
+import io, json, sys, time
+t_start = time.time()
+import elimu_backend.wsgi
+t_app = time.time()
+status = []
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": PATH, "QUERY_STRING": "", "SERVER_NAME": "localhost",
+    "SERVER_PORT": "80", "HTTP_HOST": "localhost", "SERVER_PROTOCOL": "HTTP/1.1", "wsgi.version": (1, 0),
+    "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+    "wsgi.multithread": True, "wsgi.multiprocess": True, "wsgi.run_once": False,
+}
+body = elimu_backend.wsgi.application(environ, lambda s, h, exc_info=None: status.append(s))
+b"".join(body)
+getattr(body, "close", lambda: None)()
+t_done = time.time()
+with open(RESULT_PATH, "w") as fh:
+    json.dump({
+        "start": t_start, "app": t_app, "done": t_done, "status": status[0] if status else "",
+        "modules": sorted(sys.modules),
+    }, fh)
+"""
+
+
+def _parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        name = name[1:]  # "| name", nested imports indented two spaces per level
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(head.rsplit(":", 1)[1]), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the app in fresh interpreters (as a WSGI worker would), serve one request and report "
+        "time to the first response plus import time per module. --budget-ms and the forbidden-import "
+        "list fail the command, so CI can hold the cold-start line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/health/", help="URL of the first request.")
+        parser.add_argument("--runs", type=int, default=5, help="Timed boots; the median is reported.")
+        parser.add_argument("--top", type=int, default=15, help="Slowest modules/packages to list.")
+        parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+        parser.add_argument(
+            "--forbid", action="append", default=None, metavar="MODULE",
+            help="Module (prefix) that must not be imported before the first response; repeatable. "
+                 "Defaults to STARTUP_FORBIDDEN_IMPORTS.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def _boot(self, path, importtime=False):
+        with tempfile.TemporaryDirectory() as tmp:
+            result_path = os.path.join(tmp, "result.json")
+            code = f"PATH = {path!r}\nRESULT_PATH = {result_path!r}\n{_CHILD}"
+            cmd = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+            env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "elimu_backend.settings")}
+            spawned = time.time()
+            proc = subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=300)
+            if proc.returncode or not os.path.exists(result_path):
+                raise CommandError(f"Boot failed (exit {proc.returncode}):\n{proc.stderr[-3000:]}")
+            with open(result_path) as fh:
+                result = json.load(fh)
+        result["spawned"] = spawned
+        return result, proc.stderr
+
+    def handle(self, *args, **opts):
+        runs = []
+        for _ in range(max(1, opts["runs"])):
+            result, _ = self._boot(opts["path"])
+            runs.append(result)
+        profiled, stderr = self._boot(opts["path"], importtime=True)
+
+        def median_ms(start, end):
+            return statistics.median((r[end] - r[start]) * 1000 for r in runs)
+
+        imports = _parse_importtime(stderr)
+        packages = defaultdict(int)
+        for name, self_us, _, _ in imports:  # self time, so nested imports are not counted twice
+            packages[name.split(".")[0]] += self_us
+        slowest = sorted(imports, key=lambda row: row[1], reverse=True)[: opts["top"]]
+        forbidden = opts["forbid"] if opts["forbid"] is not None else list(STARTUP_FORBIDDEN_IMPORTS)
+        loaded = [
+            prefix for prefix in forbidden
+            if any(m == prefix or m.startswith(prefix + ".") for m in profiled["modules"])
+        ]
+
+        report = {
+            "path": opts["path"],
+            "status": runs[-1]["status"],
+            "runs": len(runs),
+            "interpreter_ms": round(median_ms("spawned", "start"), 1),
+            "wsgi_app_ms": round(median_ms("start", "app"), 1),
+            "first_request_ms": round(median_ms("app", "done"), 1),
+            "time_to_first_response_ms": round(median_ms("spawned", "done"), 1),
+            "import_total_ms": round(sum(packages.values()) / 1000, 1),
+            "packages_ms": {k: round(v / 1000, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])[: opts["top"]]},
+            "slowest_modules_ms": {name: round(self_us / 1000, 1) for name, self_us, _, _ in slowest},
+            "forbidden_loaded": loaded,
+            "budget_ms": opts["budget_ms"],
+        }
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"🚀 {report['path']} → {report['status']} | median of {report['runs']} cold boot(s):\n"
+                f"   interpreter {report['interpreter_ms']} ms, WSGI app {report['wsgi_app_ms']} ms, "
+                f"first request {report['first_request_ms']} ms\n"
+                f"   ⏱️ time to first response: {report['time_to_first_response_ms']} ms "
+                f"(imports ≈ {report['import_total_ms']} ms, measured with -X importtime)"
+            )
+            self.stdout.write("📦 Import time by top-level package (self time of its modules):")
+            for name, ms in report["packages_ms"].items():
+                self.stdout.write(f"   {ms:8.1f} ms  {name}")
+            self.stdout.write("🐢 Slowest modules (self time):")
+            for name, ms in report["slowest_modules_ms"].items():
+                self.stdout.write(f"   {ms:8.1f} ms  {name}")
+
+        problems = []
+        if loaded:
+            problems.append(f"imported before the first response: {', '.join(loaded)}")
+        if opts["budget_ms"] and report["time_to_first_response_ms"] > opts["budget_ms"]:
+            problems.append(f"time to first response {report['time_to_first_response_ms']} ms > budget {opts['budget_ms']} ms")
+        if problems:
+            raise CommandError("❌ Startup regression: " + "; ".join(problems))
+        if not opts["json"]:
+            self.stdout.write(self.style.SUCCESS("✅ Within the startup budget"))
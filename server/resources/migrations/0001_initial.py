@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:48
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(db_index=True, max_length=255)),
+                ('file', models.FileField(upload_to='resources/')),
+                ('category', models.CharField(choices=[('NOTES', 'Notes'), ('EXAMS', 'Exams'), ('EBOOKS', 'E-Books'), ('SCHEMES', 'Schemes of Work'), ('LESSON_PLANS', 'Lesson Plans')], max_length=20)),
+                ('level', models.CharField(blank=True, choices=[('GRADE9', 'Grade 9'), ('FORM2', 'Form 2'), ('FORM3', 'Form 3'), ('FORM4', 'Form 4')], max_length=20, null=True)),
+                ('term', models.CharField(blank=True, choices=[('T1', 'Term 1'), ('T2', 'Term 2'), ('T3', 'Term 3')], help_text='Required for Exams, Schemes of Work, and Lesson Plans', max_length=5, null=True)),
+                ('is_free', models.BooleanField(default=True)),
+                ('price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Ksh. Use 0 for free items.', max_digits=8, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:48
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import resources.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceSearchEntry',
+            fields=[
+                ('resource', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='resources.resource')),
+                ('document', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('fts', resources.search.FTS5MatchColumn(db_column='resources_search')),
+                ('rank', models.FloatField(null=True)),
+            ],
+            options={
+                'db_table': 'resources_search',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0004_catalogversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(blank=True, max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resourcefacetcount',
+            constraint=models.UniqueConstraint(fields=('facet', 'value'), name='resources_facet_value_unique'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0007_storedblob_resource_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed'), ('UNSUPPORTED', 'Unsupported')], default='PENDING', max_length=12)),
+                ('thumbnail', models.CharField(blank=True, max_length=1024)),
+                ('preview_pages', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0009_documenttext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('objects_listed', models.PositiveBigIntegerField(default=0)),
+                ('seconds', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StoredObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=1024, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('md5', models.CharField(blank=True, max_length=32)),
+                ('content_type', models.CharField(blank=True, max_length=255)),
+                ('updated', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
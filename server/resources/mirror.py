@@ -0,0 +1,311 @@
+# server/resources/mirror.py
+
+import logging
+import mimetypes
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from .models import StorageListing, StoredObject
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+STORAGE_MIRROR_ENABLED = getattr(settings, "STORAGE_MIRROR_ENABLED", True)        # serve exists() from StoredObject
+STORAGE_MIRROR_LIST_WORKERS = getattr(settings, "STORAGE_MIRROR_LIST_WORKERS", 8)  # prefixes listed in parallel
+STORAGE_MIRROR_PAGE_SIZE = getattr(settings, "STORAGE_MIRROR_PAGE_SIZE", 1000)     # objects per listing page
+STORAGE_MIRROR_BATCH_SIZE = getattr(settings, "STORAGE_MIRROR_BATCH_SIZE", 1000)   # rows per upsert
+# ------------------------------
+
+_UPSERT_FIELDS = ["size", "md5", "content_type", "updated", "synced_at"]
+_GCS_LIST_FIELDS = "items(name,size,md5Hash,contentType,updated),prefixes,nextPageToken"
+
+_listing_complete = False  # per process; a finished listing stays finished
+
+
+def _upsert(rows):
+    StoredObject.objects.bulk_create(rows, update_conflicts=True, unique_fields=["name"], update_fields=_UPSERT_FIELDS)
+
+
+def is_complete() -> bool:
+    """True once a full listing has filled the mirror, so a missing row means a missing object."""
+    global _listing_complete
+    if not _listing_complete:
+        _listing_complete = StorageListing.objects.filter(
+            pk=StorageListing.SINGLETON_ID, completed_at__isnull=False
+        ).exists()
+    return _listing_complete
+
+
+def exists(name):
+    """True/False from the mirror, or None when it cannot answer (disabled or never filled)."""
+    if not STORAGE_MIRROR_ENABLED or not name:
+        return None
+    if StoredObject.objects.filter(name=name).exists():
+        return True
+    return False if is_complete() else None
+
+
+def record(name, size, content_type="", md5="", updated=None):
+    """Upsert one object after it was written; never fails the write itself."""
+    if not STORAGE_MIRROR_ENABLED:
+        return
+    now = timezone.now()
+    try:
+        _upsert([StoredObject(
+            name=name, size=size or 0, md5=md5 or "", content_type=content_type or "",
+            updated=updated or now, synced_at=now,
+        )])
+    except Exception as e:
+        logger.warning("⚠️ Storage mirror not updated for %s: %s", name, e)
+
+
+def record_blob(blob):
+    """Upsert from a google.cloud.storage Blob with its properties loaded."""
+    record(blob.name, blob.size, blob.content_type, blob.md5_hash, blob.updated)
+
+
+def forget(names):
+    if not STORAGE_MIRROR_ENABLED:
+        return
+    names = [name for name in names if name]
+    try:
+        StoredObject.objects.filter(name__in=names).delete()
+    except Exception as e:
+        logger.warning("⚠️ Storage mirror not updated for %d deleted object(s): %s", len(names), e)
+
+
+def moved(old_name, new_name):
+    """After utils.storage_ops.move_object, which bypasses save()/delete()."""
+    if STORAGE_MIRROR_ENABLED:
+        StoredObject.objects.filter(name=old_name).update(name=new_name, synced_at=timezone.now())
+
+
+class MirroredStorageMixin:
+    """
+    Keeps StoredObject current on save()/delete() and answers exists() from it,
+    so name-collision and rebuild checks cost a local query instead of a round trip.
+    """
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        size = getattr(content, "size", None)
+        content_type = getattr(content, "content_type", None) or mimetypes.guess_type(name)[0]
+        record(name, size, content_type)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        forget([name])
+
+    def exists(self, name):
+        known = exists(name)
+        return super().exists(name) if known is None else known
+
+
+class MirroredFileSystemStorage(MirroredStorageMixin, FileSystemStorage):
+    pass
+
+
+def __getattr__(name):
+    # MirroredGoogleCloudStorage is built on first lookup (import_string of
+    # DEFAULT_FILE_STORAGE): django-storages' GCS backend imports google.cloud and
+    # requests, which local-storage deployments never need.
+    if name == "MirroredGoogleCloudStorage":
+        from utils.gcs_storage import SharedClientGoogleCloudStorage
+
+        cls = type(name, (MirroredStorageMixin, SharedClientGoogleCloudStorage), {"__module__": __name__})
+        globals()[name] = cls
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ---------- Full listing ----------
+
+@dataclass
+class SyncStats:
+    listed: int = 0
+    pages: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.listed / self.seconds if self.seconds else 0.0
+
+
+def _gcs_producers(storage, page_size):
+    """
+    One listing of the top level (objects there plus the "folder" prefixes), then
+    one producer per prefix so the prefixes are paged through concurrently.
+    """
+    client, bucket = storage.client, storage.bucket
+    location = f"{storage.location.strip('/')}/" if storage.location else ""
+
+    def rows(blobs):
+        return [
+            StoredObject(
+                name=blob.name[len(location):], size=blob.size or 0, md5=blob.md5_hash or "",
+                content_type=blob.content_type or "", updated=blob.updated,
+            )
+            for blob in blobs
+        ]
+
+    def listing(prefix, delimiter=None):
+        iterator = client.list_blobs(
+            bucket, prefix=prefix, delimiter=delimiter, page_size=page_size, fields=_GCS_LIST_FIELDS,
+        )
+        for page in iterator.pages:
+            yield rows(page)
+        if delimiter:
+            prefixes.extend(sorted(iterator.prefixes))
+
+    prefixes = []
+    yield lambda: listing(location, "/")  # fills `prefixes` before the loop below resumes
+    for prefix in prefixes:
+        yield lambda prefix=prefix: listing(prefix)
+
+
+def _local_producers(storage, page_size):
+    """One producer for the top-level files, one per top-level directory (os.scandir/os.walk)."""
+    root = os.path.abspath(storage.location)
+
+    def row(path, stat):
+        name = os.path.relpath(path, root).replace(os.sep, "/")
+        return StoredObject(
+            name=name, size=stat.st_size, content_type=mimetypes.guess_type(name)[0] or "",
+            updated=datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc),
+        )
+
+    def paged(entries):
+        page = []
+        for path in entries:
+            try:
+                page.append(row(path, os.stat(path)))
+            except FileNotFoundError:  # deleted while listing
+                continue
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def walk(top):
+        for directory, _, files in os.walk(top):
+            yield from (os.path.join(directory, f) for f in files)
+
+    if not os.path.isdir(root):
+        return
+    with os.scandir(root) as it:
+        entries = list(it)
+    yield lambda: paged(e.path for e in entries if e.is_file())
+    for entry in entries:
+        if entry.is_dir():
+            yield lambda top=entry.path: paged(walk(top))
+
+
+def _pages(producers, workers):
+    """
+    Run the producers on a thread pool and yield their pages here, so every DB
+    write stays on the calling thread. The queue bounds pages held in memory.
+    The first producer may discover the others (GCS prefixes), so it finishes first.
+    """
+    pages = queue.Queue(maxsize=workers * 2)
+    done, stop = object(), threading.Event()
+    errors, pending = [], 0
+
+    def run(produce):
+        try:
+            for page in produce():
+                if stop.is_set():
+                    break
+                pages.put(page)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            pages.put(done)
+
+    def drain():
+        nonlocal pending
+        while pending:
+            item = pages.get()
+            if item is done:
+                pending -= 1
+            elif not stop.is_set():
+                yield item
+
+    producers = iter(producers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-list") as pool:
+        try:
+            first = next(producers, None)
+            if first is not None:
+                pool.submit(run, first)
+                pending += 1
+                yield from drain()
+            for produce in producers:
+                if stop.is_set():
+                    break
+                pool.submit(run, produce)
+                pending += 1
+            yield from drain()
+        finally:
+            stop.set()  # consumer gave up or a producer failed: unblock and wait for the rest
+            for _ in drain():
+                pass
+    if errors:
+        raise errors[0]
+
+
+def sync(storage=None, workers=STORAGE_MIRROR_LIST_WORKERS, page_size=STORAGE_MIRROR_PAGE_SIZE,
+         batch_size=STORAGE_MIRROR_BATCH_SIZE) -> SyncStats:
+    """
+    📋 Refill StoredObject from a full paginated listing of the storage.
+    Rows not seen (and not written by an upload since the listing started) are removed.
+    """
+    global _listing_complete
+    from django.core.files.storage import default_storage
+    storage = storage or default_storage
+    if hasattr(storage, "bucket") and hasattr(storage, "_normalize_name"):
+        producers, kind = _gcs_producers(storage, page_size), "gcs"
+    elif isinstance(storage, FileSystemStorage):
+        producers, kind = _local_producers(storage, page_size), "local"
+    else:
+        raise NotImplementedError(f"No listing for {type(storage).__name__}")
+
+    stats, started = SyncStats(), timezone.now()
+    t0 = time.perf_counter()
+    batch = []
+    for page in _pages(producers, max(1, workers)):
+        stats.pages += 1
+        stats.listed += len(page)
+        for row in page:
+            row.synced_at = started
+        batch.extend(page)
+        if len(batch) >= batch_size:
+            _upsert(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+
+    stats.removed, _ = StoredObject.objects.filter(synced_at__lt=started).delete()
+    stats.seconds = time.perf_counter() - t0
+    StorageListing.objects.update_or_create(
+        pk=StorageListing.SINGLETON_ID,
+        defaults={"completed_at": timezone.now(), "objects_listed": stats.listed, "seconds": stats.seconds},
+    )
+    _listing_complete = True
+    logger.info(
+        "📋 Storage mirror synced (%s): %d object(s) in %d page(s), %d stale row(s) removed, %.1fs",
+        kind, stats.listed, stats.pages, stats.removed, stats.seconds,
+    )
+    return stats
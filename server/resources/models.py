@@ -0,0 +1,402 @@
+# server/resources/models.py
+import logging
+import zlib
+from decimal import Decimal
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from django.conf import settings
+from django.core.validators import MinValueValidator
+
+from utils.gcs_client import gcs_clients
+from utils.gcs_signer import get_signer
+from utils.signed_url_cache import signed_url_cache
+from .search import SEARCH_TABLE, FTS5MatchColumn, search_vector_field
+
+logger = logging.getLogger(__name__)
+
+
+def _sign_blobs(blob_names, method, expires_at):
+    """Sign GCS object URLs (V4) valid until `expires_at`; returns {blob_name: url}."""
+    signer = get_signer()
+    if signer:
+        # Local signing from the service-account key: no client, no network.
+        return signer.sign_many(blob_names, method=method, expiration=expires_at)
+
+    # Shared, lazily created client (creds from settings if present; else default ADC).
+    bucket = gcs_clients.bucket(settings.GS_BUCKET_NAME)
+    signed = {
+        name: bucket.blob(name).generate_signed_url(version="v4", expiration=expires_at, method=method)
+        for name in blob_names
+    }
+    logger.info("🔐 Signed %d URL(s) via storage client", len(signed))
+    return signed
+
+
+class Category(models.TextChoices):
+    NOTES = "NOTES", "Notes"
+    EXAMS = "EXAMS", "Exams"
+    EBOOKS = "EBOOKS", "E-Books"
+    SCHEMES = "SCHEMES", "Schemes of Work"
+    LESSON_PLANS = "LESSON_PLANS", "Lesson Plans"
+
+class Level(models.TextChoices):
+    GRADE9 = "GRADE9", "Grade 9"
+    FORM2 = "FORM2", "Form 2"
+    FORM3 = "FORM3", "Form 3"
+    FORM4 = "FORM4", "Form 4"
+
+class Term(models.TextChoices):
+    T1 = "T1", "Term 1"
+    T2 = "T2", "Term 2"
+    T3 = "T3", "Term 3"
+
+class Resource(models.Model):
+    title = models.CharField(max_length=255, db_index=True)
+    file = models.FileField(upload_to="resources/")
+
+    category = models.CharField(max_length=20, choices=Category.choices)
+    level = models.CharField(
+        max_length=20, choices=Level.choices, blank=True, null=True
+    )
+    term = models.CharField(
+        max_length=5, choices=Term.choices, blank=True, null=True,
+        help_text="Required for Exams, Schemes of Work, and Lesson Plans",
+    )
+
+    is_free = models.BooleanField(default=True)
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, default=Decimal("0.00"),
+        validators=[MinValueValidator(Decimal("0.00"))],
+        help_text="Ksh. Use 0 for free items."
+    )
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="resources_uploaded",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # SHA-256 of the file contents; resources with equal hashes share one stored object (StoredBlob).
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember facet values as loaded so signals can apply count deltas on save.
+        if all(f in field_names for f in ("category", "level", "term", "is_free")):
+            from .facets import facet_values
+            instance._loaded_facets = facet_values(instance)
+        # ...and the blob reference, so a replaced file releases the old one.
+        if "content_hash" in field_names:
+            instance._loaded_hash = instance.content_hash
+        if "file" in field_names:
+            instance._loaded_file = instance.file.name or None
+        return instance
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["category", "level", "term"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        parts = [self.title, self.get_category_display()]
+        if self.level:
+            parts.append(self.get_level_display())
+        if self.term:
+            parts.append(self.get_term_display())
+        return " | ".join(parts)
+
+    # ---------- Validation ----------
+    def clean(self):
+        """Enforce term only for EXAMS/SCHEMES/LESSON_PLANS."""
+        categories_requiring_term = {
+            Category.EXAMS, Category.SCHEMES, Category.LESSON_PLANS
+        }
+        if self.category in categories_requiring_term and not self.term:
+            from django.core.exceptions import ValidationError
+            raise ValidationError({"term": "Term is required for this category."})
+
+    # ---------- URLs ----------
+    def get_file_url(self):
+        """Return public URL (for public-read objects) or storage URL."""
+        url = self.file.url if self.file else None
+        logger.debug("📂 get_file_url() %s → %s", self.pk, url)
+        return url
+
+    def get_signed_url(self, expiration_minutes=60):
+        """Generate a signed URL for temporary access (GCS)."""
+        url, _ = self.get_signed_url_with_expiry(expiration_minutes)
+        return url
+
+    def get_signed_url_with_expiry(self, expiration_minutes=60):
+        """
+        Return (signed_url, expires_at) for this file.
+        URLs are reused from the process-wide signed URL cache until they get close to expiry.
+        """
+        if not self.file:
+            logger.warning("⚠️ get_signed_url(): no file for resource id=%s", self.pk)
+            return None, None
+
+        bucket_name = getattr(settings, "GS_BUCKET_NAME", None)
+        if not bucket_name:
+            logger.warning("⚠️ get_signed_url(): GS_BUCKET_NAME not configured")
+            return None, None
+
+        try:
+            url, expires_at = signed_url_cache.get_or_sign_many(
+                [self.file.name], _sign_blobs, expiration_minutes=expiration_minutes
+            )[self.file.name]
+            logger.debug("🔐 Signed URL ready for resource id=%s (expires %s)", self.pk, expires_at)
+            return url, expires_at
+
+        except Exception as e:
+            logger.exception("❌ get_signed_url() failed for id=%s: %s", self.pk, e)
+            return None, None
+
+    @classmethod
+    def prime_signed_urls(cls, resources, expiration_minutes=60):
+        """Sign every uncached file of a page in one batch so per-row lookups are cache hits."""
+        if not getattr(settings, "GS_BUCKET_NAME", None):
+            return
+        names = [r.file.name for r in resources if r.file]
+        if not names:
+            return
+        try:
+            signed_url_cache.get_or_sign_many(names, _sign_blobs, expiration_minutes=expiration_minutes)
+        except Exception as e:
+            logger.warning("⚠️ Batch signing failed for %d file(s): %s", len(names), e)
+
+    # ---------- Save ----------
+    def save(self, *args, **kwargs):
+        """
+        The file is hashed whenever it changes. A fresh upload is hashed here (digest from
+        the upload handlers when available). A stored name other than the one loaded from
+        the DB (FieldFile.save(), a registered direct upload) is saved unhashed and hashed
+        in the background (resources.blobs.hash_stored_file), so this never reads stored bytes.
+        If the same bytes are already stored, the row points at that object; reference
+        counts are kept by resources.signals.
+        """
+        if not self.file:
+            self.content_hash = None
+        elif not self.file._committed:
+            from utils.hashing import content_hash
+            self._point_at_stored(content_hash(self.file.file))
+        elif self.file.name != getattr(self, "_loaded_file", None):
+            self.content_hash = None
+            self._hash_pending = True  # queued by resources.signals once committed
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "file" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "content_hash"}
+        result = super().save(*args, **kwargs)
+        self._loaded_file = self.file.name if self.file else None
+        return result
+
+    def _point_at_stored(self, digest) -> bool:
+        """Record the digest; reuse the stored object with these bytes. True if the file was swapped."""
+        from .blobs import stored_name
+        self.content_hash = digest
+        existing = stored_name(digest)
+        if not existing or existing == self.file.name:
+            return False
+        logger.info("♻️ Duplicate upload %s reuses stored object %s", self.file.name, existing)
+        self.file = existing
+        return True
+
+    # ---------- Delete ----------
+    def delete(self, *args, **kwargs):
+        """
+        Delete the DB row. The stored file is queued in the same transaction
+        (see StorageDeletion) and removed by the background drainer.
+        """
+        logger.info("🗑️ Deleting Resource id=%s file=%s", self.pk, self.file.name if self.file else None)
+        return super().delete(*args, **kwargs)
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped on every Resource create/update/delete.
+    The resource list derives its ETag from it, so a conditional GET costs one PK lookup.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    SINGLETON_ID = 1
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
+
+    @classmethod
+    def current(cls) -> int:
+        version = cls.objects.filter(pk=cls.SINGLETON_ID).values_list("version", flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump(cls) -> None:
+        updated = cls.objects.filter(pk=cls.SINGLETON_ID).update(version=F("version") + 1, updated_at=timezone.now())
+        if not updated:
+            _, created = cls.objects.get_or_create(pk=cls.SINGLETON_ID, defaults={"version": 1})
+            if not created:  # lost the race to create it; count our bump anyway
+                cls.objects.filter(pk=cls.SINGLETON_ID).update(version=F("version") + 1, updated_at=timezone.now())
+        logger.debug("📚 Catalog version bumped")
+
+
+class ResourceFacetCount(models.Model):
+    """
+    Materialized resource counts per facet value (category/level/term/free).
+    Maintained incrementally by resources.signals; `manage.py rebuild_facets` recomputes it.
+    """
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["facet", "value"], name="resources_facet_value_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value or '∅'}: {self.count}"
+
+
+class ResourceSearchEntry(models.Model):
+    """
+    Read-only mapping of the full-text index table so searches can JOIN it.
+    The table itself is created and filled by resources.search (not by migrations);
+    Postgres uses `document`, SQLite FTS5 uses its hidden `fts`/`rank` columns.
+    """
+    resource = models.OneToOneField(
+        Resource,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    document = search_vector_field(null=True)  # Postgres only
+    fts = FTS5MatchColumn(db_column=SEARCH_TABLE)
+    rank = models.FloatField(null=True)
+
+    class Meta:
+        managed = False
+        db_table = SEARCH_TABLE
+
+
+class StorageDeletion(models.Model):
+    """
+    Outbox of stored objects to remove. Rows are written in the same transaction
+    as the delete that orphaned the object and drained by resources.outbox.
+    One row per object name, so repeated deletes of the same file collapse.
+    """
+    name = models.CharField(max_length=1024, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.name} (attempts={self.attempts})"
+
+
+class StoredBlob(models.Model):
+    """
+    Content-addressed stored object shared by every Resource with the same content_hash.
+    `ref_count` is maintained by resources.signals (see resources.blobs); the object is
+    queued for deletion when the last reference goes.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=1024, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} → {self.name} (refs={self.ref_count})"
+
+
+class DocumentDerivative(models.Model):
+    """
+    Rendered first-page thumbnail and low-resolution preview pages for one content hash,
+    shared by every Resource with those bytes (see resources.derivatives).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        READY = "READY", "Ready"
+        FAILED = "FAILED", "Failed"
+        UNSUPPORTED = "UNSUPPORTED", "Unsupported"
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDING)
+    thumbnail = models.CharField(max_length=1024, blank=True)
+    preview_pages = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status})"
+
+
+class DocumentText(models.Model):
+    """
+    Plain text extracted from a stored file, zlib-compressed and keyed by content hash
+    (see resources.texts). The search index uses it as the body of every Resource with those bytes.
+    """
+    Status = DocumentDerivative.Status
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDING)
+    body = models.BinaryField(blank=True, default=b"")
+    chars = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status}, {self.chars} chars)"
+
+    @staticmethod
+    def compress(text: str) -> bytes:
+        return zlib.compress(text.encode("utf-8"), 6)
+
+    @staticmethod
+    def decompress(body) -> str:
+        return zlib.decompress(bytes(body)).decode("utf-8") if body else ""
+
+
+class StoredObject(models.Model):
+    """
+    Local mirror of the storage listing (one row per object), so existence checks
+    and reconciliation read the database instead of the bucket. Filled by a full
+    listing (`manage.py reconcile_storage`) and kept current by resources.mirror.
+    `md5` is GCS's base64 md5Hash; local files leave it blank.
+    """
+    name = models.CharField(max_length=1024, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    md5 = models.CharField(max_length=32, blank=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    updated = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.size} bytes)"
+
+
+class StorageListing(models.Model):
+    """
+    Single row recording the last complete listing behind StoredObject.
+    Until one has finished the mirror is partial and existence checks ask storage.
+    """
+    completed_at = models.DateTimeField(null=True, blank=True)
+    objects_listed = models.PositiveBigIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+
+    SINGLETON_ID = 1
+
+    def __str__(self):
+        return f"Storage listing ({self.objects_listed} objects, {self.completed_at or 'never'})"
@@ -0,0 +1,119 @@
+# server/resources/outbox.py
+
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from utils.background import DebouncedTask
+from .models import DocumentDerivative, Resource, StorageDeletion, StoredBlob
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+STORAGE_DELETE_BATCH_SIZE = getattr(settings, "STORAGE_DELETE_BATCH_SIZE", 100)
+STORAGE_DELETE_MAX_ATTEMPTS = getattr(settings, "STORAGE_DELETE_MAX_ATTEMPTS", 8)
+STORAGE_DELETE_RETRY_SECONDS = getattr(settings, "STORAGE_DELETE_RETRY_SECONDS", 30)  # doubles per attempt
+STORAGE_DELETE_RETRY_MAX_SECONDS = getattr(settings, "STORAGE_DELETE_RETRY_MAX_SECONDS", 6 * 60 * 60)
+STORAGE_DELETE_IN_PROCESS = getattr(settings, "STORAGE_DELETE_IN_PROCESS", True)  # drain after commit
+# ------------------------------
+
+
+def enqueue_deletions(names):
+    """
+    Queue stored objects for removal in the caller's transaction.
+    Names already queued are left as they are (one row per object).
+    """
+    names = sorted({name for name in names if name})
+    if not names:
+        return
+    StorageDeletion.objects.bulk_create([StorageDeletion(name=name) for name in names], ignore_conflicts=True)
+    logger.debug("🗑️ Queued %d stored object(s) for deletion", len(names))
+    if STORAGE_DELETE_IN_PROCESS:
+        transaction.on_commit(deletion_drainer.schedule)
+
+
+_HASH_SEGMENT_RE = re.compile(r"/([0-9a-f]{64})/")  # derivatives/<sha[:2]>/<sha>/...
+
+
+def names_in_use(names) -> set:
+    """
+    The subset of `names` something still points at: a Resource's file, a live
+    StoredBlob, or a DocumentDerivative's thumbnail/preview pages.
+    """
+    names = set(names)
+    in_use = set(Resource.objects.filter(file__in=names).values_list("file", flat=True))
+    in_use.update(StoredBlob.objects.filter(name__in=names).values_list("name", flat=True))
+    hashes = {m.group(1) for m in map(_HASH_SEGMENT_RE.search, names) if m}
+    if hashes:
+        for thumbnail, pages in DocumentDerivative.objects.filter(sha256__in=hashes).values_list(
+            "thumbnail", "preview_pages"
+        ):
+            in_use.update(name for name in [thumbnail, *(pages or [])] if name in names)
+    return in_use
+
+
+def _backoff(attempts) -> timedelta:
+    return timedelta(seconds=min(STORAGE_DELETE_RETRY_SECONDS * 2 ** (attempts - 1), STORAGE_DELETE_RETRY_MAX_SECONDS))
+
+
+def drain_deletions(batch_size=STORAGE_DELETE_BATCH_SIZE, max_attempts=STORAGE_DELETE_MAX_ATTEMPTS, storage=None):
+    """
+    Delete due objects batch by batch; returns (deleted, failed).
+
+    Deleting an object that is already gone counts as success, so a batch that
+    is retried after a crash is harmless. Names still referenced (a Resource, a
+    StoredBlob or rendered derivatives, e.g. after a re-upload or a rebuild) are
+    dropped from the outbox without deleting.
+    Failures back off exponentially; after `max_attempts` a row stays for inspection.
+    """
+    storage = storage or default_storage
+    deleted = failed = 0
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            rows = list(
+                StorageDeletion.objects.select_for_update(skip_locked=True)
+                .filter(next_attempt_at__lte=now, attempts__lt=max_attempts)
+                .order_by("id")[:batch_size]
+            )
+            if not rows:
+                break
+            in_use = names_in_use(r.name for r in rows)
+
+            done, retry = [], []
+            for row in rows:
+                if row.name in in_use:
+                    logger.info("♻️ Skipping deletion of %s: referenced again", row.name)
+                    done.append(row.pk)
+                    continue
+                try:
+                    storage.delete(row.name)
+                    done.append(row.pk)
+                    deleted += 1
+                except Exception as e:
+                    row.attempts += 1
+                    row.last_error = str(e)[:2000]
+                    row.next_attempt_at = now + _backoff(row.attempts)
+                    retry.append(row)
+                    logger.warning("⚠️ Storage delete failed (%s, attempt %d): %s", row.name, row.attempts, e)
+
+            StorageDeletion.objects.filter(pk__in=done).delete()
+            if retry:
+                StorageDeletion.objects.bulk_update(retry, ["attempts", "last_error", "next_attempt_at"])
+                failed += len(retry)
+        if len(rows) < batch_size:
+            break
+
+    if deleted or failed:
+        logger.info("🗑️ Storage deletion drain: %d deleted, %d failed", deleted, failed)
+    return deleted, failed
+
+
+# Per-process drainer kicked after each commit that queued deletions.
+deletion_drainer = DebouncedTask(drain_deletions, delay=1.0, name="drain_deletions")
@@ -0,0 +1,45 @@
+# server/resources/pagination.py
+
+import logging
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+RESOURCE_PAGE_SIZE = getattr(settings, "RESOURCE_PAGE_SIZE", 50)
+RESOURCE_MAX_PAGE_SIZE = getattr(settings, "RESOURCE_MAX_PAGE_SIZE", 200)
+# ------------------------------
+
+
+class ResourceCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the public resource list.
+
+    Pages walk (-created_at, id) using the created_at index, so each page is a
+    bounded range scan with no OFFSET and no COUNT(*). Cursors are opaque and
+    stay valid while new uploads arrive (they sort before any existing cursor).
+    Ranked searches (?q=) page over (-search_rank, id) instead.
+      - ?page_size=N  (capped at RESOURCE_MAX_PAGE_SIZE)
+      - ?cursor=...   (taken from the previous response's "next")
+    """
+    page_size = RESOURCE_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = RESOURCE_MAX_PAGE_SIZE
+    ordering = ("-created_at", "id")
+    search_ordering = ("-search_rank", "id")
+
+    def get_ordering(self, request, queryset, view):
+        if getattr(view, "search_ranked", False):
+            return self.search_ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        logger.debug(
+            "📄 Resource page → size=%s | has_next=%s | has_previous=%s",
+            self.page_size, self.has_next, self.has_previous,
+        )
+        return page
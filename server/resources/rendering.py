@@ -0,0 +1,76 @@
+# server/resources/rendering.py
+#
+# Runs inside the document process pool: no Django imports here.
+
+import glob
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+class RenderUnavailable(Exception):
+    """No PDF rasterizer installed (pypdfium2 or poppler's pdftoppm)."""
+
+
+def _pages_pdfium(pdf_path, pages, width):
+    import pypdfium2 as pdfium
+
+    images = []
+    doc = pdfium.PdfDocument(pdf_path)
+    try:
+        for index in range(min(pages, len(doc))):
+            page = doc[index]
+            try:
+                bitmap = page.render(scale=width / max(page.get_width(), 1))
+                images.append(bitmap.to_pil().convert("RGB"))
+            finally:
+                page.close()
+    finally:
+        doc.close()
+    return images
+
+
+def _pages_pdftoppm(pdf_path, pages, width):
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            ["pdftoppm", "-png", "-f", "1", "-l", str(pages), "-scale-to-x", str(width), "-scale-to-y", "-1",
+             pdf_path, os.path.join(tmp, "page")],
+            check=True, capture_output=True, timeout=120,
+        )
+        images = []
+        for path in sorted(glob.glob(os.path.join(tmp, "page-*.png")))[:pages]:
+            with Image.open(path) as image:
+                images.append(image.convert("RGB"))
+        return images
+
+
+def _jpeg(image, quality) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_pdf(pdf_path, pages=3, preview_width=900, thumbnail_width=320, quality=70):
+    """
+    Rasterize the first `pages` pages of a PDF.
+    Returns (thumbnail_jpeg, [preview_page_jpeg, ...]); raises RenderUnavailable
+    when neither pypdfium2 nor pdftoppm is installed.
+    """
+    try:
+        import pypdfium2  # noqa: F401  (optional)
+    except ImportError:
+        if not shutil.which("pdftoppm"):
+            raise RenderUnavailable("install pypdfium2 or poppler-utils (pdftoppm) to render previews")
+        images = _pages_pdftoppm(pdf_path, pages, preview_width)
+    else:
+        images = _pages_pdfium(pdf_path, pages, preview_width)
+    if not images:
+        return None, []
+
+    thumbnail = images[0].copy()
+    thumbnail.thumbnail((thumbnail_width, thumbnail_width * 2))
+    return _jpeg(thumbnail, quality), [_jpeg(image, quality - 10) for image in images]
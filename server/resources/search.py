@@ -0,0 +1,265 @@
+# server/resources/search.py
+
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db import models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+# "auto" picks Postgres tsvector/GIN or SQLite FTS5 from the active database.
+RESOURCE_SEARCH_BACKEND = getattr(settings, "RESOURCE_SEARCH_BACKEND", "auto")
+RESOURCE_SEARCH_CONFIG = getattr(settings, "RESOURCE_SEARCH_CONFIG", "english")  # Postgres text search config
+RESOURCE_SEARCH_MAX_TERMS = getattr(settings, "RESOURCE_SEARCH_MAX_TERMS", 8)
+# ------------------------------
+
+SEARCH_TABLE = "resources_search"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_vector_field(**kwargs):
+    """
+    SearchVectorField on Postgres. On other databases a plain TextField stands in,
+    so django.contrib.postgres (and with it psycopg2) is never imported there.
+    """
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchVectorField
+
+        return SearchVectorField(**kwargs)
+    return models.TextField(**kwargs)
+
+
+class FTS5MatchColumn(models.TextField):
+    """The hidden FTS5 column named after its table; supports `__fts_match`."""
+
+
+@FTS5MatchColumn.register_lookup
+class FTS5Match(models.Lookup):
+    lookup_name = "fts_match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def search_terms(q: str) -> list[str]:
+    """Split a user query into plain word tokens (no operators reach the engine)."""
+    return _WORD_RE.findall((q or "").lower())[:RESOURCE_SEARCH_MAX_TERMS]
+
+
+def document_for(resource, body="") -> tuple[str, str]:
+    """(title, body) indexed for a resource; title is weighted above body."""
+    return resource.title or "", body or ""
+
+
+def documents_for(resources) -> list[tuple[int, str, str]]:
+    """(id, title, body) per resource; bodies are the extracted document texts, loaded in one query."""
+    from .models import DocumentText
+
+    hashes = {r.content_hash for r in resources if r.content_hash}
+    bodies = {}
+    if hashes:
+        bodies = {
+            sha256: DocumentText.decompress(body)
+            for sha256, body in DocumentText.objects.filter(
+                sha256__in=hashes, status=DocumentText.Status.READY
+            ).values_list("sha256", "body")
+        }
+    return [(r.pk, *document_for(r, bodies.get(r.content_hash))) for r in resources]
+
+
+class SearchBackend:
+    """
+    Keeps a full-text index of resources and answers ranked prefix queries.
+
+    search() returns the queryset filtered to matches and annotated with
+    `search_rank` (higher is better) when `ranked` is True.
+    """
+    name = "base"
+    ranked = True
+
+    def ensure_schema(self) -> bool:
+        """Create the index structures if missing; return True if they were created."""
+        return False
+
+    def index(self, resources):
+        raise NotImplementedError
+
+    def remove(self, ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, queryset, q):
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=2000) -> int:
+        """Re-index every resource from scratch; returns the number indexed."""
+        from .models import Resource
+
+        self.ensure_schema()
+        self.clear()
+        total, batch = 0, []
+        for resource in Resource.objects.only("id", "title", "content_hash").iterator(chunk_size=batch_size):
+            batch.append(resource)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+            total += len(batch)
+        logger.info("🔎 Search index rebuilt (%s): %d resources", self.name, total)
+        return total
+
+
+class IContainsSearchBackend(SearchBackend):
+    """Fallback for databases without full-text support: unranked title__icontains."""
+    name = "icontains"
+    ranked = False
+
+    def index(self, resources):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, batch_size=2000) -> int:
+        return 0
+
+    def search(self, queryset, q):
+        return queryset.filter(title__icontains=q).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector documents in a side table with a GIN index; ranked with ts_rank_cd."""
+    name = "postgres"
+
+    def ensure_schema(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [SEARCH_TABLE])
+            if cursor.fetchone()[0]:
+                return False
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                " rowid bigint PRIMARY KEY REFERENCES resources_resource(id) ON DELETE CASCADE,"
+                " document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_gin ON {SEARCH_TABLE} USING gin (document)"
+            )
+        logger.info("🔎 Created Postgres search table %s", SEARCH_TABLE)
+        return True
+
+    def index(self, resources):
+        cfg = RESOURCE_SEARCH_CONFIG
+        rows = [(pk, cfg, title, cfg, body) for pk, title, body in documents_for(resources)]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, document) VALUES "
+                "(%s, setweight(to_tsvector(%s::regconfig, %s), 'A') || setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+                "ON CONFLICT (rowid) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+    def remove(self, ids):
+        ids = list(ids)
+        if ids:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = ANY(%s)", [ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def search(self, queryset, q):
+        terms = search_terms(q)
+        if not terms:
+            return queryset.none()
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        # every word, each as a prefix
+        query = SearchQuery(" & ".join(f"{t}:*" for t in terms), search_type="raw", config=RESOURCE_SEARCH_CONFIG)
+        return queryset.filter(search_entry__document=query).annotate(
+            # float8 so cursor positions round-trip exactly
+            search_rank=Cast(SearchRank(F("search_entry__document"), query, cover_density=True), FloatField())
+        )
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """FTS5 virtual table keyed by resource id (rowid); ranked with bm25, title weighted 10x."""
+    name = "sqlite"
+
+    def ensure_schema(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [SEARCH_TABLE])
+            if cursor.fetchone():
+                return False
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                "title, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+        logger.info("🔎 Created SQLite FTS5 table %s", SEARCH_TABLE)
+        return True
+
+    def index(self, resources):
+        rows = documents_for(resources)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+    def remove(self, ids):
+        ids = [(pk,) for pk in ids]
+        if ids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", ids)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def search(self, queryset, q):
+        terms = search_terms(q)
+        if not terms:
+            return queryset.none()
+        match = " ".join(f'"{t}"*' for t in terms)  # implicit AND, each word as a prefix
+        # Joins the FTS5 table on rowid; its hidden rank column is bm25 (lower is better).
+        return queryset.filter(search_entry__fts__fts_match=match).annotate(search_rank=-F("search_entry__rank"))
+
+
+_BACKENDS = {
+    "postgres": PostgresSearchBackend,
+    "sqlite": SQLiteFTS5SearchBackend,
+    "icontains": IContainsSearchBackend,
+}
+_backend = None
+
+
+def get_search_backend() -> SearchBackend:
+    """Process-wide search backend chosen from RESOURCE_SEARCH_BACKEND / the DB vendor."""
+    global _backend
+    if _backend is None:
+        choice = RESOURCE_SEARCH_BACKEND
+        if choice == "auto":
+            choice = {"postgresql": "postgres", "sqlite": "sqlite"}.get(connection.vendor, "icontains")
+        backend_cls = _BACKENDS.get(choice) or import_string(choice)
+        _backend = backend_cls()
+        logger.debug("🔎 Search backend: %s", _backend.name)
+    return _backend
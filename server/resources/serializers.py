@@ -0,0 +1,204 @@
+# server/resources/serializers.py
+
+import logging
+from urllib.parse import quote
+from rest_framework import serializers
+
+from .derivatives import thumbnail_urls
+from .models import Resource
+
+logger = logging.getLogger(__name__)
+
+_datetime_field = serializers.DateTimeField()  # renders expires_at like created_at
+
+# Fields that are plain Resource columns; a request for only these can skip model instances.
+COLUMN_FIELDS = ("id", "title", "category", "level", "term", "is_free", "price", "created_at")
+# Fields that need a signed URL.
+SIGNED_FIELDS = ("signed_url", "preview_url", "expires_at")
+
+
+class ResourceListSerializer(serializers.ListSerializer):
+    """Signs every file and looks up every thumbnail of the page in one batch before the rows are rendered."""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, "all") else data)
+        if any(name in self.child.fields for name in SIGNED_FIELDS):
+            Resource.prime_signed_urls(rows)
+        if "thumbnail_url" in self.child.fields:
+            self.child._thumbnail_urls = thumbnail_urls(rows)
+        return super().to_representation(rows)
+
+
+class ResourceSerializer(serializers.ModelSerializer):
+    """
+    Serializer used by the frontend to display/download resources.
+
+    It exposes:
+      - file_url: absolute URL if the object is publicly readable (or local dev).
+      - signed_url: short-lived URL for private GCS buckets (uses model.get_signed_url()).
+      - preview_url: best link to open/preview the file (prefers signed_url, then file_url).
+      - expires_at: when signed_url stops working (null when no signed URL is issued).
+      - thumbnail_url: first-page image once resources.derivatives has rendered it (else null).
+
+    Pass `fields=[...]` to render only a subset (sparse fieldsets, see parse_fields).
+    """
+    file_url = serializers.SerializerMethodField()
+    signed_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    expires_at = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Resource
+        fields = [
+            "id",
+            "title",
+            # "file",          # ← uncomment ONLY if you want to expose the raw storage path
+            "file_url",
+            "signed_url",
+            "preview_url",
+            "expires_at",
+            "thumbnail_url",
+            "category",
+            "level",
+            "term",
+            "is_free",
+            "price",
+            "created_at",      # correct field name (replaces uploaded_at)
+        ]
+        read_only_fields = ("created_at",)
+        list_serializer_class = ResourceListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    # ---------- helpers ----------
+
+    def _absolute(self, url: str) -> str:
+        """Return an absolute URL using request context when available."""
+        try:
+            request = self.context.get("request")
+            return request.build_absolute_uri(url) if request else url
+        except Exception as e:
+            logger.debug("absolute URL fallback (%s): %s", url, e)
+            return url
+
+    # ---------- fields ----------
+
+    def get_file_url(self, obj) -> str | None:
+        """Public/absolute URL for the stored file if accessible without signing."""
+        if not obj.file:
+            return None
+        try:
+            return self._absolute(obj.file.url)
+        except Exception as e:
+            logger.warning("file_url error for %s: %s", getattr(obj, "title", obj.pk), e)
+            return None
+
+    def _signed(self, obj):
+        """
+        (signed_url, expires_at) for a row, computed once per serializer even though
+        signed_url, preview_url and expires_at all need it.
+        """
+        memo = self.__dict__.setdefault("_signed_memo", {})
+        key = obj.pk if obj.pk is not None else id(obj)
+        if key in memo:
+            return memo[key]
+
+        result = (None, None)
+        get_signed = getattr(obj, "get_signed_url_with_expiry", None)
+        if not obj.file:
+            pass
+        elif not callable(get_signed):
+            logger.debug("get_signed_url_with_expiry() not implemented on Resource model.")
+        else:
+            try:
+                result = get_signed()
+                if result[0]:
+                    logger.debug("signed_url generated for '%s'", getattr(obj, "title", obj.pk))
+            except Exception as e:
+                logger.debug("signed_url unavailable for %s: %s", getattr(obj, "title", obj.pk), e)
+                result = (None, None)
+
+        memo[key] = result
+        return result
+
+    def get_signed_url(self, obj) -> str | None:
+        """
+        Short-lived signed URL for private buckets.
+        Works for free and paid resources alike.
+        """
+        return self._signed(obj)[0]
+
+    def get_expires_at(self, obj) -> str | None:
+        """Expiry of signed_url so clients know how long they can reuse it."""
+        expires_at = self._signed(obj)[1]
+        return _datetime_field.to_representation(expires_at) if expires_at else None
+
+    def get_preview_url(self, obj) -> str | None:
+        """
+        Best preview link for the UI:
+          1) use signed_url if available (private bucket),
+          2) else use public file_url.
+        If you want to force Google Docs Viewer for PDFs, uncomment the block below.
+        """
+        url = self.get_signed_url(obj) or self.get_file_url(obj)
+        if not url:
+            return None
+
+        # ---- Optional Google Docs viewer wrapper for PDFs ----
+        # try:
+        #     if (obj.file and str(obj.file.name).lower().endswith(".pdf")):
+        #         return f"https://docs.google.com/viewer?embedded=true&url={quote(url, safe='')}"
+        # except Exception:
+        #     pass
+
+        return url
+
+
+    def get_thumbnail_url(self, obj) -> str | None:
+        """Small rendered first page, so cards never load the original document."""
+        urls = getattr(self, "_thumbnail_urls", None)
+        if urls is None:  # single object; lists are primed by ResourceListSerializer
+            urls = thumbnail_urls([obj])
+        url = urls.get(obj.content_hash) if obj.content_hash else None
+        return self._absolute(url) if url else None
+
+
+def parse_fields(raw):
+    """
+    `?fields=id,title,price` → ["id", "title", "price"] (None when not given).
+    Raises ValidationError for names ResourceSerializer does not expose.
+    """
+    if raw is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in ResourceSerializer.Meta.fields]
+    if unknown or not names:
+        raise serializers.ValidationError(
+            {"fields": f"Unknown field(s): {', '.join(unknown) or '(none given)'}. "
+                       f"Choose from: {', '.join(ResourceSerializer.Meta.fields)}."}
+        )
+    return names
+
+
+def values_representation(fields):
+    """
+    Row renderer for `.values(*fields)` dicts that matches ResourceSerializer(fields=fields)
+    output without building model instances; only price and created_at need converting.
+    """
+    serializer_fields = ResourceSerializer(fields=fields).fields
+    converters = [
+        (name, serializer_fields[name].to_representation if name in ("price", "created_at") else None)
+        for name in fields
+    ]
+
+    def render(row):
+        return {
+            name: (convert(row[name]) if convert and row[name] is not None else row[name])
+            for name, convert in converters
+        }
+    return render
@@ -0,0 +1,215 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from . import blobs
+from .derivatives import DERIVATIVES_ENABLED, derivative_queue
+from .facets import apply_change, apply_delta, facet_delta, facet_values
+from .models import CatalogVersion, Resource
+from .outbox import enqueue_deletions
+from .search import get_search_backend
+from .snapshot import CATALOG_SNAPSHOT_ENABLED, catalog_snapshot
+from .texts import TEXT_EXTRACTION_ENABLED, text_queue
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _DeleteBatch:
+    """Side effects of many Resource deletes, applied once by batched_deletes()."""
+
+    def __init__(self):
+        self.files, self.ids, self.facets, self.count = [], [], Counter(), 0
+        self.hashes = Counter()
+
+    def flush(self):
+        if not self.count:
+            return
+        enqueue_deletions(self.files)
+        for sha256, count in self.hashes.items():
+            blobs.release(sha256, count)
+        get_search_backend().remove(self.ids)
+        apply_delta(self.facets)
+        CatalogVersion.bump()
+        if CATALOG_SNAPSHOT_ENABLED:
+            transaction.on_commit(catalog_snapshot.schedule_rebuild)
+        logger.info("🗑️ Batched delete side effects for %d resource(s)", self.count)
+
+
+def _current_batch():
+    return getattr(_local, "batch", None)
+
+
+@contextmanager
+def batched_deletes():
+    """
+    Inside this block the post_delete receivers below only collect their work;
+    it is applied in a handful of statements when the block exits cleanly.
+    Use inside the deleting transaction (e.g. ResourceAdmin.delete_queryset).
+    """
+    batch = _local.batch = _DeleteBatch()
+    try:
+        yield batch
+    finally:
+        _local.batch = None
+    batch.flush()
+
+
+@receiver(post_delete, sender=Resource)
+def delete_file_on_resource_delete(sender, instance, **kwargs):
+    """
+    🗑️ Queues the associated stored file for deletion in the delete's own transaction.
+    resources.outbox removes it in the background (local media and GCS alike).
+    Hashed files are shared: only the last reference to the blob queues it.
+    """
+    batch = _current_batch()
+    if batch:
+        batch.count += 1
+        batch.ids.append(instance.pk)
+        batch.facets.update(facet_delta(getattr(instance, "_loaded_facets", None) or facet_values(instance), None))
+        if instance.content_hash:
+            batch.hashes[instance.content_hash] += 1
+        elif instance.file and instance.file.name:
+            batch.files.append(instance.file.name)
+        return
+    if instance.content_hash:
+        blobs.release(instance.content_hash)
+        logger.debug("🗑️ Signal: released blob %s for resource '%s'", instance.content_hash[:12], instance.title)
+    elif instance.file and instance.file.name:
+        enqueue_deletions([instance.file.name])
+        logger.debug("🗑️ Signal: queued file deletion for resource '%s' → %s", instance.title, instance.file.name)
+    else:
+        logger.warning("⚠️ Signal: No file to delete for resource '%s'", instance.title)
+
+
+@receiver(post_save, sender=Resource)
+def track_blob_reference(sender, instance, **kwargs):
+    """
+    ♻️ Moves the Resource's blob reference when its content hash changed
+    (new file, replaced file or file removed) and queues preview rendering
+    and text extraction.
+    """
+    old, new = getattr(instance, "_loaded_hash", None), instance.content_hash
+    if old == new:
+        return
+    if new and instance.file:
+        blobs.adopt(instance)
+        if DERIVATIVES_ENABLED:
+            transaction.on_commit(lambda: derivative_queue.submit(new))
+        if TEXT_EXTRACTION_ENABLED:
+            transaction.on_commit(lambda: text_queue.submit(new))
+    if old:
+        blobs.release(old)
+    instance._loaded_hash = new
+
+
+@receiver(post_save, sender=Resource)
+def queue_content_hash(sender, instance, **kwargs):
+    """
+    🔑 A stored file saved without its bytes passing through this process (direct
+    upload, FieldFile.save) is hashed and deduplicated in the background.
+    """
+    if getattr(instance, "_hash_pending", False):
+        instance._hash_pending = False
+        pk = instance.pk
+        transaction.on_commit(lambda: blobs.content_hash_queue.submit(pk))
+
+
+@receiver(post_save, sender=Resource)
+def index_resource_on_save(sender, instance, **kwargs):
+    """
+    🔎 Keeps the full-text search index in sync with the saved Resource.
+    """
+    try:
+        get_search_backend().index([instance])
+    except Exception as e:
+        logger.exception("❌ Signal: Failed to index resource id=%s: %s", instance.pk, e)
+
+
+@receiver(post_delete, sender=Resource)
+def unindex_resource_on_delete(sender, instance, **kwargs):
+    """
+    🔎 Drops a deleted Resource from the full-text search index.
+    """
+    if _current_batch():
+        return
+    try:
+        get_search_backend().remove([instance.pk])
+    except Exception as e:
+        logger.exception("❌ Signal: Failed to unindex resource id=%s: %s", instance.pk, e)
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def bump_catalog_version(sender, instance, **kwargs):
+    """
+    📚 Any Resource create/update/delete invalidates cached resource lists (ETag).
+    """
+    if _current_batch():
+        return
+    try:
+        CatalogVersion.bump()
+    except Exception as e:
+        logger.exception("❌ Signal: Failed to bump catalog version for id=%s: %s", instance.pk, e)
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def rebuild_catalog_snapshot(sender, instance, **kwargs):
+    """
+    📦 Rebuilds the prebuilt catalog snapshot in the background once the change is committed.
+    """
+    if CATALOG_SNAPSHOT_ENABLED and not _current_batch():
+        transaction.on_commit(catalog_snapshot.schedule_rebuild)
+
+
+@receiver(pre_save, sender=Resource)
+def snapshot_facets_before_save(sender, instance, **kwargs):
+    """
+    📊 Instances not loaded via the ORM (no from_db snapshot) need their stored facet values.
+    """
+    if instance.pk and not hasattr(instance, "_loaded_facets"):
+        row = Resource.objects.filter(pk=instance.pk).values("category", "level", "term", "is_free").first()
+        instance._loaded_facets = facet_values(row) if row else None
+
+
+@receiver(post_save, sender=Resource)
+def update_facets_on_save(sender, instance, created, **kwargs):
+    """
+    📊 Applies the facet count delta of a create/update to ResourceFacetCount.
+    """
+    try:
+        new = facet_values(instance)
+        apply_change(None if created else getattr(instance, "_loaded_facets", None), new)
+        instance._loaded_facets = new
+    except Exception as e:
+        logger.exception("❌ Signal: Failed to update facet counts for id=%s: %s", instance.pk, e)
+
+
+@receiver(post_delete, sender=Resource)
+def update_facets_on_delete(sender, instance, **kwargs):
+    """
+    📊 Removes a deleted Resource from the facet counts.
+    """
+    if _current_batch():
+        return
+    try:
+        apply_change(getattr(instance, "_loaded_facets", None) or facet_values(instance), None)
+    except Exception as e:
+        logger.exception("❌ Signal: Failed to update facet counts for id=%s: %s", instance.pk, e)
+
+
+def ensure_search_index(sender, **kwargs):
+    """
+    🔎 post_migrate hook: creates the search index structures and fills them the first time.
+    """
+    backend = get_search_backend()
+    try:
+        if backend.ensure_schema():
+            backend.rebuild()
+    except Exception as e:
+        logger.exception("❌ Could not prepare search index (%s): %s", backend.name, e)
@@ -0,0 +1,190 @@
+# server/resources/snapshot.py
+
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from utils.signed_url_cache import signed_url_cache
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+CATALOG_SNAPSHOT_ENABLED = getattr(settings, "CATALOG_SNAPSHOT_ENABLED", True)
+CATALOG_SNAPSHOT_PATH = Path(getattr(settings, "CATALOG_SNAPSHOT_PATH", settings.BASE_DIR / "snapshots" / "catalog.bin"))
+CATALOG_SNAPSHOT_DEBOUNCE_SECONDS = getattr(settings, "CATALOG_SNAPSHOT_DEBOUNCE_SECONDS", 2.0)
+CATALOG_SNAPSHOT_RECHECK_SECONDS = getattr(settings, "CATALOG_SNAPSHOT_RECHECK_SECONDS", 1.0)
+CATALOG_SNAPSHOT_CHUNK_BYTES = getattr(settings, "CATALOG_SNAPSHOT_CHUNK_BYTES", 64 * 1024)
+# ------------------------------
+
+# File layout: one line of JSON metadata, "\n", then the response body bytes.
+# The body is exactly what ResourceListView returns for a request without query
+# params (first cursor page, absolute `next` link), so it is only served at `url`.
+
+
+def signed_url_window():
+    """Current signed-URL window with GCS ("-" otherwise); catalog bytes are only valid within it."""
+    return signed_url_cache.window_id() if getattr(settings, "GS_BUCKET_NAME", None) else "-"
+
+
+def _request_for(url):
+    """
+    Bare GET request for `url` (no query string), so the paginator builds the same
+    links a live request would. The scheme travels in X-Forwarded-Proto, which
+    SECURE_PROXY_SSL_HEADER trusts.
+    """
+    parts = urlsplit(url)
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = parts.path
+    request.META = {"HTTP_HOST": parts.netloc, "HTTP_X_FORWARDED_PROTO": parts.scheme, "QUERY_STRING": ""}
+    return Request(request)
+
+
+def iter_chunks(body, size=CATALOG_SNAPSHOT_CHUNK_BYTES):
+    """Yield `body` (a memoryview over the map) in slices for a streaming response."""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def build_snapshot(url, path=CATALOG_SNAPSHOT_PATH) -> dict:
+    """
+    Render the unfiltered first page of the public catalog (as served at `url`)
+    once and atomically replace the snapshot file. Returns the snapshot metadata.
+    """
+    from .models import CatalogVersion, Resource
+    from .pagination import ResourceCursorPagination
+    from .serializers import ResourceSerializer
+
+    # Read the version first: a write landing mid-build leaves the snapshot stale, never mislabeled.
+    version = CatalogVersion.current()
+    window = signed_url_window()
+
+    request = _request_for(url)
+    paginator = ResourceCursorPagination()
+    page = paginator.paginate_queryset(Resource.objects.all(), request)
+    data = ResourceSerializer(page, many=True, context={"request": request}).data
+    body = JSONRenderer().render(paginator.get_paginated_response(data).data)
+
+    meta = {
+        "version": version,
+        "window": window,
+        "url": url,
+        "rows": len(page),
+        "built_at": timezone.now().isoformat(),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(json.dumps(meta).encode() + b"\n")
+        fh.write(body)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)  # readers see the old or the new file, never a partial one
+
+    logger.info("📦 Catalog snapshot built: v%s, %d rows, %d bytes", version, len(page), len(body))
+    return meta
+
+
+class CatalogSnapshot:
+    """
+    Per-process view of the snapshot file, memory-mapped read-only.
+
+    Every worker maps the same file, so the OS page cache holds a single copy.
+    The file is re-stat'ed at most every CATALOG_SNAPSHOT_RECHECK_SECONDS and
+    re-mapped when the builder has replaced it; no worker restart needed.
+    """
+
+    def __init__(self, path=CATALOG_SNAPSHOT_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._checked_at = 0.0
+        self._map = None
+        self._offset = 0
+        self.meta = None
+        # background builder state
+        self._timer = None
+        self._url = None
+
+    # ---------- reading ----------
+
+    def get(self):
+        """
+        (meta, body) of the current snapshot, or None if there is none. The body is a
+        memoryview over the shared map: nothing is copied until it is written out.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= CATALOG_SNAPSHOT_RECHECK_SECONDS:
+                self._checked_at = now
+                self._refresh()
+            if self._map is None:
+                return None
+            return self.meta, memoryview(self._map)[self._offset:]
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._map, self.meta, self._file_id = None, None, None
+            return
+        file_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if file_id == self._file_id:
+            return
+        with open(self.path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = mapped.find(b"\n")
+        self.meta = json.loads(mapped[:header_end])
+        self._offset = header_end + 1
+        self._map, self._file_id = mapped, file_id  # old map is released once unreferenced
+        logger.debug("📦 Catalog snapshot mapped: v%s (%d bytes)", self.meta["version"], st.st_size)
+
+    # ---------- building ----------
+
+    def schedule_rebuild(self, url=None):
+        """
+        Debounced background rebuild; bursts of changes collapse into one build.
+        `url` is the public list URL the snapshot is served at (defaults to the last one).
+        """
+        with self._lock:
+            if url:
+                self._url = url
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(CATALOG_SNAPSHOT_DEBOUNCE_SECONDS, self._rebuild)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _rebuild(self):
+        with self._lock:
+            self._timer = None
+            if not self._url:
+                self._refresh()  # another worker may have built one already
+            url = self._url or (self.meta or {}).get("url")
+        if not url:
+            logger.debug("📦 Catalog snapshot not built yet: no request has named the list URL")
+            return
+        try:
+            build_snapshot(url, path=self.path)
+            with self._lock:
+                self._checked_at = 0.0  # map the new file on the next request
+        except Exception as e:
+            logger.exception("❌ Catalog snapshot build failed: %s", e)
+        finally:
+            connection.close()  # this thread's DB connection
+
+
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,460 @@
+# server/resources/tests.py
+
+import hashlib
+import json
+import os
+import tempfile
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from utils.storage_ops import move_object
+from . import blobs
+from .management.commands.bench_storage_move import StreamOnlyStorage
+from .models import Category, DocumentDerivative, Resource, StorageDeletion, StoredBlob
+from .derivatives import build_derivatives
+from .extraction import extract_text
+from .outbox import drain_deletions, enqueue_deletions
+from .snapshot import CatalogSnapshot, build_snapshot
+
+
+def minimal_pdf(text) -> bytes:
+    """A one-page PDF with `text` in Helvetica, built by hand (no PDF writer needed)."""
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class TempMediaMixin:
+    """Local storage under a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = Path(tmp.name)
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "testserver"])
+class CatalogSnapshotTests(TestCase):
+    url = "http://testserver/api/resources/"
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.snapshot = CatalogSnapshot(Path(tmp.name) / "catalog.bin")
+        patcher = mock.patch("resources.views.catalog_snapshot", self.snapshot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for i in range(3):
+            Resource.objects.create(title=f"Snapshot {i}", file=f"resources/snap-{i}.pdf", category=Category.NOTES)
+
+    def test_served_body_matches_live_page(self):
+        live = self.client.get("/api/resources/?page_size=50")
+        build_snapshot(self.url, path=self.snapshot.path)
+
+        meta, body = self.snapshot.get()
+        self.assertIsInstance(body, memoryview)
+        self.assertEqual(meta["rows"], 3)
+
+        served = self.client.get("/api/resources/")
+        self.assertTrue(served.streaming)
+        content = b"".join(served.streaming_content)
+        self.assertEqual(int(served["Content-Length"]), len(content))
+        self.assertEqual(json.loads(content)["results"], live.json()["results"])
+
+    def test_cursor_requests_render_live(self):
+        build_snapshot(self.url, path=self.snapshot.path)
+        response = self.client.get("/api/resources/?cursor=")
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+
+class BackgroundHashingMixin:
+    """Runs the on-commit background jobs inline: hashing for real, previews/text/snapshot mocked."""
+
+    @contextmanager
+    def committed(self):
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(blobs.content_hash_queue, "submit", blobs.hash_stored_file))
+            self.derivatives = stack.enter_context(mock.patch("resources.signals.derivative_queue"))
+            self.texts = stack.enter_context(mock.patch("resources.signals.text_queue"))
+            stack.enter_context(mock.patch("resources.signals.catalog_snapshot"))
+            stack.enter_context(self.captureOnCommitCallbacks(execute=True))
+            yield
+
+    @staticmethod
+    def no_stored_reads():
+        """Fails the test if stored bytes are read (the web request itself must not)."""
+        return mock.patch.object(FileSystemStorage, "open", side_effect=AssertionError("stored file read"))
+
+
+class ContentHashTests(BackgroundHashingMixin, TempMediaMixin, TestCase):
+    body = b"%PDF-1.4 the same bytes"
+
+    def _resource(self, **kwargs):
+        return Resource(title="Hashed", category=Category.NOTES, **kwargs)
+
+    def test_fieldfile_save_is_hashed(self):
+        resource = self._resource(file="")
+        resource.save()
+        with self.committed():
+            resource.file.save("notes.pdf", ContentFile(self.body), save=True)
+
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.assertEqual(Resource.objects.get(pk=resource.pk).content_hash, digest)
+        self.assertEqual(StoredBlob.objects.get(sha256=digest).name, resource.file.name)
+        self.derivatives.submit.assert_called_with(digest)
+
+    def test_stored_name_is_hashed_in_the_background_and_deduplicated(self):
+        first = self._resource(file=default_storage.save("resources/a.pdf", ContentFile(self.body)))
+        second = self._resource(file=default_storage.save("resources/b.pdf", ContentFile(self.body)))
+        with self.committed():
+            with self.no_stored_reads():
+                first.save()
+                second.save()
+            self.assertIsNone(second.content_hash)
+
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.assertEqual(Resource.objects.get(pk=first.pk).content_hash, digest)
+        self.assertEqual(Resource.objects.get(pk=second.pk).content_hash, digest)
+        self.assertEqual(Resource.objects.get(pk=second.pk).file.name, "resources/a.pdf")
+        self.assertEqual(StoredBlob.objects.get(sha256=digest).ref_count, 2)
+        self.assertTrue(StorageDeletion.objects.filter(name="resources/b.pdf").exists())
+
+    def test_unchanged_file_is_not_rehashed(self):
+        resource = self._resource(file=default_storage.save("resources/c.pdf", ContentFile(self.body)))
+        with self.committed():
+            resource.save()
+        resource = Resource.objects.get(pk=resource.pk)
+        with mock.patch.object(blobs.content_hash_queue, "submit") as rehash:
+            with self.captureOnCommitCallbacks(execute=True):
+                resource.title = "Renamed title"
+                resource.save()
+        rehash.assert_not_called()
+
+    def test_missing_stored_file_keeps_row_unhashed(self):
+        resource = self._resource(file="resources/missing.pdf")
+        with self.committed():
+            resource.save()
+        self.assertIsNone(Resource.objects.get(pk=resource.pk).content_hash)
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_file_replaced_while_hashing_is_left_for_the_next_job(self):
+        resource = self._resource(file=default_storage.save("resources/d.pdf", ContentFile(self.body)))
+        resource.save()
+        Resource.objects.filter(pk=resource.pk).update(file="resources/e.pdf")
+        self.assertIsNone(blobs.hash_stored_file(resource.pk))
+        self.assertIsNone(Resource.objects.get(pk=resource.pk).content_hash)
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "testserver"], USE_GCS=False)
+class DirectUploadTests(BackgroundHashingMixin, TempMediaMixin, TestCase):
+    body = b"%PDF-1.4 direct upload"
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        cache.clear()
+        admin = get_user_model().objects.create(email="admin@example.invalid", is_staff=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(admin).access_token}"
+
+    def _issue(self, filename="Form 2 Notes.pdf"):
+        response = self.client.post(
+            "/api/resources/uploads/",
+            {"filename": filename, "content_type": "application/pdf", "size": len(self.body)},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def _put(self, upload, body=None):
+        return self.client.put(upload["url"], body or self.body, content_type="application/pdf")
+
+    def _register(self, upload, title="Direct notes"):
+        return self.client.post("/api/resources/uploads/complete/", {
+            "upload_token": upload["upload_token"], "title": title,
+            "category": Category.NOTES, "is_free": True, "price": "0.00",
+        }, content_type="application/json")
+
+    def test_put_url_is_single_use(self):
+        upload = self._issue()
+        self.assertEqual(self._put(upload).status_code, 200)
+        self.assertEqual(self._put(upload, b"%PDF-1.4 replaced!!!!!").status_code, 403)
+        with default_storage.open(upload["object_name"], "rb") as fh:
+            self.assertEqual(fh.read(), self.body)
+
+    def test_oversized_put_can_be_retried(self):
+        upload = self._issue()
+        self.assertEqual(self._put(upload, self.body + b"extra").status_code, 400)
+        self.assertEqual(self._put(upload).status_code, 200)
+
+    def test_registration_hashes_in_the_background_and_tracks_blob(self):
+        upload = self._issue()
+        self._put(upload)
+        with self.committed():
+            with self.no_stored_reads():
+                response = self._register(upload)
+            self.assertEqual(response.status_code, 201)
+            self.assertIsNone(Resource.objects.get(pk=response.json()["id"]).content_hash)
+
+        resource = Resource.objects.get(file=upload["object_name"])
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.assertEqual(resource.content_hash, digest)
+        self.assertEqual(StoredBlob.objects.get(sha256=digest).name, upload["object_name"])
+        self.derivatives.submit.assert_called_with(digest)
+        self.texts.submit.assert_called_with(digest)
+
+    def test_duplicate_registration_reuses_stored_object(self):
+        first, second = self._issue(), self._issue()
+        self._put(first)
+        self._put(second)
+        with self.committed():
+            self.assertEqual(self._register(first).status_code, 201)
+            self.assertEqual(self._register(second, title="Same bytes").status_code, 201)
+
+        self.assertEqual(Resource.objects.get(title="Same bytes").file.name, first["object_name"])
+        self.assertTrue(StorageDeletion.objects.filter(name=second["object_name"]).exists())
+        self.assertEqual(self._register(second).status_code, 400)
+
+    def test_ticket_registers_once(self):
+        upload = self._issue()
+        self._put(upload)
+        self.assertEqual(self._register(upload).status_code, 201)
+        self.assertEqual(self._register(upload, title="Again").status_code, 400)
+        self.assertEqual(Resource.objects.filter(file=upload["object_name"]).count(), 1)
+
+    def test_concurrent_registrations_of_one_ticket_create_one_row(self):
+        from .uploads import verify_upload
+
+        upload = self._issue()
+        self._put(upload)
+        racing = []
+
+        def verify_while_another_registers(ticket):
+            if not racing:  # the second request arrives while the first is still verifying
+                racing.append(self._register(upload, title="Racer"))
+            return verify_upload(ticket)
+
+        with mock.patch("resources.views.verify_upload", side_effect=verify_while_another_registers):
+            self.assertEqual(self._register(upload).status_code, 201)
+        self.assertEqual(racing[0].status_code, 400)
+        self.assertEqual(Resource.objects.filter(file=upload["object_name"]).count(), 1)
+
+    def test_failed_registration_releases_the_ticket(self):
+        upload = self._issue()
+        self.assertEqual(self._register(upload).status_code, 400)  # PUT not done yet
+        self._put(upload)
+        self.assertEqual(self._register(upload).status_code, 201)
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "testserver"])
+class ResourceDownloadTests(TempMediaMixin, TestCase):
+    """ResourceDownloadView over FileSystemStorage: ranges, validators and web-server offload."""
+
+    body = bytes(range(256)) * 4  # 1024 bytes, every offset distinguishable
+
+    def setUp(self):
+        super().setUp()
+        self.resource = Resource.objects.create(
+            title="Form 4 Chemistry", file=default_storage.save("resources/chem notes.pdf", ContentFile(self.body)),
+            category=Category.NOTES, is_free=True,
+        )
+        self.url = f"/api/resources/{self.resource.pk}/download/"
+
+    def _get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def _content(self, response):
+        return b"".join(response.streaming_content) if response.streaming else response.content
+
+    def _etag(self):
+        return self._get()["ETag"]
+
+    def test_full_download(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "1024")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn('filename="form-4-chemistry.pdf"', response["Content-Disposition"])
+        self.assertEqual(self._content(response), self.body)
+
+    def test_ranges(self):
+        cases = [
+            ("bytes=100-199", 100, 199),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=1000-5000", 1000, 1023),
+            ("bytes=-100", 924, 1023),   # suffix: the last 100 bytes
+            ("bytes=-5000", 0, 1023),    # suffix longer than the file
+        ]
+        for header, start, end in cases:
+            with self.subTest(range=header):
+                response = self._get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/1024")
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+                self.assertEqual(self._content(response), self.body[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in ["bytes=1024-", "bytes=5000-6000", "bytes=-0"]:
+            with self.subTest(range=header):
+                response = self._get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_ignored_ranges_send_whole_file(self):
+        for header in ["bytes=0-9,20-29", "bytes=200-100", "items=0-9"]:
+            with self.subTest(range=header):
+                response = self._get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Length"], "1024")
+
+    def test_if_range(self):
+        etag = self._etag()
+        response = self._get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._content(response), self.body[:10])
+
+        # The file changed since the client's partial copy: start over with the whole file.
+        response = self._get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(response["Content-Length"], "1024")
+        self.assertEqual(self._content(response), self.body)
+
+    def test_if_none_match(self):
+        etag = self._etag()
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_content_hash_is_the_etag(self):
+        digest = hashlib.sha256(self.body).hexdigest()
+        Resource.objects.filter(pk=self.resource.pk).update(content_hash=digest)
+        self.assertEqual(self._etag(), f'"{digest}"')
+
+    def test_offload_headers(self):
+        name = self.resource.file.name
+        with mock.patch("resources.downloads.RESOURCE_DOWNLOAD_OFFLOAD", "x-accel-redirect"):
+            response = self._get(HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 200)  # nginx applies the Range itself
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + name.replace(" ", "%20"))
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
+
+        with mock.patch("resources.downloads.RESOURCE_DOWNLOAD_OFFLOAD", "x-sendfile"):
+            response = self._get()
+        self.assertEqual(response["X-Sendfile"], default_storage.path(name))
+        self.assertNotIn("X-Accel-Redirect", response)
+        self.assertEqual(response.content, b"")
+
+
+class MoveObjectMemoryTests(TempMediaMixin, SimpleTestCase):
+    """Renaming a stored file must not load it: peak memory stays flat as the file grows."""
+
+    chunk = 256 * 1024
+
+    def _peak(self, storage, size_mb):
+        block = os.urandom(1024 * 1024)
+        with open(self.media_root / "src.bin", "wb") as fh:
+            for _ in range(size_mb):
+                fh.write(block)
+        del block
+        tracemalloc.start()
+        try:
+            final = move_object(storage, "src.bin", "moved/dst.bin", chunk_size=self.chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(os.path.getsize(self.media_root / final), size_mb * 1024 * 1024)
+        os.remove(self.media_root / final)
+        return peak
+
+    def test_os_replace_peak_is_flat(self):
+        storage = FileSystemStorage(location=self.media_root)
+        small, large = self._peak(storage, 1), self._peak(storage, 16)
+        self.assertLess(large, 64 * 1024)
+        self.assertLess(large - small, 32 * 1024)
+
+    def test_streaming_peak_is_bounded_by_chunk(self):
+        storage = StreamOnlyStorage(self.media_root)
+        small, large = self._peak(storage, 1), self._peak(storage, 16)
+        self.assertLess(large, 4 * self.chunk)
+        self.assertLess(large - small, self.chunk)
+
+
+class DeletionOutboxTests(TestCase):
+    sha256 = "ab" * 32
+
+    def test_drain_skips_names_still_referenced(self):
+        base = f"derivatives/ab/{self.sha256}/"
+        StoredBlob.objects.create(sha256=self.sha256, name="resources/shared.pdf", ref_count=1)
+        DocumentDerivative.objects.create(
+            sha256=self.sha256, thumbnail=f"{base}thumb.jpg", preview_pages=[f"{base}page-1.jpg"],
+        )
+        Resource.objects.create(title="Live", file="resources/live.pdf", category=Category.NOTES)
+        names = ["resources/shared.pdf", f"{base}thumb.jpg", f"{base}page-1.jpg",
+                 "resources/live.pdf", f"{base}page-2.jpg", "resources/orphan.pdf"]
+        enqueue_deletions(names)
+
+        storage = mock.Mock()
+        self.assertEqual(drain_deletions(storage=storage), (2, 0))
+        self.assertEqual(
+            sorted(call.args[0] for call in storage.delete.call_args_list),
+            [f"{base}page-2.jpg", "resources/orphan.pdf"],
+        )
+        self.assertFalse(StorageDeletion.objects.exists())
+
+
+class PdfDocumentTests(TempMediaMixin, TestCase):
+    """Previews and text come from pypdfium2."""
+
+    def setUp(self):
+        super().setUp()
+        self.resource = Resource.objects.create(
+            title="Photosynthesis", category=Category.NOTES,
+            file=default_storage.save("resources/photo.pdf", ContentFile(minimal_pdf("Photosynthesis notes"))),
+        )
+        self.digest = blobs.hash_stored_file(self.resource.pk)
+
+    def test_extract_text(self):
+        self.assertEqual(extract_text(default_storage.path(self.resource.file.name), ".pdf"), "Photosynthesis notes")
+
+    def test_rebuild_overwrites_deterministic_names(self):
+        first = build_derivatives(self.digest)
+        self.assertEqual(first.status, DocumentDerivative.Status.READY, first.error)
+        rebuilt = build_derivatives(self.digest, force=True)
+
+        self.assertEqual((rebuilt.thumbnail, rebuilt.preview_pages), (first.thumbnail, first.preview_pages))
+        self.assertTrue(first.thumbnail.endswith("/thumb.jpg"))
+        directory = self.media_root / os.path.dirname(first.thumbnail)
+        self.assertEqual(sorted(os.listdir(directory)), ["page-1.jpg", "thumb.jpg"])
@@ -0,0 +1,75 @@
+# server/resources/texts.py
+
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from utils.background import KeyedJobQueue
+from utils.process_pool import get_process_pool
+from utils.storage_ops import local_copy
+from .blobs import stored_name
+from .extraction import EXTRACTORS, ExtractUnavailable, extract_text
+from .models import CatalogVersion, DocumentText, Resource
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+TEXT_EXTRACTION_ENABLED = getattr(settings, "TEXT_EXTRACTION_ENABLED", True)
+TEXT_EXTRACTION_WORKERS = getattr(settings, "TEXT_EXTRACTION_WORKERS", 2)        # jobs in flight; parsing is in the process pool
+TEXT_EXTRACTION_MAX_CHARS = getattr(settings, "TEXT_EXTRACTION_MAX_CHARS", 100_000)  # per document
+TEXT_EXTRACTION_TIMEOUT = getattr(settings, "TEXT_EXTRACTION_TIMEOUT", 120)      # seconds
+# ------------------------------
+
+
+def extract_document(sha256, storage=None, force=False) -> DocumentText:
+    """
+    📝 Extract the text of one content hash off the request path and re-index the
+    resources holding it. Hashes already READY/UNSUPPORTED are skipped unless `force`.
+    """
+    storage = storage or default_storage
+    row, _ = DocumentText.objects.get_or_create(sha256=sha256)
+    if row.status in (DocumentText.Status.READY, DocumentText.Status.UNSUPPORTED) and not force:
+        return row
+
+    source = stored_name(sha256)
+    if not source:
+        row.delete()  # every resource with these bytes is gone
+        return row
+    ext = os.path.splitext(source)[1].lower()
+    if ext not in EXTRACTORS:
+        row.status, row.error = DocumentText.Status.UNSUPPORTED, ""
+        row.save(update_fields=["status", "error", "updated_at"])
+        return row
+
+    try:
+        with local_copy(storage, source) as path:
+            text = get_process_pool().submit(
+                extract_text, path, ext, TEXT_EXTRACTION_MAX_CHARS
+            ).result(timeout=TEXT_EXTRACTION_TIMEOUT)
+        row.body, row.chars = DocumentText.compress(text), len(text)
+        row.status, row.error = DocumentText.Status.READY, ""
+    except ExtractUnavailable as e:
+        logger.warning("⚠️ Text extraction disabled for PDFs: %s", e)
+        row.status, row.error = DocumentText.Status.FAILED, str(e)
+    except Exception as e:
+        logger.exception("❌ Text extraction failed for %s (%s)", source, sha256[:12])
+        row.status, row.error = DocumentText.Status.FAILED, str(e)[:2000]
+    row.save()
+
+    if row.status == DocumentText.Status.READY:
+        resources = list(Resource.objects.filter(content_hash=sha256).only("id", "title", "content_hash"))
+        get_search_backend().index(resources)
+        CatalogVersion.bump()  # cached ?q= results change
+        logger.info(
+            "📝 Extracted %d chars (%d bytes stored) from %s; re-indexed %d resource(s)",
+            row.chars, len(row.body), source, len(resources),
+        )
+    return row
+
+
+# Fed after upload commits (resources.signals); `manage.py extract_texts` covers anything a restart dropped.
+text_queue = KeyedJobQueue(extract_document, workers=TEXT_EXTRACTION_WORKERS, name="extract_text")
@@ -0,0 +1,193 @@
+# server/resources/uploads.py
+
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from rest_framework import serializers
+
+from utils.gcs_signer import get_signer
+from . import mirror
+from .forms import ALLOWED_EXTS, DEFAULT_MAX_FILE_MB
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+DIRECT_UPLOAD_EXPIRATION_MINUTES = getattr(settings, "DIRECT_UPLOAD_EXPIRATION_MINUTES", 15)  # PUT URL lifetime
+DIRECT_UPLOAD_REGISTER_HOURS = getattr(settings, "DIRECT_UPLOAD_REGISTER_HOURS", 24)  # ticket lifetime
+DIRECT_UPLOAD_PREFIX = getattr(settings, "DIRECT_UPLOAD_PREFIX", "resources/")
+# ------------------------------
+
+_TICKET_SALT = "resources.direct-upload"
+_OCTET = "application/octet-stream"
+
+# Content types a browser may report for each allowed extension.
+CONTENT_TYPES = {
+    ".pdf": {"application/pdf"},
+    ".doc": {"application/msword"},
+    ".docx": {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+    ".ppt": {"application/vnd.ms-powerpoint"},
+    ".pptx": {"application/vnd.openxmlformats-officedocument.presentationml.presentation"},
+    ".xls": {"application/vnd.ms-excel"},
+    ".xlsx": {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    ".zip": {"application/zip", "application/x-zip-compressed", _OCTET},
+    ".rar": {"application/vnd.rar", "application/x-rar-compressed", _OCTET},
+    ".txt": {"text/plain"},
+}
+
+
+def max_upload_bytes() -> int:
+    return DEFAULT_MAX_FILE_MB * 1024 * 1024
+
+
+def object_name_for(filename: str) -> str:
+    """
+    Storage name for an upload: no spaces or unsafe characters, lowercase extension,
+    and a random prefix so names never collide and never need a rename later.
+    """
+    stem, ext = os.path.splitext(os.path.basename(filename or ""))
+    stem = get_valid_filename(stem)[:100] or "file"
+    return f"{DIRECT_UPLOAD_PREFIX}{uuid.uuid4().hex[:12]}_{stem}{ext.lower()}"
+
+
+def check_declared(filename, content_type, size):
+    """Validate what the browser says it will upload; raises ValidationError."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in ALLOWED_EXTS:
+        raise serializers.ValidationError(
+            {"filename": f"Unsupported file type '{ext}'. Allowed: {', '.join(sorted(ALLOWED_EXTS))}"}
+        )
+    if content_type not in CONTENT_TYPES.get(ext, {_OCTET}):
+        raise serializers.ValidationError({"content_type": f"'{content_type}' does not match a {ext} file."})
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({"size": "size (bytes) is required."})
+    if not 0 < size <= max_upload_bytes():
+        raise serializers.ValidationError({"size": f"File must be 1 byte to {DEFAULT_MAX_FILE_MB} MB."})
+    return size
+
+
+# ---------- Tickets: tie step two to what step one allowed ----------
+
+def make_ticket(name, content_type, size) -> str:
+    return signing.dumps({"name": name, "type": content_type, "size": size}, salt=_TICKET_SALT, compress=True)
+
+
+def read_ticket(token, max_age=None) -> dict:
+    max_age = max_age or timedelta(hours=DIRECT_UPLOAD_REGISTER_HOURS)
+    try:
+        return signing.loads(token or "", salt=_TICKET_SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        raise serializers.ValidationError({"upload_token": "Upload token expired; request a new upload URL."})
+    except signing.BadSignature:
+        raise serializers.ValidationError({"upload_token": "Invalid upload token."})
+
+
+# ---------- Storage targets ----------
+
+class GCSDirectUpload:
+    """Browser PUTs straight to the bucket with a V4 signed URL."""
+    name = "gcs"
+
+    def target(self, object_name, content_type, ticket, request):
+        expiration = timedelta(minutes=DIRECT_UPLOAD_EXPIRATION_MINUTES)
+        signer = get_signer()
+        # Both paths sign host + content-type, so the PUT must send the declared type.
+        if signer:
+            url = signer.sign(object_name, method="PUT", expiration=expiration, content_type=content_type)
+        else:
+            blob = default_storage.bucket.blob(object_name)
+            url = blob.generate_signed_url(version="v4", expiration=expiration, method="PUT", content_type=content_type)
+        return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}}
+
+    def stat(self, object_name):
+        """(size, content_type) of the uploaded object, or None if it is not there."""
+        blob = default_storage.bucket.get_blob(object_name)
+        if blob is None:
+            return None
+        mirror.record_blob(blob)  # the PUT bypassed the storage backend
+        return blob.size, blob.content_type
+
+    def discard(self, object_name):
+        default_storage.delete(object_name)
+
+
+class LocalDirectUpload:
+    """
+    Offline stand-in with the same protocol: the PUT goes to
+    resources.views.local_upload_put, which plays the bucket's part.
+    """
+    name = "local"
+
+    def target(self, object_name, content_type, ticket, request):
+        url = request.build_absolute_uri(reverse("resources:resource-upload-local", args=[ticket]))
+        return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}}
+
+    def stat(self, object_name):
+        # The PUT handler refuses bodies whose Content-Type differs from the ticket.
+        # Ask the filesystem: the mirror has not seen this object yet.
+        try:
+            size = default_storage.size(object_name)
+        except FileNotFoundError:
+            return None
+        mirror.record(object_name, size, mimetypes.guess_type(object_name)[0])
+        return size, None
+
+    def discard(self, object_name):
+        default_storage.delete(object_name)
+
+
+def get_direct_upload():
+    return GCSDirectUpload() if getattr(settings, "USE_GCS", False) else LocalDirectUpload()
+
+
+def issue_upload(filename, content_type, size, request) -> dict:
+    """Step one: a sanitized object name, a ticket for step two and where to PUT the bytes."""
+    size = check_declared(filename, content_type, size)
+    object_name = object_name_for(filename)
+    ticket = make_ticket(object_name, content_type, size)
+    backend = get_direct_upload()
+    target = backend.target(object_name, content_type, ticket, request)
+    logger.info("📤 Direct upload issued (%s) → %s (%d bytes, %s)", backend.name, object_name, size, content_type)
+    return {
+        "upload_token": ticket,
+        "object_name": object_name,
+        "expires_at": serializers.DateTimeField().to_representation(
+            timezone.now() + timedelta(minutes=DIRECT_UPLOAD_EXPIRATION_MINUTES)
+        ),
+        **target,
+    }
+
+
+def verify_upload(ticket: dict):
+    """
+    Step two check: the object exists with the size and type the ticket allowed.
+    Rejected objects are removed so they do not linger unreferenced in storage.
+    """
+    backend = get_direct_upload()
+    object_name = ticket["name"]
+    stat = backend.stat(object_name)
+    if stat is None:
+        raise serializers.ValidationError({"upload_token": "No uploaded file found; finish the PUT first."})
+
+    size, content_type = stat
+    problem = None
+    if size != ticket["size"] or size > max_upload_bytes():
+        problem = f"Uploaded size {size} does not match the declared {ticket['size']} bytes."
+    elif content_type is not None and content_type != ticket["type"]:
+        problem = f"Uploaded type '{content_type}' does not match the declared '{ticket['type']}'."
+    if problem:
+        logger.warning("❌ Direct upload rejected → %s: %s", object_name, problem)
+        backend.discard(object_name)
+        raise serializers.ValidationError({"upload_token": problem})
+    return object_name
@@ -0,0 +1,42 @@
+# server/resources/urls.py
+
+import logging
+from django.urls import path
+
+from utils.routes import log_routes
+from .views import (
+    ResourceDownloadView,
+    ResourceDirectUploadView,
+    ResourceFacetsView,
+    ResourceListView,
+    ResourceUploadRegisterView,
+    ResourceUploadView,
+    local_upload_put,
+)
+
+logger = logging.getLogger(__name__)
+
+app_name = "resources"  # namespace safety for reversing URLs
+
+urlpatterns = [
+    # Public: List all uploaded resources (frontend consumption)
+    path("", ResourceListView.as_view(), name="resource-list"),
+
+    # Public: Counts per category / level / term / free (filter UI, LevelsGrid)
+    path("facets/", ResourceFacetsView.as_view(), name="resource-facets"),
+
+    # Free resources, or paid ones the user bought: resumable local download / signed GCS redirect
+    path("<int:pk>/download/", ResourceDownloadView.as_view(), name="resource-download"),
+
+    # Admin-only: Upload new resource files (uses IsAdminUser in the view)
+    path("upload/", ResourceUploadView.as_view(), name="resource-upload"),
+
+    # Admin-only: Direct-to-bucket upload (1: get a signed PUT URL, 2: register the stored file)
+    path("uploads/", ResourceDirectUploadView.as_view(), name="resource-upload-url"),
+    path("uploads/complete/", ResourceUploadRegisterView.as_view(), name="resource-upload-register"),
+    # Local FileSystemStorage stand-in for the signed bucket PUT
+    path("uploads/local/<str:token>/", local_upload_put, name="resource-upload-local"),
+]
+
+# 🔍 Debug log the registered routes (when LOG_URL_ROUTES is on)
+log_routes(logger, urlpatterns, "api/resources/")
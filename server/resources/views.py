@@ -0,0 +1,388 @@
+# server/resources/views.py
+
+import hashlib
+import logging
+import os
+import uuid
+from datetime import timedelta
+from typing import Any, Dict
+from urllib.parse import urlencode
+
+from django.db import IntegrityError
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers
+from rest_framework import generics, permissions
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .downloads import can_download, redirect_signed, serve_local
+from .facets import read_facets
+from .models import CatalogVersion, Resource, StorageDeletion
+from .pagination import ResourceCursorPagination
+from .search import get_search_backend
+from .serializers import COLUMN_FIELDS, ResourceSerializer, parse_fields, values_representation
+from .snapshot import CATALOG_SNAPSHOT_ENABLED, catalog_snapshot, iter_chunks, signed_url_window
+from .uploads import (
+    DIRECT_UPLOAD_EXPIRATION_MINUTES, DIRECT_UPLOAD_REGISTER_HOURS, issue_upload, read_ticket, verify_upload,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _has_field(model, field_name: str) -> bool:
+    return any(f.name == field_name for f in model._meta.get_fields())
+
+
+def _catalog_etag(request, version=None, window=None) -> str:
+    """
+    Strong ETag for a catalog response: catalog version + path + query params.
+    With GCS, the signed-URL window is included too, so a 304 never keeps a client
+    on links that the cache has already rotated.
+    """
+    version = CatalogVersion.current() if version is None else version
+    window = signed_url_window() if window is None else window
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = f"{version}|{window}|{request.path}|{params}"
+    return '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class ResourceListView(generics.ListAPIView):
+    """
+    Public endpoint to list resources.
+    Supports optional filtering via query params:
+      - q: ranked full-text prefix search over titles and document text (see resources.search/texts)
+      - category: exact match
+      - level: exact match
+      - term: exact match
+      - free: true|false
+      - fields: comma-separated subset of the serializer fields (sparse fieldset);
+        plain columns only (id,title,category,level,term,is_free,price,created_at)
+        are read with .values() and never build model instances or sign URLs
+    Results are cursor-paginated (see ResourceCursorPagination): page_size, cursor.
+    Responses carry an ETag; a matching If-None-Match gets a 304 without querying resources.
+    Requests without query params are answered from the prebuilt snapshot of the
+    first page (see resources.snapshot) while it is current. Only that page is
+    snapshotted: ?cursor= (and any other parameter) always renders live.
+    """
+    serializer_class = ResourceSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ResourceCursorPagination
+    query_budget = 4  # catalog version + page + thumbnails (+ JWT user)
+
+    def get_queryset(self):
+        # Ordering comes from the paginator: (-created_at, id).
+        qs = Resource.objects.all()
+
+        request: HttpRequest = self.request
+        q = request.query_params.get("q")
+        category = request.query_params.get("category")
+        level = request.query_params.get("level")
+        term = request.query_params.get("term")
+        free = request.query_params.get("free")
+
+        logger.debug(
+            "🔎 ResourceListView filters → q=%s | category=%s | level=%s | term=%s | free=%s",
+            q, category, level, term, free,
+        )
+
+        if q:
+            backend = get_search_backend()
+            qs = backend.search(qs, q)
+            # Paginator orders by search_rank instead of recency when the backend ranks.
+            self.search_ranked = backend.ranked
+
+        if category:
+            qs = qs.filter(category=category)
+
+        if level:
+            qs = qs.filter(level=level)
+
+        if term:
+            qs = qs.filter(term=term)
+
+        if free is not None:
+            free_norm = str(free).strip().lower()
+            if free_norm in {"true", "1", "yes"}:
+                qs = qs.filter(is_free=True)
+            elif free_norm in {"false", "0", "no"}:
+                qs = qs.filter(is_free=False)
+
+        return qs
+
+    def get_serializer_context(self) -> Dict[str, Any]:
+        return {"request": self.request}
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", getattr(self, "requested_fields", None))
+        return super().get_serializer(*args, **kwargs)
+
+    def _list_values(self, fields):
+        """Sparse fast path: page over .values() dicts, no model instances, no serializer."""
+        qs = self.filter_queryset(self.get_queryset())
+        # The cursor needs the ordering columns even when the client did not ask for them.
+        ordering = "search_rank" if getattr(self, "search_ranked", False) else "created_at"
+        columns = list(dict.fromkeys([*fields, ordering, "id"]))
+        page = self.paginate_queryset(qs.values(*columns))
+        render = values_representation(fields)
+        return self.get_paginated_response([render(row) for row in page])
+
+    def list(self, request, *args, **kwargs):
+        ip = request.META.get("REMOTE_ADDR")
+        logger.debug("📥 ResourceListView from IP: %s", ip)
+
+        self.requested_fields = fields = parse_fields(request.query_params.get("fields"))
+
+        version, window = CatalogVersion.current(), signed_url_window()
+        etag = _catalog_etag(request, version, window)
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            client_etags = parse_etags(if_none_match)
+            if etag in client_etags or "*" in client_etags:
+                logger.debug("♻️ Catalog unchanged → 304 (%s)", etag)
+                response = Response(status=304)
+                response["ETag"] = etag
+                patch_cache_control(response, no_cache=True)
+                return response
+
+        if CATALOG_SNAPSHOT_ENABLED and not request.query_params:
+            url = request.build_absolute_uri()
+            snapshot = catalog_snapshot.get()
+            if snapshot and (snapshot[0]["version"], snapshot[0]["window"], snapshot[0]["url"]) == (version, window, url):
+                meta, body = snapshot
+                logger.debug("📦 Serving catalog snapshot v%s (%d rows)", version, meta["rows"])
+                response = StreamingHttpResponse(iter_chunks(body), content_type="application/json")
+                response["Content-Length"] = str(len(body))
+                response["ETag"] = etag
+                patch_cache_control(response, no_cache=True)
+                return response
+            # Missing or stale: answer live and let the builder catch up.
+            catalog_snapshot.schedule_rebuild(url)
+
+        if fields and set(fields) <= set(COLUMN_FIELDS):
+            response = self._list_values(fields)
+        else:
+            response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)  # always revalidate, cheap via ETag
+        logger.info("✅ Listed %d resources", len(response.data.get("results", [])))
+        return response
+
+
+class ResourceFacetsView(APIView):
+    """
+    Public endpoint with resource counts per facet value:
+      {"category": {"NOTES": 12, ...}, "level": {...}, "term": {...},
+       "free": {"true": 30, "false": 8}, "total": 38}
+    Read from the ResourceFacetCount aggregate table, so the cost does not grow with the catalog.
+    """
+    permission_classes = [permissions.AllowAny]
+    query_budget = 3  # catalog version + facet rows (+ JWT user)
+
+    def get(self, request, *args, **kwargs):
+        etag = _catalog_etag(request)
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match and etag in parse_etags(if_none_match):
+            response = Response(status=304)
+        else:
+            response = Response(read_facets())
+            logger.debug("📊 Facets served (total=%s)", response.data["total"])
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class ResourceDownloadView(APIView):
+    """
+    GET /api/resources/<id>/download/ (?inline=1 to open instead of save).
+    Free resources for everyone, paid ones for buyers (PaidResource) and staff.
+    Local storage is served here with Range/If-Range so interrupted downloads resume;
+    on GCS the client is redirected to a cached signed URL (the bucket handles Range).
+    """
+    permission_classes = [permissions.AllowAny]
+    query_budget = 3  # resource (+ JWT user, + owned ids or one ownership check)
+
+    def get(self, request, pk, *args, **kwargs):
+        resource = (
+            Resource.objects.only("id", "title", "file", "is_free", "content_hash").filter(pk=pk).first()
+        )
+        if resource is None or not resource.file:
+            raise NotFound("Resource not found.")
+        if not can_download(request.user, resource):
+            if not request.user.is_authenticated:
+                raise NotAuthenticated()
+            logger.info("🔒 Download refused → user=%s resource=%s", request.user.pk, resource.pk)
+            raise PermissionDenied("Purchase this resource to download it.")
+
+        storage = resource.file.storage
+        if isinstance(storage, FileSystemStorage):
+            return serve_local(request, resource, storage, as_attachment=request.GET.get("inline") != "1")
+        return redirect_signed(resource)
+
+
+class ResourceUploadView(generics.CreateAPIView):
+    """
+    Admin-only endpoint to upload a new resource.
+    Accepts multipart/form-data:
+      - title, file, category, level, term (optional), is_free, price
+    The file passes through this worker; ResourceDirectUploadView avoids that.
+    """
+    queryset = Resource.objects.all()
+    serializer_class = ResourceSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_serializer_context(self) -> Dict[str, Any]:
+        return {"request": self.request}
+
+    def perform_create(self, serializer):
+        logger.debug("📤 Starting upload for admin user=%s", self.request.user)
+
+        try:
+            # If your model has uploaded_by, attach current user safely.
+            save_kwargs = {}
+            if _has_field(Resource, "uploaded_by"):
+                save_kwargs["uploaded_by"] = self.request.user
+
+            # ResourceSerializer does not expose `file`, so attach the upload here.
+            # Hashed while the body streamed in (utils.hashing); same bytes → the stored object is reused.
+            upload = self.request.FILES.get("file")
+            if upload is not None:
+                save_kwargs["file"] = upload
+
+            instance: Resource = serializer.save(**save_kwargs)
+            logger.info(
+                "✅ Resource saved (id=%s) title='%s' category='%s' level='%s' term='%s' free=%s price=%s",
+                instance.pk, instance.title, instance.category, instance.level, instance.term,
+                instance.is_free, instance.price
+            )
+
+            # Sanitize storage filename (remove spaces) for better GCS compatibility
+            if instance.file and " " in instance.file.name:
+                original_name = instance.file.name
+                instance.file.name = original_name.replace(" ", "_")
+                instance.save(update_fields=["file"])
+                logger.warning("⚠️ Filename sanitized: '%s' → '%s'", original_name, instance.file.name)
+            else:
+                logger.debug("🆗 Filename clean: %s", getattr(instance.file, "name", None))
+
+        except IntegrityError as e:
+            logger.error("❌ IntegrityError while saving resource: %s", e)
+            raise
+        except Exception as e:
+            logger.exception("❌ Unexpected error while saving resource")
+            raise
+
+    def create(self, request, *args, **kwargs):
+        logger.info("🔐 Upload initiated by admin: %s", request.user)
+        response: Response = super().create(request, *args, **kwargs)
+        logger.info("📦 Upload complete. New Resource ID: %s", response.data.get("id"))
+        return response
+
+
+class ResourceDirectUploadView(APIView):
+    """
+    Admin-only step one of a direct upload. POST JSON:
+      {"filename": "Form 2 Notes.pdf", "content_type": "application/pdf", "size": 123456}
+    Returns {"upload_token", "object_name", "method": "PUT", "url", "headers", "expires_at"}.
+    The browser PUTs the file bytes to `url` with `headers`, then calls
+    ResourceUploadRegisterView. With GCS the bytes go straight to the bucket.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+        upload = issue_upload(data.get("filename"), data.get("content_type"), data.get("size"), request)
+        return Response(upload, status=201)
+
+
+class ResourceUploadRegisterView(generics.CreateAPIView):
+    """
+    Admin-only step two of a direct upload. Accepts the usual metadata
+    (title, category, level, term, is_free, price) plus `upload_token`.
+    The Resource row is only created once the stored object's size/type match
+    what step one allowed (metadata only), and each ticket registers one row.
+    The row is saved unhashed; a background job hashes the stored object, then
+    it is deduplicated and gets previews and text extraction like any other upload.
+    """
+    queryset = Resource.objects.all()
+    serializer_class = ResourceSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_serializer_context(self) -> Dict[str, Any]:
+        return {"request": self.request}
+
+    def perform_create(self, serializer):
+        ticket = read_ticket(self.request.data.get("upload_token"))
+        already = serializers.ValidationError({"upload_token": "This upload is already registered."})
+        # Claim the ticket atomically for as long as it is valid; released again if registration fails.
+        claim = f"resources:upload-register:{ticket['name']}"
+        if not cache.add(claim, True, DIRECT_UPLOAD_REGISTER_HOURS * 60 * 60):
+            raise already
+        try:
+            # A duplicate of stored bytes is repointed once hashed and its copy queued for deletion.
+            if (Resource.objects.filter(file=ticket["name"]).exists()
+                    or StorageDeletion.objects.filter(name=ticket["name"]).exists()):
+                raise already
+            object_name = verify_upload(ticket)
+
+            save_kwargs = {"file": object_name}
+            if _has_field(Resource, "uploaded_by"):
+                save_kwargs["uploaded_by"] = self.request.user
+            instance: Resource = serializer.save(**save_kwargs)
+        except Exception:
+            cache.delete(claim)
+            raise
+        logger.info("✅ Direct upload registered (id=%s) → %s", instance.pk, instance.file.name)
+
+
+@csrf_exempt
+def local_upload_put(request, token):
+    """
+    FileSystemStorage stand-in for a signed bucket PUT (offline/dev only).
+    The ticket in the URL is the authorization, like a signed URL's signature.
+    Each ticket stores one object: the first accepted PUT uses it up, and an
+    existing object is never overwritten.
+    """
+    if request.method != "PUT":
+        return HttpResponseNotAllowed(["PUT"])
+    if getattr(settings, "USE_GCS", False):
+        return HttpResponse(status=404)
+    try:
+        ticket = read_ticket(token, max_age=timedelta(minutes=DIRECT_UPLOAD_EXPIRATION_MINUTES))
+    except serializers.ValidationError:
+        return HttpResponse("Invalid or expired upload URL", status=403)
+    if request.content_type != ticket["type"]:
+        return HttpResponse("Content-Type does not match the signed upload", status=403)
+
+    # Claim the ticket for as long as it is valid; released again if the body is refused.
+    claim = f"resources:upload-put:{ticket['name']}"
+    if not cache.add(claim, True, DIRECT_UPLOAD_EXPIRATION_MINUTES * 60):
+        return HttpResponse("Upload URL already used", status=403)
+
+    path = default_storage.path(ticket["name"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp, written = f"{path}.{uuid.uuid4().hex[:8]}.part", 0
+    try:
+        with open(tmp, "wb") as fh:
+            while chunk := request.read(64 * 1024):
+                written += len(chunk)
+                if written > ticket["size"]:
+                    cache.delete(claim)
+                    return HttpResponse("Body larger than the signed size", status=400)
+                fh.write(chunk)
+        os.link(tmp, path)  # unlike os.replace, fails instead of overwriting
+    except FileExistsError:
+        return HttpResponse("Upload URL already used", status=403)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.debug("📥 Local direct upload stored → %s (%d bytes)", ticket["name"], written)
+    return HttpResponse(status=200)
@@ -5,7 +5,6 @@ from .models import Profile
 
 # ✅ Setup logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 # ✅ Use the custom user model
 User = get_user_model()
@@ -32,4 +31,3 @@ class ProfileAdmin(admin.ModelAdmin):
 admin.site.site_header = "Elimu-Online Admin"
 admin.site.site_title = "Elimu Admin Panel"
 admin.site.index_title = "Welcome to the Admin Dashboard"
-logger.info("✅ Elimu-Online Admin Panel loaded successfully")
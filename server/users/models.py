@@ -5,7 +5,6 @@ from django.utils import timezone
 
 # ✅ Set up logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 # ===============================
 # ✅ Custom User Manager
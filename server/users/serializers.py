@@ -5,7 +5,6 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 # ✅ Setup logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 User = get_user_model()
 
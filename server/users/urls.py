@@ -1,13 +1,11 @@
 import logging
 from django.urls import path
+
+from utils.routes import log_routes
 from .views import UserListView, register_user, LoginView
 
 # ✅ Setup logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# ✅ Confirm file load
-logger.info("✅ DEBUG: users/urls.py loaded successfully.")
 
 # ✅ User-related routes
 urlpatterns = [
@@ -24,11 +22,5 @@ urlpatterns = [
     path('auth/login/', LoginView.as_view(), name='user-login'),
 ]
 
-# ✅ Log all registered user routes if in DEBUG mode
-if logger.isEnabledFor(logging.DEBUG):
-    for route in urlpatterns:
-        try:
-            logger.debug("🔗 Registered user route: /api/users/%s → View: %s",
-                         route.pattern.describe(), route.callback.__name__)
-        except Exception as e:
-            logger.warning("⚠️ Route logging error for %s → %s", route, str(e))
+# ✅ Log all registered user routes (when LOG_URL_ROUTES is on)
+log_routes(logger, urlpatterns, "api/users/")
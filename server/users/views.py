@@ -10,7 +10,6 @@ from .serializers import UserSerializer
 
 # ✅ Logger setup
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 User = get_user_model()  # ✅ Custom user model
 
@@ -0,0 +1,87 @@
+# server/utils/background.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class DebouncedTask:
+    """
+    Runs `func()` on a daemon thread `delay` seconds after the first schedule() call;
+    further calls before it runs are folded into the same run. A call that arrives
+    while it is running schedules one more run afterwards.
+    Used to kick background drainers right after a commit without a task queue.
+    """
+
+    def __init__(self, func, delay=1.0, name=None):
+        self.func = func
+        self.delay = delay
+        self.name = name or getattr(func, "__name__", "task")
+        self._lock = threading.Lock()
+        self._timer = None
+        self._running = False
+        self._again = False
+
+    def schedule(self):
+        with self._lock:
+            if self._running:
+                self._again = True
+                return
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer, self._running = None, True
+        try:
+            self.func()
+        except Exception as e:
+            logger.exception("❌ Background task %s failed: %s", self.name, e)
+        finally:
+            connection.close()  # this thread's DB connection
+            with self._lock:
+                self._running = False
+                again, self._again = self._again, False
+            if again:
+                self.schedule()
+
+
+class KeyedJobQueue:
+    """
+    Bounded thread pool running `func(key)` in the background, at most once at a
+    time per key: submitting a key that is queued or running is a no-op.
+    Jobs are not persisted; pair with a management command that catches up.
+    """
+
+    def __init__(self, func, workers=2, name=None):
+        self.func = func
+        self.workers = max(1, workers)
+        self.name = name or getattr(func, "__name__", "jobs")
+        self._executor = None
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key):
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        self._executor.submit(self._run, key)
+
+    def _run(self, key):
+        try:
+            self.func(key)
+        except Exception as e:
+            logger.exception("❌ Background job %s(%s) failed: %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+            connection.close()
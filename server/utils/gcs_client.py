@@ -0,0 +1,127 @@
+# server/utils/gcs_client.py
+
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+GCS_HTTP_POOL_CONNECTIONS = getattr(settings, "GCS_HTTP_POOL_CONNECTIONS", 4)  # hosts kept (storage, oauth2, ...)
+GCS_HTTP_POOL_MAXSIZE = getattr(settings, "GCS_HTTP_POOL_MAXSIZE", 32)         # keep-alive sockets per host
+GCS_HTTP_MAX_RETRIES = getattr(settings, "GCS_HTTP_MAX_RETRIES", 3)            # connect-level retries
+# ------------------------------
+
+
+class GCSClientRegistry:
+    """
+    One google-cloud-storage client per process, created on first use.
+
+    The client talks through a requests session with a sized keep-alive pool, so
+    threads reuse TLS connections instead of opening one per call. After a fork
+    (gunicorn preload) the child drops the inherited client without closing it -
+    its sockets belong to the parent - and builds its own on next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._client = None
+        self._adapter = None
+        self._buckets = {}
+        self.clients_created = 0
+
+    def client(self):
+        """The shared storage.Client (credentials from settings.GS_CREDENTIALS, else ADC)."""
+        if self._client is not None and self._pid == os.getpid():
+            return self._client
+        with self._lock:
+            if self._client is not None and self._pid != os.getpid():
+                logger.info("🔁 GCS client inherited from pid %s; creating one for pid %s", self._pid, os.getpid())
+                self._forget()
+            if self._client is None:
+                self._client, self._adapter = self._create()
+                self._pid = os.getpid()
+                self.clients_created += 1
+        return self._client
+
+    def bucket(self, name=None):
+        """Bucket handle on the shared client (settings.GS_BUCKET_NAME by default)."""
+        name = name or settings.GS_BUCKET_NAME
+        client = self.client()
+        bucket = self._buckets.get(name)
+        if bucket is None or bucket.client is not client:
+            bucket = self._buckets[name] = client.bucket(name)
+        return bucket
+
+    def stats(self) -> dict:
+        """Counters for this process; never creates a client."""
+        opened = requests = 0
+        adapter = self._adapter if self._pid == os.getpid() else None
+        if adapter is not None:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    requests += pool.num_requests
+        return {
+            "pid": os.getpid(),
+            "clients_created": self.clients_created,
+            "connections_opened": opened,
+            "requests": requests,
+            "connections_reused": max(requests - opened, 0),
+        }
+
+    def reset(self):
+        """Drop the client (e.g. after changing credentials); the next call creates a new one."""
+        with self._lock:
+            self._forget()
+
+    def _after_fork(self):
+        # Another thread may have held the lock at fork time; the child starts clean.
+        self._lock = threading.Lock()
+        self._forget()
+        self.clients_created = 0
+
+    def _forget(self):
+        self._client, self._adapter, self._pid = None, None, None
+        self._buckets = {}
+
+    @staticmethod
+    def _create():
+        import google.auth
+        from google.auth.credentials import with_scopes_if_required
+        from google.auth.transport.requests import AuthorizedSession
+        from google.cloud import storage
+        from requests.adapters import HTTPAdapter
+
+        credentials, project = getattr(settings, "GS_CREDENTIALS", None), getattr(settings, "GS_PROJECT_ID", None)
+        if credentials is None:
+            credentials, default_project = google.auth.default(scopes=storage.Client.SCOPE)
+            project = project or default_project
+        else:
+            credentials = with_scopes_if_required(credentials, storage.Client.SCOPE)
+            project = project or getattr(credentials, "project_id", None)
+
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(
+            pool_connections=GCS_HTTP_POOL_CONNECTIONS,
+            pool_maxsize=GCS_HTTP_POOL_MAXSIZE,
+            max_retries=GCS_HTTP_MAX_RETRIES,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        client = storage.Client(project=project, credentials=credentials, _http=session)
+        logger.info("✅ GCS client created (pid=%s, pool=%d)", os.getpid(), GCS_HTTP_POOL_MAXSIZE)
+        return client, adapter
+
+
+gcs_clients = GCSClientRegistry()
+
+if hasattr(os, "register_at_fork"):
+    # Forget without closing: the parent still owns those sockets.
+    os.register_at_fork(after_in_child=gcs_clients._after_fork)
@@ -1,21 +1,17 @@
 import os
 import logging
-from google.cloud import storage
 from django.conf import settings
 from datetime import timedelta
 
+from utils.gcs_client import gcs_clients
+from utils.gcs_signer import get_signer
+
 logger = logging.getLogger(__name__)
 
-# ✅ Initialize the GCS client
-try:
-    credentials = settings.GS_CREDENTIALS
-    bucket_name = settings.GS_BUCKET_NAME
-    client = storage.Client(credentials=credentials)
-    bucket = client.bucket(bucket_name)
-    logger.debug("✅ GCS client initialized with bucket: %s", bucket_name)
-except Exception as e:
-    logger.error("❌ Error initializing GCS client: %s", str(e))
-    bucket = None
+
+def _bucket():
+    """Bucket on the shared GCS client; created on first use, not at import."""
+    return gcs_clients.bucket(settings.GS_BUCKET_NAME)
 
 
 def upload_file_to_gcs(local_file_path, gcs_path, content_type="application/octet-stream"):
@@ -28,9 +24,11 @@ def upload_file_to_gcs(local_file_path, gcs_path, content_type="application/octe
     logger.info("📤 Uploading file to GCS: %s → %s", local_file_path, gcs_path)
 
     try:
-        blob = bucket.blob(gcs_path)
+        blob = _bucket().blob(gcs_path)
         blob.upload_from_filename(local_file_path, content_type=content_type)
         blob.make_public()
+        from resources import mirror  # uploaded outside the storage backend
+        mirror.record_blob(blob)
         logger.debug("✅ Upload complete. Public URL: %s", blob.public_url)
 
         # Clean up local file
@@ -48,45 +46,58 @@ def upload_file_to_gcs(local_file_path, gcs_path, content_type="application/octe
 def generate_signed_url(gcs_path, expiration_minutes=60):
     """
     🔐 Generates a signed URL for secure temporary file access.
+    Signed locally from the service-account key; no existence check round trip
+    (a URL for a missing object simply answers 404).
     """
-    logger.debug("🔐 Generating signed URL for: %s", gcs_path)
+    return generate_signed_urls([gcs_path], expiration_minutes).get(gcs_path)
 
-    try:
-        blob = bucket.blob(gcs_path)
 
-        if not blob.exists():
-            logger.warning("⚠️ File does not exist in GCS: %s", gcs_path)
-            return None
+def generate_signed_urls(gcs_paths, expiration_minutes=60):
+    """
+    🔐 Batch variant: returns {gcs_path: signed_url} for a whole page of objects.
+    """
+    logger.debug("🔐 Generating %d signed URL(s)", len(gcs_paths))
 
-        url = blob.generate_signed_url(
-            version="v4",
-            expiration=timedelta(minutes=expiration_minutes),
-            method="GET",
-        )
-        logger.debug("✅ Signed URL: %s", url)
-        return url
+    try:
+        signer = get_signer()
+        if signer:
+            return signer.sign_many(gcs_paths, expiration=timedelta(minutes=expiration_minutes))
+
+        bucket = _bucket()
+        return {
+            path: bucket.blob(path).generate_signed_url(
+                version="v4",
+                expiration=timedelta(minutes=expiration_minutes),
+                method="GET",
+            )
+            for path in gcs_paths
+        }
 
     except Exception as e:
         logger.error("❌ Failed to generate signed URL: %s", str(e))
-        return None
+        return {}
 
 
 def delete_file_from_gcs(gcs_path):
     """
     🗑️ Deletes a file from GCS if it exists.
+    One DELETE; a missing object answers 404 instead of costing an extra existence check.
     """
     logger.info("🗑️ Attempting to delete file from GCS: %s", gcs_path)
 
+    from google.api_core.exceptions import NotFound
+    from resources import mirror  # deleted outside the storage backend
+
     try:
-        blob = bucket.blob(gcs_path)
-
-        if blob.exists():
-            blob.delete()
-            logger.info("✅ File deleted: %s", gcs_path)
-            return True
-        else:
-            logger.warning("⚠️ File not found: %s", gcs_path)
-            return False
+        _bucket().blob(gcs_path).delete()
+        mirror.forget([gcs_path])
+        logger.info("✅ File deleted: %s", gcs_path)
+        return True
+
+    except NotFound:
+        mirror.forget([gcs_path])
+        logger.warning("⚠️ File not found: %s", gcs_path)
+        return False
 
     except Exception as e:
         logger.error("❌ Error deleting file from GCS: %s", str(e))
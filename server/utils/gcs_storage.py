@@ -0,0 +1,21 @@
+# server/utils/gcs_storage.py
+
+from storages.backends.gcloud import GoogleCloudStorage
+
+from utils.gcs_client import gcs_clients
+
+
+class SharedClientGoogleCloudStorage(GoogleCloudStorage):
+    """
+    django-storages GCS backend on the process-wide client (utils.gcs_client)
+    instead of a client per storage instance, so it shares the connection pool
+    and is rebuilt after a fork.
+    """
+
+    @property
+    def client(self):
+        return gcs_clients.client()
+
+    @property
+    def bucket(self):
+        return gcs_clients.bucket(self.bucket_name)
@@ -0,0 +1,50 @@
+# server/utils/hashing.py
+
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class _HashingMixin:
+    """SHA-256 of each uploaded file, computed chunk by chunk as the request body streams in."""
+
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)  # the memory handler may raise StopFutureHandlers
+
+    def receive_data_chunk(self, raw_data, start):
+        if getattr(self, "activated", True):  # an inactive memory handler just passes chunks on
+            self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def content_hash(file) -> str:
+    """
+    Hex SHA-256 of a django File (upload or stored). Uses the digest the upload
+    handlers attached while streaming; otherwise reads it in chunks and rewinds it.
+    """
+    digest = getattr(file, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_BYTES):
+        sha256.update(chunk)
+    file.seek(0)
+    file.sha256 = sha256.hexdigest()
+    return file.sha256
@@ -0,0 +1,36 @@
+# server/utils/process_pool.py
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+DOCUMENT_PROCESS_WORKERS = getattr(settings, "DOCUMENT_PROCESS_WORKERS", 2)
+# ------------------------------
+
+_lock = threading.Lock()
+_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Per-process pool for CPU-bound document work (rendering, text extraction).
+    Children are spawned, not forked, so they never inherit the web worker's
+    threads, DB connections or locks; submitted functions must live in modules
+    that import without Django (see resources.rendering / resources.extraction).
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, DOCUMENT_PROCESS_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("⚙️ Document process pool started (%d workers)", DOCUMENT_PROCESS_WORKERS)
+        return _pool
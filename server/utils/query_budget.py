@@ -0,0 +1,214 @@
+# server/utils/query_budget.py
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+QUERY_BUDGET_ENFORCE = getattr(settings, "QUERY_BUDGET_ENFORCE", False)        # raise instead of log
+QUERY_BUDGET_HEADERS = getattr(settings, "QUERY_BUDGET_HEADERS", settings.DEBUG)  # X-Query-* debug headers
+N_PLUS_ONE_THRESHOLD = getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 3)       # same shape ≥ N times
+# ------------------------------
+
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request/block runs more queries than budgeted or repeats a statement shape."""
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape: literals and IN-lists collapsed so repeated lookups compare equal."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper that records (shape, seconds) for every statement."""
+
+    def __init__(self):
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.statements.append((normalize_sql(sql), time.perf_counter() - start))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(shape for shape, _ in self.statements)
+
+    def n_plus_one(self, threshold=N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most repeated first."""
+        return [(shape, n) for shape, n in self.shapes().most_common() if n >= threshold]
+
+    def worst(self, limit=3) -> list[tuple[str, int, float]]:
+        """(shape, executions, total seconds), most expensive first."""
+        totals, counts = Counter(), Counter()
+        for shape, seconds in self.statements:
+            totals[shape] += seconds
+            counts[shape] += 1
+        return [(shape, counts[shape], total) for shape, total in totals.most_common(limit)]
+
+    def violations(self, max_queries=None, threshold=N_PLUS_ONE_THRESHOLD) -> list[str]:
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f"{self.count} queries (budget {max_queries})")
+        for shape, n in self.n_plus_one(threshold) if threshold else []:
+            problems.append(f"N+1: {n}x {shape}")
+        return problems
+
+
+# Recorders active in the current context. A contextvar rather than per-connection
+# wrappers: Django's connections are per thread, and under ASGI the ORM calls of a
+# request run on sync_to_async threads, which asgiref runs in a copy of its context.
+_active_recorders = ContextVar("query_recorders", default=())
+
+
+def _record(execute, sql, params, many, context):
+    """execute_wrapper installed on every connection; hands statements to the active recorders."""
+    for recorder in _active_recorders.get():
+        execute = partial(recorder, execute)
+    return execute(sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+connection_created.connect(_install)
+
+
+@contextmanager
+def record_queries():
+    """Record every statement run on any configured database inside the block, on any thread it reaches."""
+    recorder = QueryRecorder()
+    for conn in connections.all(initialized_only=True):
+        _install(conn)  # opened before this module was imported
+    token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    Test helper:
+        with assert_query_budget(3):
+            client.get("/api/resources/")
+    Fails with QueryBudgetExceeded listing the budget overrun and any N+1 shapes.
+    """
+    with record_queries() as recorder:
+        yield recorder
+    problems = recorder.violations(max_queries, n_plus_one_threshold)
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems))
+
+
+def query_budget(max_queries, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    Declare a view's query budget. Use on function views as the outermost decorator
+    (above @csrf_exempt, @api_view, ...): it only sets attributes on the function it
+    is given, and the middleware reads them from the function the URLconf resolves to.
+    On class-based views set `query_budget = N` as a class attribute instead.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        view_func.n_plus_one_threshold = n_plus_one_threshold
+        return view_func
+    return decorator
+
+
+def _budget_for(view_func):
+    """(max_queries, n_plus_one_threshold) declared on a view function or its class."""
+    for target in (view_func, getattr(view_func, "view_class", None), getattr(view_func, "cls", None)):
+        if target is not None and getattr(target, "query_budget", None) is not None:
+            return target.query_budget, getattr(target, "n_plus_one_threshold", N_PLUS_ONE_THRESHOLD)
+    return None, N_PLUS_ONE_THRESHOLD
+
+
+class QueryBudgetMiddleware:
+    """
+    📊 Records the SQL statements of each request.
+
+    - flags repeated statement shapes as N+1
+    - checks the view's declared budget; views that declare one raise on overruns
+      when QUERY_BUDGET_ENFORCE (e.g. in tests), everything else is logged
+    - adds X-Query-Count / X-Query-Worst headers when QUERY_BUDGET_HEADERS (DEBUG by default)
+
+    Sync and async capable, so under ASGI it does not force a thread per request
+    onto async views; record_queries follows the request's context onto the
+    sync_to_async threads that run its queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._query_budget = (None, N_PLUS_ONE_THRESHOLD)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self._check(request, response, recorder)
+
+    async def __acall__(self, request):
+        request._query_budget = (None, N_PLUS_ONE_THRESHOLD)
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        return self._check(request, response, recorder)
+
+    def _check(self, request, response, recorder):
+        max_queries, threshold = request._query_budget
+        problems = recorder.violations(max_queries, threshold)
+        if problems:
+            message = f"{request.method} {request.path}: " + "; ".join(problems)
+            if QUERY_BUDGET_ENFORCE and max_queries is not None:
+                raise QueryBudgetExceeded(message)
+            logger.warning("📊 Query budget: %s", message)
+
+        if QUERY_BUDGET_HEADERS:
+            response["X-Query-Count"] = str(recorder.count)
+            worst = recorder.worst(1)
+            if worst:
+                shape, n, seconds = worst[0]
+                header = f"{n}x {seconds * 1000:.1f}ms {shape}"
+                response["X-Query-Worst"] = header.encode("ascii", "replace").decode()[:300]
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = _budget_for(view_func)
+        return None
@@ -0,0 +1,16 @@
+# server/utils/routes.py
+
+import logging
+
+from django.conf import settings
+
+
+def log_routes(logger, urlpatterns, prefix=""):
+    """
+    🔗 Log every registered route at DEBUG, only when settings.LOG_URL_ROUTES is on.
+    Off by default: formatting and writing a line per route is paid on each cold start.
+    """
+    if not getattr(settings, "LOG_URL_ROUTES", False) or not logger.isEnabledFor(logging.DEBUG):
+        return
+    for route in urlpatterns:
+        logger.debug("🔗 Registered route: /%s%s (%s)", prefix, route.pattern, getattr(route, "name", None) or "-")
@@ -0,0 +1,128 @@
+# server/utils/signed_url_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+SIGNED_URL_CACHE_SIZE = getattr(settings, "SIGNED_URL_CACHE_SIZE", 4096)         # entries
+SIGNED_URL_MARGIN_SECONDS = getattr(settings, "SIGNED_URL_MARGIN_SECONDS", 300)  # 5 min
+# ------------------------------
+
+
+class SignedURLCache:
+    """
+    Thread-safe LRU cache of signed URLs keyed by (blob name, method, expiry bucket).
+
+    Time is cut into windows of (ttl - margin) seconds. Every caller inside the same
+    window gets the same URL, signed to expire at `window_start + ttl`, so a URL
+    handed out from the cache always has at least `margin` seconds of validity left.
+    When the window rolls over the key changes and a fresh URL is signed.
+    """
+
+    def __init__(self, maxsize=SIGNED_URL_CACHE_SIZE, margin_seconds=SIGNED_URL_MARGIN_SECONDS, clock=time.time):
+        self.maxsize = max(int(maxsize), 1)
+        self.margin = max(int(margin_seconds), 0)
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_sign(self, blob_name, sign, method="GET", expiration_minutes=60):
+        """
+        🔐 Return (url, expires_at) for `blob_name`.
+
+        `sign(blob_name, method, expires_at)` is only called on a cache miss and must
+        return a URL valid until the given aware UTC datetime.
+        """
+        def sign_many(names, m, exp):
+            return {name: sign(name, m, exp) for name in names}
+
+        return self.get_or_sign_many([blob_name], sign_many, method, expiration_minutes)[blob_name]
+
+    def get_or_sign_many(self, blob_names, sign_many, method="GET", expiration_minutes=60):
+        """
+        Batch variant: return {blob_name: (url, expires_at)}.
+
+        `sign_many(names, method, expires_at)` is called at most once, with every name
+        that missed, and must return {name: url}.
+        """
+        method = method.upper()
+        ttl = int(expiration_minutes * 60)
+        now = self._clock()
+        names = list(dict.fromkeys(blob_names))
+
+        if ttl <= self.margin:
+            # Window would be empty; nothing worth caching.
+            expires_at = datetime.fromtimestamp(now + ttl, tz=dt_timezone.utc)
+            urls = sign_many(names, method, expires_at) if names else {}
+            return {n: (urls[n], expires_at) if urls.get(n) else (None, None) for n in names}
+
+        window = ttl - self.margin
+        bucket = int(now // window)
+        results, missing = {}, []
+
+        with self._lock:
+            for name in names:
+                key = (name, method, ttl, bucket)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1].timestamp() - now >= self.margin:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results[name] = entry
+                else:
+                    self.misses += 1
+                    missing.append(name)
+
+        if not missing:
+            return results
+
+        # Sign outside the lock; a concurrent miss for the same key just signs twice.
+        expires_at = datetime.fromtimestamp(bucket * window + ttl, tz=dt_timezone.utc)
+        urls = sign_many(missing, method, expires_at)
+
+        with self._lock:
+            for name in missing:
+                url = urls.get(name)
+                if not url:
+                    results[name] = (None, None)
+                    continue
+                key = (name, method, ttl, bucket)
+                self._entries[key] = results[name] = (url, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        logger.debug("🔐 Signed %d URL(s) cached (%s, expires %s)", len(missing), method, expires_at.isoformat())
+        return results
+
+    def window_id(self, expiration_minutes=60):
+        """Index of the current expiry window; URLs handed out stay identical within it."""
+        ttl = int(expiration_minutes * 60)
+        return int(self._clock() // (ttl - self.margin)) if ttl > self.margin else None
+
+    def invalidate(self, blob_name):
+        """Drop every cached URL for `blob_name` (e.g. after a rename/delete)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == blob_name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Process-wide instance shared by the model, serializers and admin.
+signed_url_cache = SignedURLCache()
@@ -0,0 +1,101 @@
+# server/utils/storage_ops.py
+
+import errno
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+from utils.signed_url_cache import signed_url_cache
+
+logger = logging.getLogger(__name__)
+
+# ---------- Tunables ----------
+# You can override these in settings.py if you want.
+STORAGE_COPY_CHUNK_BYTES = getattr(settings, "STORAGE_COPY_CHUNK_BYTES", 1024 * 1024)  # streaming fallback
+# ------------------------------
+
+
+def _is_gcs(storage) -> bool:
+    return hasattr(storage, "bucket") and hasattr(storage, "_normalize_name")
+
+
+def _move_gcs(storage, old_name, new_name):
+    """Server-side rewrite inside the bucket; no object bytes pass through this process."""
+    bucket = storage.bucket
+    source = bucket.blob(storage._normalize_name(old_name))
+    target = bucket.blob(storage._normalize_name(new_name))
+    token, rewritten, total = target.rewrite(source)
+    while token is not None:  # large / cross-location objects rewrite in several calls
+        logger.debug("🔁 GCS rewrite %s → %s: %s/%s bytes", old_name, new_name, rewritten, total)
+        token, rewritten, total = target.rewrite(source, token=token)
+    source.delete()
+    return new_name
+
+
+def _move_local(storage, old_name, new_name):
+    """Atomic rename on the same filesystem."""
+    destination = storage.path(new_name)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(storage.path(old_name), destination)
+    return new_name
+
+
+def _move_streaming(storage, old_name, new_name, chunk_size):
+    """Any other backend: copy through a bounded buffer, then delete the source."""
+    with storage.open(old_name, "rb") as source:
+        content = File(source, name=os.path.basename(new_name))
+        content.DEFAULT_CHUNK_SIZE = chunk_size
+        saved_name = storage.save(new_name, content)
+    storage.delete(old_name)
+    return saved_name
+
+
+def move_object(storage, old_name, new_name, chunk_size=STORAGE_COPY_CHUNK_BYTES) -> str:
+    """
+    🔀 Rename/move a stored object and return its final name.
+
+    - GCS: server-side rewrite + delete of the source
+    - FileSystemStorage: os.replace (falls back to streaming across devices)
+    - anything else: chunked streaming copy with memory bounded by `chunk_size`
+    The caller picks a free `new_name` and updates the model field.
+    """
+    if old_name == new_name:
+        return new_name
+
+    if _is_gcs(storage):
+        final_name, how = _move_gcs(storage, old_name, new_name), "gcs-rewrite"
+    elif isinstance(storage, FileSystemStorage):
+        try:
+            final_name, how = _move_local(storage, old_name, new_name), "os.replace"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            final_name, how = _move_streaming(storage, old_name, new_name, chunk_size), "stream"
+    else:
+        final_name, how = _move_streaming(storage, old_name, new_name, chunk_size), "stream"
+
+    signed_url_cache.invalidate(old_name)
+    logger.info("🔀 Moved stored object (%s): %s → %s", how, old_name, final_name)
+    return final_name
+
+
+@contextmanager
+def local_copy(storage, name, chunk_size=STORAGE_COPY_CHUNK_BYTES):
+    """
+    A filesystem path holding the stored object for tools that need one: the file
+    itself on FileSystemStorage, else a temporary copy downloaded in chunks.
+    """
+    if isinstance(storage, FileSystemStorage):
+        yield storage.path(name)
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(name)[1]) as tmp:
+        with storage.open(name, "rb") as source:
+            shutil.copyfileobj(source, tmp, chunk_size)
+        tmp.flush()
+        yield tmp.name
@@ -0,0 +1,181 @@
+# server/utils/tests.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from urllib.parse import quote
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+
+from .gcs_signer import V4URLSigner
+from .query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, _budget_for, record_queries
+
+
+def _service_account(private_key_pem):
+    from google.oauth2 import service_account
+
+    return service_account.Credentials.from_service_account_info({
+        "type": "service_account",
+        "project_id": "elimu-test",
+        "private_key_id": "test",
+        "private_key": private_key_pem,
+        "client_email": "signer@elimu-test.iam.gserviceaccount.com",
+        "client_id": "0",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+
+
+class V4URLSignerTests(SimpleTestCase):
+    """The local signer must produce exactly the URLs google-cloud-storage does."""
+
+    bucket_name = "elimu-test-bucket"
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.private_key_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        cls.credentials = _service_account(cls.private_key_pem)
+
+    def _library_url(self, credentials, name, method="GET", expiration=3600, content_type=None):
+        from google.cloud.storage._signing import generate_signed_url_v4
+
+        return generate_signed_url_v4(
+            credentials,
+            resource=f"/{self.bucket_name}/{quote(name.encode('utf-8'), safe=b'/~')}",
+            expiration=expiration,
+            method=method,
+            content_type=content_type,
+            _request_timestamp=self.now.strftime("%Y%m%dT%H%M%SZ"),
+        )
+
+    def test_matches_library_for_fixed_key(self):
+        signer = V4URLSigner(self.credentials, self.bucket_name)
+        for name in ["resources/notes.pdf", "resources/Form 3 Biology T1 (ü).pdf", "a/b~c+d&e.pdf"]:
+            with self.subTest(name=name):
+                self.assertEqual(
+                    signer.sign(name, expiration=timedelta(hours=1), now=self.now),
+                    self._library_url(self.credentials, name),
+                )
+
+    def test_sign_many_matches_sign(self):
+        signer = V4URLSigner(self.credentials, self.bucket_name)
+        names = [f"resources/page-{i}.pdf" for i in range(5)]
+        urls = signer.sign_many(names, method="put", expiration=timedelta(minutes=15), now=self.now)
+        self.assertEqual(list(urls), names)
+        for name in names:
+            self.assertEqual(urls[name], self._library_url(self.credentials, name, method="PUT", expiration=900))
+
+    def test_signed_content_type_matches_library(self):
+        signer = V4URLSigner(self.credentials, self.bucket_name)
+        url = signer.sign("resources/upload.pdf", method="PUT", expiration=timedelta(minutes=15),
+                          now=self.now, content_type="application/pdf")
+        self.assertIn("X-Goog-SignedHeaders=content-type%3Bhost", url)
+        self.assertEqual(url, self._library_url(
+            self.credentials, "resources/upload.pdf", method="PUT", expiration=900, content_type="application/pdf"
+        ))
+
+    def test_pure_python_rsa_key_is_converted(self):
+        from google.auth.crypt import _python_rsa
+
+        credentials = _service_account(self.private_key_pem)
+        credentials._signer = _python_rsa.RSASigner.from_string(self.private_key_pem, "test")
+        signer = V4URLSigner(credentials, self.bucket_name)
+        self.assertEqual(
+            signer.sign("resources/notes.pdf", now=self.now),
+            self._library_url(self.credentials, "resources/notes.pdf"),
+        )
+
+    def test_rejects_expiry_beyond_seven_days(self):
+        signer = V4URLSigner(self.credentials, self.bucket_name)
+        with self.assertRaises(ValueError):
+            signer.sign("resources/notes.pdf", expiration=timedelta(days=8), now=self.now)
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "testserver"])
+class QueryBudgetEnforcedTests(TestCase):
+    """Views that declare a budget stay within it with QUERY_BUDGET_ENFORCE on."""
+
+    def setUp(self):
+        from resources.models import Category, Resource
+
+        enforce = mock.patch("utils.query_budget.QUERY_BUDGET_ENFORCE", True)
+        enforce.start()
+        self.addCleanup(enforce.stop)
+        self.resources = [
+            Resource.objects.create(
+                title=f"Biology notes {i}", file=f"resources/budget-{i}.pdf",
+                category=Category.NOTES, is_free=bool(i % 2),
+            )
+            for i in range(12)
+        ]
+
+    def test_resource_list_within_budget(self):
+        from resources.views import ResourceListView
+
+        self.assertEqual(_budget_for(resolve("/api/resources/").func)[0], ResourceListView.query_budget)
+        for query in ["?category=NOTES", "?free=true&page_size=5", "?q=biology", "?fields=id,title"]:
+            with self.subTest(query=query):
+                with record_queries() as recorder:
+                    response = self.client.get("/api/resources/" + query)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(recorder.count, ResourceListView.query_budget)
+
+    def test_resource_list_within_budget_when_authenticated(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        user = get_user_model().objects.create(email="budget@example.invalid")
+        token = RefreshToken.for_user(user).access_token
+        response = self.client.get("/api/resources/?category=NOTES", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_resource_list_overrun_raises(self):
+        from resources.views import ResourceListView
+
+        with mock.patch.object(ResourceListView, "query_budget", 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get("/api/resources/?category=NOTES")
+
+    def test_payment_callback_within_budget(self):
+        from payments.models import MpesaCallback
+
+        self.assertEqual(_budget_for(resolve("/api/payment/confirmation/").func)[0], 1)
+        body = {"Body": {"stkCallback": {"CheckoutRequestID": "ws_CO_budget", "ResultCode": 0}}}
+        with record_queries() as recorder:
+            response = self.client.post("/api/payment/confirmation/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(recorder.count, 1)
+        self.assertEqual(MpesaCallback.objects.count(), 1)
+
+
+class QueryBudgetMiddlewareAsyncTests(TestCase):
+    """Under ASGI the middleware runs natively on the event loop and still counts queries."""
+
+    def test_not_adapted_in_async_chain(self):
+        from django.core.handlers.asgi import ASGIHandler
+
+        with self.assertNoLogs("django.request", level="DEBUG"):
+            ASGIHandler()  # load_middleware(is_async=True) logs each sync-only middleware it adapts
+
+    async def test_counts_queries_of_async_view(self):
+        from asgiref.sync import iscoroutinefunction
+        from django.http import HttpRequest, JsonResponse
+
+        from resources.models import Resource
+
+        async def view(request):
+            return JsonResponse({"count": await Resource.objects.acount()})
+
+        middleware = QueryBudgetMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with mock.patch("utils.query_budget.QUERY_BUDGET_HEADERS", True):
+            response = await middleware(HttpRequest())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Query-Count"], "1")